@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Benchmark time-to-full-catalogue for the ExerciseDB crawler against a
+local stub server (no network needed)
+
+The stub serves a synthetic paginated catalogue in ExerciseDB's response
+shape, adds a fixed latency per request and answers 429 with Retry-After
+once clients exceed a requests-per-second budget.
+
+    python benchmark_exercise_fetch.py
+    python benchmark_exercise_fetch.py --exercises 20000 --latency 0.3 --max-rps 20
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from progress.exercise_catalog_sync import CatalogSync
+
+
+def make_stub_handler(total, latency, max_rps):
+    request_times = []
+    lock = threading.Lock()
+    stats = {'requests': 0, 'throttled': 0}
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body, headers=()):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            now = time.monotonic()
+            with lock:
+                stats['requests'] += 1
+                request_times[:] = [t for t in request_times if now - t < 1.0]
+                throttled = len(request_times) >= max_rps
+                if throttled:
+                    stats['throttled'] += 1
+                else:
+                    request_times.append(now)
+            if throttled:
+                self._send(429, {'success': False, 'error': 'Too many requests'}, [('Retry-After', '1')])
+                return
+
+            time.sleep(latency)
+            query = parse_qs(urlparse(self.path).query)
+            offset = int(query.get('offset', ['0'])[0])
+            limit = int(query.get('limit', ['10'])[0])
+            end = min(total, offset + limit)
+            data = [{'exerciseId': f'ex{i:06d}', 'name': f'stub exercise {i}'} for i in range(offset, end)]
+            self._send(200, {
+                'success': True,
+                'data': data,
+                'metadata': {'totalCount': total, 'nextPage': end < total or None},
+            })
+
+    return StubHandler, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--exercises', type=int, default=1500)
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds per stub response')
+    parser.add_argument('--max-rps', type=int, default=25, help='stub rate limit before answering 429')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+
+    handler, stats = make_stub_handler(args.exercises, args.latency, args.max_rps)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = f'http://127.0.0.1:{server.server_port}/api/v1/exercises'
+
+    print(f"Stub: {args.exercises} exercises, {args.latency}s latency, {args.max_rps} req/s limit")
+    print(f"{'workers':>8} {'seconds':>9} {'exercises':>10} {'requests':>9} {'429s':>6}")
+    for workers in args.workers:
+        stats.update(requests=0, throttled=0)
+        time.sleep(1.0)  # Let the stub's rate window drain between runs
+        started = time.perf_counter()
+        sync = CatalogSync(api_url, max_workers=workers)
+        sync.refresh(full=True)
+        exercises = sync.exercises()
+        elapsed = time.perf_counter() - started
+        print(f"{workers:>8} {elapsed:>9.2f} {len(exercises):>10} {stats['requests']:>9} {stats['throttled']:>6}")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Benchmark the SQLite-backed priority queue behind /api/queue
+
+Pushes items from one process, then drains them with several processes
+popping concurrently, and checks that no item was handed out twice. Runs
+offline against a throwaway database file:
+
+    python benchmark_queue.py
+    python benchmark_queue.py --items 20000 --consumers 8
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.queue_store import SQLitePriorityQueue
+
+
+def drain(path, results):
+    queue = SQLitePriorityQueue(path)
+    handles = []
+    while True:
+        entry = queue.pop_entry()
+        if entry is None:
+            break
+        handles.append(entry[1])
+    results.put(handles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=5000)
+    parser.add_argument('--consumers', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'queue.sqlite3')
+        queue = SQLitePriorityQueue(path)
+
+        started = time.perf_counter()
+        for i in range(args.items):
+            queue.push({'n': i}, i % 10)
+        push_seconds = time.perf_counter() - started
+
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        consumers = [context.Process(target=drain, args=(path, results)) for _ in range(args.consumers)]
+        started = time.perf_counter()
+        for consumer in consumers:
+            consumer.start()
+        popped = [results.get() for _ in consumers]
+        for consumer in consumers:
+            consumer.join()
+        pop_seconds = time.perf_counter() - started
+
+    handles = [handle for batch in popped for handle in batch]
+    print(f"push: {args.items / push_seconds:>10.0f} ops/s (1 process)")
+    print(f"pop:  {len(handles) / pop_seconds:>10.0f} ops/s ({args.consumers} processes, including startup)")
+    print(f"popped {len(handles)} of {args.items}, {len(handles) - len(set(handles))} duplicates, "
+          f"per consumer {[len(batch) for batch in popped]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Benchmark priority aging in the queue: how long a low-priority item waits
+under a steady stream of high-priority work
+
+Starts with a backlog of high-priority items and one low-priority item,
+then each tick pushes one more high-priority item and pops one, so the
+queue never drains. Without aging the low item is never popped; with an
+aging rate r it must come out by
+
+    ticks <= backlog + (high - low) / r + 1
+
+since high-priority items pushed more than (high - low) / r ticks after it
+rank below it. The clock is simulated, so this runs in well under a second
+and checks the bound for every rate. It also times push/pop with and
+without aging, to show aging adds no per-operation cost:
+
+    python benchmark_queue_aging.py
+    python benchmark_queue_aging.py --backlog 1000 --rates 0 0.01 0.1 1
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.data_structures.priority_queue import PriorityQueue
+
+
+def starvation(rate, backlog, high, low, max_ticks):
+    """Ticks until the low-priority item is popped, or None if it still hadn't after max_ticks"""
+    now = [0.0]
+    queue = PriorityQueue(aging_rate=rate, clock=lambda: now[0])
+    for i in range(backlog):
+        queue.push(('high', i), high)
+    target = queue.push(('low', 0), low)
+    for tick in range(1, max_ticks + 1):
+        now[0] = float(tick)
+        queue.push(('high', backlog + tick), high)
+        if queue.pop_entry()[1] == target:
+            return tick
+    return None
+
+
+def throughput(rate, items, seed):
+    """push and pop operations per second on a queue of items random priorities"""
+    rng = random.Random(seed)
+    priorities = [rng.randint(0, 100) for _ in range(items)]
+    queue = PriorityQueue(aging_rate=rate)
+    started = time.perf_counter()
+    for i, priority in enumerate(priorities):
+        queue.push(i, priority)
+    push_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    while queue.pop_entry() is not None:
+        pass
+    pop_seconds = time.perf_counter() - started
+    return items / push_seconds, items / pop_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backlog', type=int, default=100, help='high-priority items queued at the start')
+    parser.add_argument('--high', type=int, default=10)
+    parser.add_argument('--low', type=int, default=0)
+    parser.add_argument('--rates', type=float, nargs='+', default=[0, 0.01, 0.1, 1, 10])
+    parser.add_argument('--max-ticks', type=int, default=100000)
+    parser.add_argument('--items', type=int, default=100000, help='items for the throughput run')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"backlog {args.backlog} at priority {args.high}, one item at priority {args.low}, "
+          f"one push and one pop per tick")
+    print(f"{'rate':>8} {'waited':>8} {'bound':>8}")
+    failures = 0
+    for rate in args.rates:
+        waited = starvation(rate, args.backlog, args.high, args.low, args.max_ticks)
+        bound = args.backlog + math.floor((args.high - args.low) / rate) + 1 if rate else None
+        if bound is not None and (waited is None or waited > bound):
+            failures += 1
+        print(f"{rate:>8g} {waited if waited is not None else f'>{args.max_ticks}':>8} "
+              f"{bound if bound is not None else 'none':>8}")
+
+    print()
+    print(f"{'rate':>8} {'push/s':>10} {'pop/s':>10}  ({args.items} items)")
+    for rate in (0, 1):
+        pushes, pops = throughput(rate, args.items, args.seed)
+        print(f"{rate:>8g} {pushes:>10.0f} {pops:>10.0f}")
+    if failures:
+        sys.exit(f"{failures} rate(s) exceeded the starvation bound")
+
+
+if __name__ == "__main__":
+    main()
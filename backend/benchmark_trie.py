@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Compare memory and autocomplete latency of the radix Trie (with and without
+per-node top-k caches) against the original one-node-per-character CharTrie
+
+Runs offline on a synthetic exercise-like catalogue, no Django or Firebase needed:
+
+    python benchmark_trie.py            # 20,000 names
+    python benchmark_trie.py 200000
+"""
+import gc
+import itertools
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.data_structures.trie import CharTrie, Trie
+
+EQUIPMENT = [
+    "barbell", "dumbbell", "cable", "smith machine", "kettlebell", "band", "ez barbell",
+    "lever", "sled", "body weight", "weighted", "trap bar", "medicine ball", "stability ball",
+]
+MODIFIERS = [
+    "", "incline", "decline", "seated", "standing", "lying", "single-arm", "single-leg",
+    "close-grip", "wide-grip", "reverse-grip", "alternating", "kneeling", "one arm", "pause",
+]
+MOVEMENTS = [
+    "bench press", "shoulder press", "curl", "hammer curl", "row", "upright row", "fly",
+    "lateral raise", "front raise", "squat", "split squat", "lunge", "deadlift", "romanian deadlift",
+    "hip thrust", "pullover", "shrug", "triceps extension", "pushdown", "kickback", "calf raise",
+    "crunch", "twist", "pulldown", "pull-up", "chin-up", "step-up", "good morning", "dip", "rdl",
+]
+SUFFIXES = ["", "v. 2", "with rotation", "on floor", "to chest", "(male)", "(female)", "hold"]
+
+PREFIXES = ["b", "c", "d", "s", "ba", "ca", "sm", "bar", "cab", "dum", "barb", "smit"]
+
+
+def make_corpus(size, seed=42):
+    """Generate `size` distinct exercise-like names"""
+    rng = random.Random(seed)
+    combos = list(itertools.product(EQUIPMENT, MODIFIERS, MOVEMENTS, SUFFIXES))
+    rng.shuffle(combos)
+    names = []
+    for i, (equipment, modifier, movement, suffix) in enumerate(itertools.cycle(combos)):
+        if len(names) >= size:
+            break
+        parts = [equipment, modifier, movement, suffix]
+        if i >= len(combos):
+            parts.append(f"variation {i // len(combos)}")
+        names.append(" ".join(p for p in parts if p))
+    return names
+
+
+IMPLEMENTATIONS = [
+    ("CharTrie", CharTrie),
+    ("Trie", Trie),
+    ("Trie(top_k)", lambda: Trie(top_k=10)),
+]
+
+
+def measure_build(make_trie, names):
+    """Return (trie, bytes allocated, seconds) for loading names"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    trie = make_trie()
+    if hasattr(trie, "bulk_load"):
+        trie.bulk_load(names)
+    else:
+        for name in names:
+            trie.insert(name)
+    elapsed = time.perf_counter() - start
+    allocated, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return trie, allocated, elapsed
+
+
+def measure_autocomplete(trie, rounds=200):
+    """Return mean microseconds per autocomplete call over PREFIXES"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for prefix in PREFIXES:
+            trie.autocomplete(prefix, 10)
+    return (time.perf_counter() - start) / (rounds * len(PREFIXES)) * 1e6
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    names = make_corpus(size)
+    print(f"Corpus: {len(names)} names, {sum(len(n) for n in names)} characters")
+    print(f"{'implementation':<12} {'memory':>12} {'bytes/word':>12} {'build':>10} {'autocomplete':>14}")
+
+    for label, make_trie in IMPLEMENTATIONS:
+        trie, allocated, build_seconds = measure_build(make_trie, names)
+        latency = measure_autocomplete(trie)
+        print(f"{label:<12} {allocated / 1e6:>10.1f}MB {allocated / len(trie):>12.0f} "
+              f"{build_seconds * 1000:>8.0f}ms {latency:>12.1f}us")
+        del trie
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+"""
+Benchmark suite for the exercise Trie, for comparing releases
+
+Runs offline on synthetic exercise-like catalogues (no Django, Firebase or
+ExerciseDB needed) and measures, per corpus size:
+
+- build throughput: bulk_load() of the whole corpus, and insert() of a
+  sample of names into an already-full trie (the incremental refresh path)
+- resident memory per word (RSS growth while building)
+- autocomplete latency, p50/p99, for 1-4 character prefixes
+- the cost of the contains fallback: the same mid-word queries with and
+  without contains
+
+Each corpus is measured in a fresh process, so memory freed by a smaller
+run doesn't hide the growth of the next one. Pass --json to get output that
+can be diffed between releases:
+
+    python benchmark_trie_suite.py
+    python benchmark_trie_suite.py --sizes 1000 20000 --json results.json
+    python benchmark_trie_suite.py --json - | jq '.corpora[].memory'
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark_trie import make_corpus
+from config.data_structures.token_index import TokenIndex
+from config.data_structures.trie import Trie
+
+SCHEMA_VERSION = 1
+DEFAULT_SIZES = [1000, 20000, 200000]
+PREFIX_LENGTHS = [1, 2, 3, 4]
+MAX_RESULTS = 10
+
+# Same configuration as progress.exercise_trie_service.new_exercise_trie()
+TRIE_CONFIG = {'top_k': 25, 'index_substrings': True, 'index_tokens': True}
+
+
+def new_trie():
+    return Trie(**TRIE_CONFIG)
+
+
+def rss_bytes():
+    """Resident set size of this process, or None where it can't be read"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    index = min(len(samples) - 1, max(0, int(round(fraction * len(samples))) - 1))
+    return samples[index]
+
+
+def summarize(seconds):
+    """p50/p99/mean in microseconds of a list of per-call timings"""
+    samples = sorted(seconds)
+    return {
+        'queries': len(samples),
+        'p50_us': round(percentile(samples, 0.50) * 1e6, 2),
+        'p99_us': round(percentile(samples, 0.99) * 1e6, 2),
+        'mean_us': round(sum(samples) / len(samples) * 1e6, 2),
+    }
+
+
+def time_queries(trie, queries, contains, rounds):
+    """Per-call seconds for every query, best of `rounds` runs each"""
+    timings = []
+    for query in queries:
+        best = None
+        for _ in range(rounds):
+            started = time.perf_counter()
+            trie.autocomplete(query, MAX_RESULTS, contains=contains)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        timings.append(best)
+    return timings
+
+
+def prefix_queries(names, length, count, rng):
+    """
+    Prefixes of `length` characters, half from the start of a name and half
+    from the start of a later word (what users type for "press" or "curl")
+    """
+    queries = []
+    while len(queries) < count:
+        name = rng.choice(names)
+        words = [word for word in TokenIndex.tokenize(name) if len(word) >= length]
+        if len(queries) % 2 and len(words) > 1:
+            source = rng.choice(words[1:])
+        else:
+            source = name
+        query = source[:length].strip()
+        if len(query) == length:
+            queries.append(query)
+    return queries
+
+
+def contains_queries(names, count, rng):
+    """3-5 character substrings that start inside a word, so only the contains fallback finds them"""
+    queries = []
+    while len(queries) < count:
+        name = rng.choice(names)
+        length = rng.randint(3, 5)
+        starts = [i for i in range(1, len(name) - length + 1)
+                  if name[i - 1].isalnum() and name[i:i + length].isalnum()]
+        if starts:
+            queries.append(name[rng.choice(starts):][:length])
+    return queries
+
+
+def run_corpus(size, seed, queries, rounds, insert_sample):
+    """Measure one corpus size; returns a JSON-ready dict"""
+    rng = random.Random(seed)
+    names = make_corpus(size, seed)
+    result = {'size': len(names), 'characters': sum(len(name) for name in names)}
+
+    # Bulk build, with the RSS growth it causes
+    gc.collect()
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    trie = new_trie()
+    trie.bulk_load(names)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    rss_after = rss_bytes()
+    result['bulk_load'] = {'seconds': round(elapsed, 4), 'words_per_second': round(len(names) / elapsed)}
+    if rss_before is not None and rss_after is not None:
+        growth = rss_after - rss_before
+        result['memory'] = {'rss_bytes': growth, 'rss_bytes_per_word': round(growth / len(names), 1)}
+    else:
+        result['memory'] = {'rss_bytes': None, 'rss_bytes_per_word': None}
+
+    # Single inserts into a trie already holding the rest of the corpus
+    sample = min(insert_sample, len(names))
+    incremental = new_trie()
+    incremental.bulk_load(names[:len(names) - sample])
+    started = time.perf_counter()
+    for name in names[len(names) - sample:]:
+        incremental.insert(name)
+    elapsed = time.perf_counter() - started
+    result['insert'] = {'words': sample, 'seconds': round(elapsed, 4), 'words_per_second': round(sample / elapsed)}
+    del incremental
+
+    # Autocomplete as the service calls it: contains only from 3 characters
+    result['autocomplete'] = {}
+    for length in PREFIX_LENGTHS:
+        batch = prefix_queries(names, length, queries, rng)
+        trie.autocomplete(batch[0], MAX_RESULTS, contains=length >= 3)  # Warm up
+        timings = time_queries(trie, batch, length >= 3, rounds)
+        result['autocomplete'][str(length)] = summarize(timings)
+
+    batch = contains_queries(names, queries, rng)
+    without = summarize(time_queries(trie, batch, False, rounds))
+    with_contains = summarize(time_queries(trie, batch, True, rounds))
+    result['contains_fallback'] = {
+        'without': without,
+        'with': with_contains,
+        'p50_overhead_us': round(with_contains['p50_us'] - without['p50_us'], 2),
+        'p99_overhead_us': round(with_contains['p99_us'] - without['p99_us'], 2),
+    }
+    return result
+
+
+def print_table(report):
+    print(f"Python {report['python']} on {report['platform']}, seed {report['seed']}")
+    print(f"{'size':>8} {'bulk w/s':>10} {'insert w/s':>11} {'RSS B/word':>11}  "
+          + "  ".join(f"{f'{n}ch p50/p99 us':>17}" for n in PREFIX_LENGTHS)
+          + f"  {'contains +p50/+p99 us':>22}")
+    for corpus in report['corpora']:
+        latency = "  ".join(
+            f"{corpus['autocomplete'][str(n)]['p50_us']:>8.1f}/{corpus['autocomplete'][str(n)]['p99_us']:<8.1f}"
+            for n in PREFIX_LENGTHS)
+        per_word = corpus['memory']['rss_bytes_per_word']
+        fallback = corpus['contains_fallback']
+        print(f"{corpus['size']:>8} {corpus['bulk_load']['words_per_second']:>10} "
+              f"{corpus['insert']['words_per_second']:>11} {per_word if per_word is not None else 'n/a':>11}  "
+              f"{latency}  {fallback['p50_overhead_us']:>10.1f}/{fallback['p99_overhead_us']:<10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--queries', type=int, default=300, help='queries per prefix length')
+    parser.add_argument('--rounds', type=int, default=3, help='timed runs per query (best is kept)')
+    parser.add_argument('--insert-sample', type=int, default=5000, help='names inserted one at a time')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', metavar='PATH', help="write JSON results to PATH ('-' for stdout)")
+    args = parser.parse_args()
+
+    report = {
+        'schema': SCHEMA_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'trie_config': TRIE_CONFIG,
+        'max_results': MAX_RESULTS,
+        'corpora': [],
+    }
+    context = multiprocessing.get_context('spawn')
+    for size in args.sizes:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            corpus = pool.submit(run_corpus, size, args.seed, args.queries, args.rounds, args.insert_sample)
+            report['corpora'].append(corpus.result())
+        if args.json != '-':
+            print(f"Measured {size} names", file=sys.stderr)
+
+    if args.json == '-':
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        print()
+        return
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+    print_table(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -34,25 +34,45 @@ def create_post(title, content, author_uid, category='General'):
     db.collection('posts').document(post_id).set(post_data)
     return post_data
 
-def get_all_posts(sort_by='date', user_uid=None):
+# Page sizes for feed requests that ask for a page ('limit' or 'offset');
+# without either the whole feed is returned
+POSTS_PAGE_SIZE = 50
+MAX_POSTS_PAGE_SIZE = 200
+
+def _post_priority(post_data, sort_by):
+    """Feed ranking of a raw post document: likes for 'likes', else creation time"""
+    if sort_by == 'likes':
+        # For "most liked": use likes count as priority (higher likes = higher priority)
+        return post_data.get('likes', 0)
+    # For "latest": use timestamp as priority (more recent = higher priority)
+    created_at_dt = post_data.get('created_at')
+    # Convert datetime to seconds since epoch
+    return int(created_at_dt.timestamp()) if created_at_dt else 0
+
+def get_all_posts(sort_by='date', user_uid=None, limit=None, offset=0):
     """
-    Get all posts from Firestore, sorted by date or likes using custom PriorityQueue
+    Get posts from Firestore, sorted by date or likes using custom PriorityQueue
     If user_uid is provided, also includes whether the user has liked each post
+    
+    With a limit, only the top offset + limit posts are kept while streaming
+    the collection (a bounded top-K heap rather than sorting every post), and
+    only the returned page is hydrated with replies and serialised. Without
+    one, every post from offset on is returned.
     """
     db = get_firestore_client()
     
     # Fetch all posts without ordering (Firestore provides them in arbitrary order)
     posts_query = db.collection('posts')
-    posts = posts_query.stream()
+    posts = (post.to_dict() for post in posts_query.stream())
+    if limit is None:
+        posts = list(posts)
+        limit = max(len(posts) - offset, 0)
     
-    # Create priority queue
-    pq = PriorityQueue()
+    # Rank on the raw documents, keeping just the posts up to the end of the page
+    top = PriorityQueue.nlargest(offset + limit, posts, lambda post_data: _post_priority(post_data, sort_by))
     
-    # Process each post
-    for post in posts:
-        post_data = post.to_dict()
-        
-        # Store original datetime for priority calculation
+    posts_list = []
+    for _priority, post_data in top[offset:]:
         created_at_dt = post_data.get('created_at')
         
         # Convert to ISO format for frontend
@@ -76,25 +96,6 @@ def get_all_posts(sort_by='date', user_uid=None):
         # Sort replies by created_at in Python
         post_data['replies'].sort(key=lambda x: x.get('created_at', ''))
         
-        # Calculate priority based on sort_by parameter
-        if sort_by == 'likes':
-            # For "most liked": use likes count as priority (higher likes = higher priority)
-            priority = post_data.get('likes', 0)
-        else:
-            # For "latest": use timestamp as priority (more recent = higher priority)
-            if created_at_dt:
-                # Convert datetime to seconds since epoch
-                priority = int(created_at_dt.timestamp())
-            else:
-                priority = 0
-        
-        # Push post into priority queue with calculated priority
-        pq.push(post_data, priority)
-    
-    # Pop all posts from priority queue (highest priority first)
-    posts_list = []
-    while not pq.is_empty():
-        priority, post_data = pq.pop()
         posts_list.append(post_data)
     
     return posts_list
@@ -15,7 +15,9 @@ from .firebase_service import (
     delete_post,
     like_post,
     create_reply,
-    delete_reply
+    delete_reply,
+    POSTS_PAGE_SIZE,
+    MAX_POSTS_PAGE_SIZE
 )
 from authentication.firebase_service import verify_firebase_token
 from config.firebase import initialize_firebase
@@ -33,7 +35,16 @@ def post_list(request):
         # Get user UID for like tracking from authenticated user
         user_uid = request.user.uid if hasattr(request.user, 'uid') else None
         
-        posts_data = get_all_posts(sort_by=sort_by, user_uid=user_uid)
+        # Paged only when the client asks for a page; otherwise the whole feed
+        limit = None
+        try:
+            if 'limit' in request.GET or 'offset' in request.GET:
+                limit = max(min(int(request.GET.get('limit', POSTS_PAGE_SIZE)), MAX_POSTS_PAGE_SIZE), 0)
+            offset = max(int(request.GET.get('offset', 0)), 0)
+        except ValueError:
+            return JsonResponse({'error': "'limit' and 'offset' must be integers"}, status=400)
+        
+        posts_data = get_all_posts(sort_by=sort_by, user_uid=user_uid, limit=limit, offset=offset)
         
         return JsonResponse(posts_data, safe=False)
     
@@ -0,0 +1,77 @@
+"""
+Bounded LRU cache with TTL and generation-based invalidation
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache
+
+    Every entry is stored with the generation of the data it was computed
+    from. A lookup passes the current generation, and entries from any other
+    generation count as misses, so bumping the generation invalidates the
+    whole cache in O(1) without touching the entries. Entries also expire
+    after ttl seconds.
+
+    Time Complexity:
+    - Get/Put: O(1)
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl  # Seconds an entry stays valid, None for no expiry
+        self._entries = OrderedDict()  # key -> (value, generation, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0  # Misses caused by a stale generation or expiry
+
+    def get(self, key: Hashable, generation: Any = None, default: Any = None) -> Any:
+        """Return the cached value for key if it is from this generation and not expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, entry_generation, expires_at = entry
+                if entry_generation == generation and (expires_at is None or expires_at > time.monotonic()):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.invalidations += 1
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any, generation: Any = None) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, generation, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Counters for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,130 @@
+"""
+N-gram posting-list index for substring ("contains") search
+"""
+from array import array
+from heapq import nsmallest
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+
+class NGramIndex:
+    """
+    Maps every n-character substring of each word to the ids of the words
+    containing it
+
+    A query of at least n characters only has to check the words listed
+    under its rarest n-gram instead of every word in the catalogue. Posting
+    lists are unsigned int arrays, 4 bytes per entry.
+
+    Time Complexity:
+    - Add: O(m) where m is the length of the word
+    - Search: O(p) where p is the length of the shortest posting list among the query's n-grams
+    """
+
+    def __init__(self, n: int = 3):
+        self.n = n
+        self._words: List[Optional[str]] = []  # word id -> word, None once removed
+        self._ids: Dict[str, int] = {}  # word -> word id
+        self._postings: Dict[str, array] = {}  # n-gram -> ids of words containing it
+
+    def _grams(self, text: str) -> set:
+        return {text[i:i + self.n] for i in range(len(text) - self.n + 1)}
+
+    def add(self, word: str) -> None:
+        """Index a word (expected to be normalised already)"""
+        if word in self._ids:
+            return
+        word_id = len(self._words)
+        self._words.append(word)
+        self._ids[word] = word_id
+        for gram in self._grams(word):
+            posting = self._postings.get(gram)
+            if posting is None:
+                posting = self._postings[gram] = array('I')
+            posting.append(word_id)
+
+    def add_all(self, words: Iterable[str]) -> None:
+        for word in words:
+            self.add(word)
+
+    def remove(self, word: str) -> bool:
+        """
+        Drop a word from the index
+
+        Its id is retired rather than purged from the posting lists, so this
+        is O(1); searches skip retired ids. Rebuild the index to reclaim them.
+        """
+        word_id = self._ids.pop(word, None)
+        if word_id is None:
+            return False
+        self._words[word_id] = None
+        return True
+
+    def can_search(self, query: str) -> bool:
+        """True if query is long enough to be answered from the index"""
+        return len(query) >= self.n
+
+    def search(self, query: str, max_results: int = 10, exclude: Iterable[str] = (),
+               key: Optional[Callable[[str], object]] = None) -> List[str]:
+        """
+        Get words containing query, smallest by key first (alphabetical by default)
+
+        Args:
+            query: Substring to look for, at least n characters long
+            max_results: Maximum number of results to return
+            exclude: Words to leave out (e.g. results already found by prefix)
+            key: Sort key for ranking matches
+
+        Returns:
+            Up to max_results words containing query
+        """
+        if not self.can_search(query) or max_results <= 0:
+            return []
+
+        candidates = self._rarest_posting(query)
+        if candidates is None:
+            return []
+        exclude = set(exclude)
+        matches = (word for word in map(self._words.__getitem__, candidates)
+                   if word is not None and query in word and word not in exclude)
+        return nsmallest(max_results, matches, key=key)
+
+    def matching(self, query: str, limit: Optional[int] = None) -> Optional[Set[str]]:
+        """
+        Get every word containing query
+
+        Args:
+            query: Substring to look for, at least n characters long
+            limit: Give up and return None if the rarest n-gram of query is
+                   in more than this many words
+
+        Returns:
+            Set of matching words, or None if query is too short or too common
+        """
+        if not self.can_search(query):
+            return None
+        candidates = self._rarest_posting(query)
+        if candidates is None:
+            return set()
+        if limit is not None and len(candidates) > limit:
+            return None
+        return {word for word in map(self._words.__getitem__, candidates)
+                if word is not None and query in word}
+
+    def _rarest_posting(self, query: str) -> Optional[array]:
+        """Shortest posting list among query's n-grams, or None if one is missing"""
+        postings = []
+        for gram in self._grams(query):
+            posting = self._postings.get(gram)
+            if posting is None:
+                return None
+            postings.append(posting)
+        # Verifying the rarest gram's candidates directly beats intersecting the lists
+        return min(postings, key=len)
+
+    def clear(self) -> None:
+        self._words = []
+        self._ids = {}
+        self._postings = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
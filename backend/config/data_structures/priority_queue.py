@@ -1,47 +1,197 @@
-from typing import Any, List, Tuple, Optional
+import heapq
+import time
+from itertools import count
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Optional
 
 class PriorityQueue:
-    def __init__(self):
-        # We'll store as list of tuples (priority, item)
+    """
+    Max-heap of items by numeric priority, with handles
+
+    push() returns a handle that can later change the item's priority or
+    remove it in O(log n), without draining the queue. Items with equal
+    priority come out in insertion order (an update keeps an item's place
+    among its new equals).
+
+    With an aging_rate, an item's effective priority grows by aging_rate per
+    second (of clock()) it has waited, so a steady stream of high-priority
+    pushes can't starve older low-priority items: an item of priority p is
+    ahead of anything of priority P pushed more than (P - p) / aging_rate
+    seconds after it. Effective priorities all grow at the same rate, so
+    their order never changes on its own; the heap is keyed on
+    priority - aging_rate * push time, fixed at push, and nothing is ever
+    re-heapified as time passes.
+    """
+
+    def __init__(self, aging_rate: float = 0.0, clock: Callable[[], float] = time.monotonic):
+        # We'll store as list of tuples (key, handle, item, priority, pushed_at);
+        # key is the priority less aging, and handles increase with every
+        # push, so they double as the insertion order.
         # Use 0-indexed array for heap
-        self._heap: List[Tuple[int, Any]] = []
+        self._heap: List[Tuple[float, int, Any, int, float]] = []
+        self._index: Dict[int, int] = {}  # handle -> position in _heap
+        self._handles = count(1)
+        self._aging_rate = aging_rate
+        self._clock = clock
+
+    @property
+    def aging_rate(self) -> float:
+        """Effective priority gained per second waited; fixed for the queue's life, keys depend on it"""
+        return self._aging_rate
 
     def __len__(self):
         return len(self._heap)
 
+    def __contains__(self, handle: int) -> bool:
+        return handle in self._index
+
     def is_empty(self) -> bool:
         return len(self._heap) == 0
 
-    def push(self, item: Any, priority: int):
-        """Insert item with numeric priority. Higher numbers = higher priority."""
-        self._heap.append((priority, item))
+    def push(self, item: Any, priority: int) -> int:
+        """Insert item with numeric priority. Higher numbers = higher priority. Returns its handle."""
+        handle = next(self._handles)
+        pushed_at = self._clock() if self.aging_rate else 0.0
+        self._heap.append((self._key(priority, pushed_at), handle, item, priority, pushed_at))
+        self._index[handle] = len(self._heap) - 1
         self._sift_up(len(self._heap) - 1)
+        return handle
 
     def peek(self) -> Optional[Tuple[int, Any]]:
         if self.is_empty():
             return None
-        return self._heap[0]
+        priority, _handle, item = self._public(self._heap[0])
+        return priority, item
+
+    def peek_entry(self) -> Optional[Tuple[int, int, Any]]:
+        """Like peek(), but (priority, handle, item)"""
+        if self.is_empty():
+            return None
+        return self._public(self._heap[0])
 
     def pop(self) -> Optional[Tuple[int, Any]]:
+        entry = self.pop_entry()
+        if entry is None:
+            return None
+        priority, _handle, item = entry
+        return priority, item
+
+    def pop_entry(self) -> Optional[Tuple[int, int, Any]]:
+        """Like pop(), but (priority, handle, item)"""
         if self.is_empty():
             return None
-        root = self._heap[0]
-        last = self._heap.pop()
-        if self._heap:
-            self._heap[0] = last
-            self._sift_down(0)
-        return root
+        return self._public(self._remove_at(0))
+
+    def get(self, handle: int) -> Tuple[int, Any]:
+        """(priority, item) for a queued handle; KeyError if it isn't queued"""
+        _key, _handle, item, priority, _pushed_at = self._heap[self._index[handle]]
+        return priority, item
+
+    def effective_priority(self, handle: int) -> float:
+        """A queued item's priority plus what it has gained by waiting; KeyError if it isn't queued"""
+        _key, _handle, _item, priority, pushed_at = self._heap[self._index[handle]]
+        if not self.aging_rate:
+            return priority
+        return priority + self.aging_rate * (self._clock() - pushed_at)
+
+    def update(self, handle: int, priority: int) -> Any:
+        """
+        Change a queued item's base priority (keeping the age it has built
+        up) and return the item; KeyError if not queued
+        """
+        idx = self._index[handle]
+        old_key, _handle, item, _old_priority, pushed_at = self._heap[idx]
+        key = self._key(priority, pushed_at)
+        self._heap[idx] = (key, handle, item, priority, pushed_at)
+        if key > old_key:
+            self._sift_up(idx)
+        elif key < old_key:
+            self._sift_down(idx)
+        return item
+
+    def remove(self, handle: int) -> Tuple[int, Any]:
+        """Take a queued item out of the queue; returns its (priority, item), KeyError if not queued"""
+        priority, _handle, item = self._public(self._remove_at(self._index[handle]))
+        return priority, item
+
+    @staticmethod
+    def nlargest(k: int, items: Iterable[Any], priority: Callable[[Any], int]) -> List[Tuple[int, Any]]:
+        """
+        The k highest-priority items as (priority, item), highest first and
+        ties in iteration order, like heapq.nlargest. Only k entries are
+        held at a time (see BoundedPriorityQueue).
+        """
+        top = BoundedPriorityQueue(k)
+        for item in items:
+            top.push(item, priority(item))
+        return top.drain()
+
+    def top(self, limit: int, offset: int = 0) -> List[Tuple[int, int, Any]]:
+        """
+        (priority, handle, item) of the items ranked offset to offset + limit - 1,
+        in pop order, without popping anything
+
+        Walks the heap best-first, keeping a frontier of positions whose
+        parent has been taken: only the offset + limit best entries and
+        their children are visited, O(k log k) for k = offset + limit
+        rather than sorting all n.
+        """
+        wanted = offset + limit
+        result = []
+        frontier = [(-self._heap[0][0], self._heap[0][1], 0)] if self._heap and limit > 0 else []
+        while frontier and len(result) < wanted:
+            _key, _handle, idx = heapq.heappop(frontier)
+            result.append(self._public(self._heap[idx]))
+            for child in (2 * idx + 1, 2 * idx + 2):
+                if child < len(self._heap):
+                    key, handle = self._heap[child][:2]
+                    heapq.heappush(frontier, (-key, handle, child))
+        return result[offset:]
 
     def as_list(self) -> List[Tuple[int, Any]]:
         # Return a shallow copy of the underlying heap list
-        return list(self._heap)
+        return [(entry[3], entry[2]) for entry in self._heap]
+
+    def entries(self) -> List[Tuple[int, int, Any]]:
+        """(priority, handle, item) for every queued item, in heap order"""
+        return [self._public(entry) for entry in self._heap]
 
     # -- internal helpers --
+    def _key(self, priority: int, pushed_at: float) -> float:
+        """Heap key: the effective priority less aging_rate * now, an offset shared by every item"""
+        return priority - self.aging_rate * pushed_at if self.aging_rate else priority
+
+    @staticmethod
+    def _public(entry) -> Tuple[int, int, Any]:
+        """(priority, handle, item) of a heap entry"""
+        return entry[3], entry[1], entry[2]
+
+    def _before(self, i: int, j: int) -> bool:
+        """True if the entry at i comes out before the entry at j"""
+        a, b = self._heap[i], self._heap[j]
+        return a[0] > b[0] or (a[0] == b[0] and a[1] < b[1])
+
+    def _swap(self, i: int, j: int):
+        self._heap[i], self._heap[j] = self._heap[j], self._heap[i]
+        self._index[self._heap[i][1]] = i
+        self._index[self._heap[j][1]] = j
+
+    def _remove_at(self, idx: int) -> Tuple[float, int, Any, int, float]:
+        entry = self._heap[idx]
+        last = self._heap.pop()
+        del self._index[entry[1]]
+        if idx < len(self._heap):
+            self._heap[idx] = last
+            self._index[last[1]] = idx
+            # The moved entry may belong above or below its new spot
+            self._sift_up(idx)
+            self._sift_down(self._index[last[1]])
+        return entry
+
     def _sift_up(self, idx: int):
         while idx > 0:
             parent = (idx - 1) // 2
-            if self._heap[idx][0] > self._heap[parent][0]:
-                self._heap[idx], self._heap[parent] = self._heap[parent], self._heap[idx]
+            if self._before(idx, parent):
+                self._swap(idx, parent)
                 idx = parent
             else:
                 break
@@ -52,11 +202,57 @@ class PriorityQueue:
             left = 2 * idx + 1
             right = left + 1
             largest = idx
-            if left < n and self._heap[left][0] > self._heap[largest][0]:
+            if left < n and self._before(left, largest):
                 largest = left
-            if right < n and self._heap[right][0] > self._heap[largest][0]:
+            if right < n and self._before(right, largest):
                 largest = right
             if largest == idx:
                 break
-            self._heap[idx], self._heap[largest] = self._heap[largest], self._heap[idx]
-            idx = largest
\ No newline at end of file
+            self._swap(idx, largest)
+            idx = largest
+
+
+class BoundedPriorityQueue:
+    """
+    Keeps only the k highest-priority items pushed into it
+
+    A min-heap of at most k entries whose root is the entry that would be
+    dropped next, so each push is O(log k) and anything below the current
+    k-th best is rejected after a single comparison. Selecting the top k of
+    n items costs O(n log k) time and O(k) memory instead of a full sort.
+    Equal priorities keep insertion order: on a tie the earlier item stays.
+    """
+
+    def __init__(self, k: int):
+        self.k = max(0, k)
+        # (priority, -sequence, item): the root is the lowest priority and,
+        # among equals, the latest pushed
+        self._heap: List[Tuple[int, int, Any]] = []
+        self._sequence = count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def is_full(self) -> bool:
+        return len(self._heap) >= self.k
+
+    def min_priority(self) -> Optional[int]:
+        """Lowest priority still kept, or None if empty"""
+        return self._heap[0][0] if self._heap else None
+
+    def push(self, item: Any, priority: int) -> bool:
+        """Offer an item; returns True if it is (for now) among the top k"""
+        entry = (priority, -next(self._sequence), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return True
+        if self.k == 0 or entry[:2] <= self._heap[0][:2]:
+            return False
+        heapq.heapreplace(self._heap, entry)
+        return True
+
+    def drain(self) -> List[Tuple[int, Any]]:
+        """Remove and return the kept (priority, item) pairs, highest priority first"""
+        entries = sorted(self._heap, key=lambda entry: entry[:2], reverse=True)
+        self._heap = []
+        return [(priority, item) for priority, _sequence, item in entries]
@@ -0,0 +1,246 @@
+"""
+Word-boundary token index for matching words in the middle of a name
+"""
+import re
+from bisect import bisect_left, insort
+from heapq import merge, nsmallest
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+class TokenIndex:
+    """
+    Maps every token (word) of each name back to the full names containing it
+
+    The vocabulary is kept as a sorted list, so every token starting with a
+    query token is one bisect plus a contiguous scan. A multi-word query
+    matches names that have a token starting with each query token, in any
+    order ("cable row" finds "single-arm cable row" and "cable seated row").
+
+    search() keeps each token's best-ranked names, computed on first use, and
+    merges those lists for the tokens a query word expands to, stopping once
+    it has enough results, so a short query doesn't rank every name under a
+    common token. An edit drops the lists of the name's tokens; call rerank()
+    when the ranking itself changes. Each list is stamped when computed and
+    only trusted if none of its token's edits came later, so a reader racing
+    a writer at worst recomputes.
+
+    Time Complexity:
+    - Add/Remove: O(t * v) worst case for a name with t new tokens and a vocabulary of v
+    - Search: O(log v + e + r log e) with cached lists, for e tokens starting
+      with the query's rarest word and r results; O(log v + c) the first
+      time, where c is the number of candidate names for that word
+    """
+
+    def __init__(self):
+        self._tokens: List[str] = []  # sorted vocabulary
+        self._postings: Dict[str, Set[str]] = {}  # token -> names containing it
+        self._name_tokens: Dict[str, Tuple[str, ...]] = {}  # name -> its tokens
+        # token -> (stamp, key, (rank, 0, name) of its best-ranked names in
+        # order, whether that is all of them)
+        self._ranked: Dict[str, Tuple[int, object, Tuple[tuple, ...], bool]] = {}
+        self._stamp = 0  # Bumped by every change
+        self._changed: Dict[str, int] = {}  # token -> stamp of its last change
+        self._reranked = 0  # Stamp of the last rerank() of every token
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        return _TOKEN_RE.findall(text.lower())
+
+    @staticmethod
+    def token_offsets(text: str) -> List[int]:
+        """Where each token of text (expected to be lowercase already) starts"""
+        return [match.start() for match in _TOKEN_RE.finditer(text)]
+
+    def add(self, name: str) -> None:
+        """Index a name (expected to be normalised already)"""
+        if name in self._name_tokens:
+            return
+        tokens = self._name_tokens[name] = tuple(self.tokenize(name))
+        for token in set(tokens):
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = set()
+                insort(self._tokens, token)
+            posting.add(name)
+            self._changed_token(token)
+
+    def remove(self, name: str) -> None:
+        tokens = self._name_tokens.pop(name, ())
+        for token in set(tokens):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.discard(name)
+            if not posting:
+                del self._postings[token]
+                del self._tokens[bisect_left(self._tokens, token)]
+            self._changed_token(token)
+
+    def _changed_token(self, token: str) -> None:
+        """Invalidate token's ranked list (after changing its posting)"""
+        self._stamp += 1
+        self._changed[token] = self._stamp
+        self._ranked.pop(token, None)
+
+    def rerank(self, name: Optional[str] = None) -> None:
+        """
+        Re-place name in the ranked lists of its tokens after its rank
+        changed (e.g. a weight bump), or drop every list if name is None
+        """
+        if name is None:
+            self._stamp += 1
+            self._reranked = self._stamp
+            self._ranked = {}
+            return
+        for token in set(self._name_tokens.get(name, ())):
+            entry = self._ranked.get(token)
+            fresh = entry is not None and entry[0] >= max(self._changed.get(token, 0), self._reranked)
+            self._changed_token(token)
+            if not fresh:
+                continue
+            _stamp, key, ranked, complete = entry
+            kept = [item for item in ranked if item[2] != name]
+            item = ((key or _by_name)(name), 0, name)
+            # Every name left out ranks after the list's last one, so name
+            # goes back in only if it still ranks before that (or none are left out)
+            if complete or (kept and item < kept[-1]):
+                insort(kept, item)
+            self._ranked[token] = (self._stamp, key, tuple(kept), complete)
+
+    def _ranked_names(self, token: str, count: int, key) -> Tuple[Tuple[tuple, ...], bool]:
+        """
+        ((rank, 0, name) for the count best-ranked names under token, or more,
+        best first, and whether that is every name under it)
+        """
+        entry = self._ranked.get(token)
+        if (entry is not None and entry[0] >= max(self._changed.get(token, 0), self._reranked)
+                and entry[1] == key and (entry[3] or len(entry[2]) >= count)):
+            return entry[2], entry[3]
+        stamp = self._stamp  # Read before the posting, so a change landing mid-way invalidates this
+        posting = tuple(self._postings.get(token, ()))
+        rank = key or _by_name
+        ranked = tuple(nsmallest(count, ((rank(name), 0, name) for name in posting)))
+        complete = len(ranked) == len(posting)
+        self._ranked[token] = (stamp, key, ranked, complete)
+        return ranked, complete
+
+    def _tokens_with_prefix(self, prefix: str) -> List[str]:
+        start = i = bisect_left(self._tokens, prefix)
+        while i < len(self._tokens) and self._tokens[i].startswith(prefix):
+            i += 1
+        return self._tokens[start:i]
+
+    def name_matches(self, name: str, query_tokens: List[str]) -> bool:
+        """True if name has a token starting with each of query_tokens"""
+        name_tokens = self._name_tokens.get(name)
+        if name_tokens is None:
+            name_tokens = self.tokenize(name)
+        return all(any(token.startswith(query_token) for token in name_tokens)
+                   for query_token in query_tokens)
+
+    def matching(self, query: str, limit: Optional[int] = None) -> Optional[Set[str]]:
+        """
+        Get every name with a token starting with each token of query
+
+        Args:
+            query: One or more (partial) words
+            limit: Give up and return None if the most selective query token
+                   has more than this many postings
+
+        Returns:
+            Set of matching names (empty for a query without tokens), or None
+        """
+        query_tokens = self.tokenize(query)
+        if not query_tokens:
+            return set()
+
+        # Collect candidates only for the query token with the fewest postings;
+        # check the rest against each candidate's own tokens instead of
+        # building more unions
+        expansions = [(sum(len(self._postings[t]) for t in self._tokens_with_prefix(q)), q)
+                      for q in query_tokens]
+        size, anchor = min(expansions)
+        if limit is not None and size > limit:
+            return None
+        others = list(query_tokens)
+        others.remove(anchor)
+
+        candidates = set()
+        for token in self._tokens_with_prefix(anchor):
+            candidates |= self._postings[token]
+
+        if others:
+            candidates = {name for name in candidates if self.name_matches(name, others)}
+        return candidates
+
+    def search(self, query: str, max_results: int = 10, exclude: Iterable[str] = (),
+               key: Optional[Callable[[str], object]] = None) -> List[str]:
+        """
+        Get names with a token starting with each token of query
+
+        Args:
+            query: One or more (partial) words
+            max_results: Maximum number of results to return
+            exclude: Names to leave out (e.g. results already found by prefix)
+            key: Sort key for ranking matches (alphabetical by default)
+
+        Returns:
+            Up to max_results matching names
+        """
+        if max_results <= 0:
+            return []
+        query_tokens = self.tokenize(query)
+        if not query_tokens:
+            return []
+        exclude = set(exclude)
+        _size, anchor = min((sum(len(self._postings[t]) for t in self._tokens_with_prefix(q)), q)
+                            for q in query_tokens)
+        others = list(query_tokens)
+        others.remove(anchor)
+
+        # Merge the anchor's tokens' ranked lists, best first. A list that
+        # isn't the token's every name ends in a marker ranked just after its
+        # last name: past that, a name it left out could be next, so when too
+        # many names were excluded or didn't match the other query words,
+        # start again with longer lists.
+        count = max_results + len(exclude)
+        while True:
+            lists = []
+            for token in self._tokens_with_prefix(anchor):
+                ranked, complete = self._ranked_names(token, count, key)
+                lists.append(ranked if complete else chain(ranked, ((ranked[-1][0], 1, None),)))
+
+            results = []
+            seen = set(exclude)
+            for _rank, _marker, name in merge(*lists):
+                if name is None:
+                    break
+                if name in seen:
+                    continue
+                seen.add(name)
+                if others and not self.name_matches(name, others):
+                    continue
+                results.append(name)
+                if len(results) == max_results:
+                    return results
+            else:
+                return results
+            count *= 4
+
+    def clear(self) -> None:
+        self._tokens = []
+        self._postings = {}
+        self._name_tokens = {}
+        self._changed = {}
+        self.rerank()
+
+    def __len__(self) -> int:
+        """Number of distinct tokens"""
+        return len(self._tokens)
+
+
+def _by_name(name: str) -> str:
+    return name
@@ -1,194 +1,872 @@
 """
 Trie (Prefix Tree) data structure implementation for autocomplete
 """
-from typing import List, Optional
+from bisect import bisect_left
+from heapq import merge, nsmallest
+from itertools import count, islice
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+from .ngram_index import NGramIndex
+from .token_index import TokenIndex
 
 
 class TrieNode:
-    """Node in the Trie data structure"""
-    
+    """Node in the character-per-node CharTrie"""
+
     def __init__(self):
         self.children = {}  # Dictionary mapping character to TrieNode
         self.is_end_of_word = False  # True if this node represents the end of a word
         self.word = None  # Store the complete word at the end node (for easier retrieval)
 
 
-class Trie:
+class CharTrie:
     """
-    Trie (Prefix Tree) implementation for efficient prefix matching and autocomplete
-    
-    Time Complexity:
-    - Insert: O(m) where m is the length of the word
-    - Search: O(m) where m is the length of the word
-    - Autocomplete: O(m + k) where m is prefix length and k is number of results
+    Original one-node-per-character Trie
+
+    Kept as the reference implementation that benchmark_trie.py compares the
+    radix Trie against. New code should use Trie.
     """
-    
+
     def __init__(self):
         self.root = TrieNode()
         self.size = 0  # Number of words in the trie
-    
+
     def insert(self, word: str) -> None:
-        """
-        Insert a word into the trie
-        
-        Args:
-            word: The word to insert (case-insensitive, will be converted to lowercase)
-        """
+        """Insert a word into the trie (case-insensitive)"""
         if not word or not word.strip():
             return
-        
+
         word = word.lower().strip()
         node = self.root
-        
-        # Traverse the trie, creating nodes as needed
+
         for char in word:
             if char not in node.children:
                 node.children[char] = TrieNode()
             node = node.children[char]
-        
-        # Mark the end of the word
+
         if not node.is_end_of_word:
             node.is_end_of_word = True
             node.word = word
             self.size += 1
-    
+
     def search(self, word: str) -> bool:
-        """
-        Search for a word in the trie
-        
-        Args:
-            word: The word to search for (case-insensitive)
-            
-        Returns:
-            True if the word exists in the trie, False otherwise
-        """
+        """Return True if the word exists in the trie"""
         if not word:
             return False
-        
-        word = word.lower().strip()
+
         node = self.root
-        
-        for char in word:
+        for char in word.lower().strip():
             if char not in node.children:
                 return False
             node = node.children[char]
-        
+
         return node.is_end_of_word
-    
+
     def starts_with(self, prefix: str) -> bool:
-        """
-        Check if any word in the trie starts with the given prefix
-        
-        Args:
-            prefix: The prefix to check (case-insensitive)
-            
-        Returns:
-            True if any word starts with the prefix, False otherwise
-        """
+        """Return True if any word in the trie starts with the given prefix"""
         if not prefix:
             return False
-        
-        prefix = prefix.lower().strip()
+
         node = self.root
-        
-        for char in prefix:
+        for char in prefix.lower().strip():
             if char not in node.children:
                 return False
             node = node.children[char]
-        
+
         return True
-    
+
     def autocomplete(self, prefix: str, max_results: int = 10, contains: bool = False) -> List[str]:
-        """
-        Get all words that start with the given prefix (autocomplete)
-        If contains=True, also search for words containing the prefix anywhere
-        
-        Args:
-            prefix: The prefix to search for (case-insensitive)
-            max_results: Maximum number of results to return (default: 10)
-            contains: If True, also match words containing the prefix (default: False)
-            
-        Returns:
-            List of words that start with (or contain) the prefix, limited to max_results
-        """
+        """Get words that start with (or, if contains=True, contain) the prefix"""
         if not prefix:
             return []
-        
+
         prefix = prefix.lower().strip()
         results = []
-        
-        # First, try exact prefix match
+
         node = self.root
         found_prefix = True
-        
-        # Navigate to the node representing the prefix
         for char in prefix:
             if char not in node.children:
                 found_prefix = False
                 break
             node = node.children[char]
-        
+
         if found_prefix:
-            # We found the prefix, collect words starting with it
             self._collect_words(node, prefix, results, max_results)
-        
-        # If contains=True and we need more results, search all words
+
         if contains and len(results) < max_results:
-            all_words = self.get_all_words()
-            prefix_lower = prefix.lower()
-            for word in all_words:
-                word_lower = word.lower()
-                if prefix_lower in word_lower and word_lower not in [r.lower() for r in results]:
+            seen = set(results)
+            for word in self.get_all_words():
+                if prefix in word and word not in seen:
                     results.append(word)
                     if len(results) >= max_results:
                         break
-        
+
         return results
-    
+
     def _collect_words(self, node: TrieNode, current_prefix: str, results: List[str], max_results: int) -> None:
-        """
-        Helper method to recursively collect all words from a node
-        
-        Args:
-            node: Current node in the trie
-            current_prefix: Current prefix built so far
-            results: List to store results
-            max_results: Maximum number of results to collect
-        """
+        """Recursively collect words below node in alphabetical order"""
         if len(results) >= max_results:
             return
-        
-        # If this node marks the end of a word, add it to results
+
         if node.is_end_of_word and node.word:
             results.append(node.word)
-        
-        # Recursively search all children
+
         for char, child_node in sorted(node.children.items()):
             if len(results) >= max_results:
                 break
             self._collect_words(child_node, current_prefix + char, results, max_results)
-    
+
     def get_all_words(self) -> List[str]:
-        """
-        Get all words stored in the trie
-        
-        Returns:
-            List of all words in the trie
-        """
+        """Get all words stored in the trie"""
         results = []
         self._collect_words(self.root, "", results, float('inf'))
         return results
-    
+
     def clear(self) -> None:
         """Clear all words from the trie"""
         self.root = TrieNode()
         self.size = 0
-    
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, word: str) -> bool:
+        return self.search(word)
+
+
+_NO_EDGES = ('', ())
+
+# Shared across instances, so a generation number identifies one state of one trie
+_GENERATIONS = count(1)
+
+
+def next_generation() -> int:
+    """Return a generation number no trie in this process has used"""
+    return next(_GENERATIONS)
+
+
+# Largest candidate set an AutocompleteCursor keeps for narrowing
+CURSOR_CANDIDATE_LIMIT = 256
+
+
+class RadixNode:
+    """
+    Node in the path-compressed Trie
+
+    A node owns the label of the edge leading into it, so a run of
+    single-child characters collapses into one node. Outgoing edges are held
+    in one (keys, children) pair: keys is a string of each child's first
+    character in sorted order and children is a tuple in the same order, so
+    a lookup is a str.find instead of a per-node dict. `word` is set only on
+    terminal nodes. `top` holds the node's best completions when the trie
+    was created with top_k > 0.
+    """
+
+    __slots__ = ('label', 'edges', 'word', 'top')
+
+    def __init__(self, label: str = '', edges=_NO_EDGES, word: Optional[str] = None, top=()):
+        self.label = label
+        self.edges = edges
+        self.word = word
+        self.top = top
+
+    def relabeled(self, label: str) -> 'RadixNode':
+        """Return a copy of this node under a different edge label"""
+        return RadixNode(label, self.edges, self.word, self.top)
+
+
+class AutocompleteCursor:
+    """
+    Where an autocomplete left off, so a lookup for a longer prefix can resume
+
+    Holds the prefix node reached (with the prefix index its label starts
+    at) and, once the matches fit in CURSOR_CANDIDATE_LIMIT, every word that
+    matched. Any extension of the prefix matches a subset of those words, so
+    the next lookup filters them instead of searching again. Only valid for
+    the trie generation it was made at.
+    """
+
+    __slots__ = ('generation', 'prefix', 'contains', 'node', 'start', 'candidates')
+
+    def __init__(self, generation: int, prefix: str, contains: bool, node: Optional[RadixNode],
+                 start: int, candidates: Optional[frozenset]):
+        self.generation = generation
+        self.prefix = prefix
+        self.contains = contains
+        self.node = node  # Prefix node, None if no word starts with prefix
+        self.start = start
+        self.candidates = candidates  # Every matching word, None if there were too many
+
+
+def _next_edit_row(query: str, row: tuple, prev_row: Optional[tuple], prev_char: str, char: str) -> tuple:
+    """
+    Extend an edit-distance DP row by one trie character
+
+    row[j] is the optimal string alignment distance (Levenshtein plus
+    adjacent transpositions) between query[:j] and the path spelled so far.
+    """
+    new_row = [row[0] + 1]
+    for j in range(1, len(query) + 1):
+        cost = 0 if query[j - 1] == char else 1
+        distance = min(row[j] + 1, new_row[j - 1] + 1, row[j - 1] + cost)
+        if prev_row is not None and j > 1 and char == query[j - 2] and prev_char == query[j - 1]:
+            distance = min(distance, prev_row[j - 2] + 1)
+        new_row.append(distance)
+    return tuple(new_row)
+
+
+def _common_prefix_length(label: str, word: str, start: int) -> int:
+    """Length of the common prefix of label and word[start:]"""
+    limit = min(len(label), len(word) - start)
+    i = 0
+    while i < limit and label[i] == word[start + i]:
+        i += 1
+    return i
+
+
+class Trie:
+    """
+    Path-compressed (radix) Trie for prefix matching and autocomplete
+
+    Edges carry whole substrings, so a catalogue of exercise names needs
+    roughly one node per distinct branching point instead of one node per
+    character. Nodes use __slots__ and keep their edges in a flat string and
+    tuple, and edits replace those with new objects rather than mutating
+    them in place. Each edit is published with a single attribute
+    assignment, so a reader walking the trie without a lock while a writer
+    inserts or re-weights sees either the old or the new edges, never a
+    half-applied split.
+
+    With top_k > 0 every node also caches its best top_k completions, so an
+    autocomplete for up to top_k results is answered from the prefix node
+    without walking its subtree. The caches are filled by bulk_load() and
+    kept current by insert() and delete().
+
+    With index_substrings=True the trie also maintains an NGramIndex, which
+    answers autocomplete(contains=True) for prefixes of three or more
+    characters without scanning every word. With index_tokens=True it
+    maintains a TokenIndex, so autocomplete also returns words with a word
+    starting with the prefix anywhere in them ("press" finds "machine
+    shoulder press"), after the true prefix hits, plus a WordSuffixIndex so
+    fuzzy_autocomplete() also matches from later words.
+
+    Words can carry a weight (e.g. how often the exercise is logged).
+    Completions are ranked by weight, highest first, then alphabetically;
+    without weights this is plain alphabetical order. Weights live in a
+    sparse dict keyed by terminal word, and changing one refreshes only the
+    top-k caches on that word's path.
+
+    Every edit moves generation to a new number that no other trie in the
+    process has used, so a result cached alongside the generation it was
+    computed at can be checked for staleness with one comparison.
+
+    Time Complexity:
+    - Insert: O(m) where m is the length of the word (O(m * k) with top_k)
+    - Delete: O(m) (O(m * k) with top_k)
+    - Search: O(m) where m is the length of the word
+    - Autocomplete: O(m + k) where m is prefix length and k is number of results
+    """
+
+    def __init__(self, top_k: int = 0, index_substrings: bool = False, index_tokens: bool = False):
+        self.root = RadixNode()
+        self.size = 0  # Number of words in the trie
+        self.top_k = top_k  # Completions cached per node, 0 disables the cache
+        self.substrings = NGramIndex() if index_substrings else None
+        self.tokens = TokenIndex() if index_tokens else None
+        self.word_suffixes = WordSuffixIndex() if index_tokens else None
+        # Side indexes kept in step with every insert/delete
+        self._indexes = [index for index in (self.substrings, self.tokens, self.word_suffixes) if index is not None]
+        self.weights: Dict[str, float] = {}  # word -> weight, absent means 0
+        self.generation = next(_GENERATIONS)  # Changes on every edit
+
+    @staticmethod
+    def _normalize(word: str) -> str:
+        return word.lower().strip() if word else ''
+
+    def insert(self, word: str) -> None:
+        """
+        Insert a word into the trie
+
+        Args:
+            word: The word to insert (case-insensitive, will be converted to lowercase)
+        """
+        word = self._normalize(word)
+        if not word:
+            return
+
+        path = self._insert(word)
+        if self.top_k:
+            for node in reversed(path):
+                self._refresh_top(node)
+        for index in self._indexes:
+            index.add(word)
+        self.generation = next(_GENERATIONS)
+
+    def bulk_load(self, words: Iterable[str], weights: Optional[Mapping[str, float]] = None) -> None:
+        """
+        Insert many words, then fill the top-k caches in a single pass
+
+        Cheaper than calling insert() per word when top_k is set, since each
+        node's cache is computed once instead of once per word below it.
+
+        Args:
+            words: Words to insert
+            weights: Optional word -> weight mapping replacing all current weights
+        """
+        if weights is not None:
+            self.weights = self._normalize_weights(weights)
+            if self.tokens is not None:
+                self.tokens.rerank()
+        for word in words:
+            word = self._normalize(word)
+            if word:
+                self._insert(word)
+                for index in self._indexes:
+                    index.add(word)
+        if self.top_k:
+            self._rebuild_top()
+        self.generation = next(_GENERATIONS)
+
+    def _insert(self, word: str) -> List[RadixNode]:
+        """Insert a normalised word and return the nodes along its path"""
+        node = self.root
+        path = [node]
+        i = 0
+        while i < len(word):
+            keys, children = node.edges
+            pos = keys.find(word[i])
+
+            if pos < 0:
+                # No edge starts with this character: hang the rest of the word off a new leaf
+                leaf = RadixNode(word[i:], word=word)
+                at = bisect_left(keys, word[i])
+                if self.top_k:
+                    leaf.top = (word,)
+                node.edges = (keys[:at] + word[i] + keys[at:], children[:at] + (leaf,) + children[at:])
+                self.size += 1
+                return path
+
+            child = children[pos]
+            common = _common_prefix_length(child.label, word, i)
+            if common < len(child.label):
+                # The word diverges inside this edge: split it at the divergence point
+                tail = child.relabeled(child.label[common:])
+                child = RadixNode(child.label[:common], (tail.label[0], (tail,)), top=tail.top)
+                node.edges = (keys, children[:pos] + (child,) + children[pos + 1:])
+
+            node = child
+            path.append(node)
+            i += common
+
+        if node.word is None:
+            node.word = word
+            self.size += 1
+        return path
+
+    def delete(self, word: str) -> bool:
+        """
+        Remove a word from the trie, pruning branches left without words
+
+        A node left with no word and a single child is merged into that
+        child so the trie stays path-compressed. The word's weight is kept.
+
+        Args:
+            word: The word to remove (case-insensitive)
+
+        Returns:
+            True if the word was in the trie
+        """
+        word = self._normalize(word)
+        path = self._find_path(word) if word else None
+        if path is None or path[-1].word is None:
+            return False
+
+        node = path[-1]
+        node.word = None
+        self.size -= 1
+        for index in self._indexes:
+            index.remove(word)
+
+        # Nodes that stay attached and whose top-k cache must be refreshed
+        survivors = path
+        if node is not self.root:
+            parent = path[-2]
+            children = node.edges[1]
+            if not children:
+                self._replace_child(parent, node, None)
+                survivors = path[:-1]
+                if parent is not self.root and parent.word is None and len(parent.edges[1]) == 1:
+                    only = parent.edges[1][0]
+                    self._replace_child(path[-3], parent, only.relabeled(parent.label + only.label))
+                    survivors = path[:-2]
+            elif len(children) == 1:
+                self._replace_child(parent, node, children[0].relabeled(node.label + children[0].label))
+                survivors = path[:-1]
+
+        if self.top_k:
+            for survivor in reversed(survivors):
+                self._refresh_top(survivor)
+        self.generation = next(_GENERATIONS)
+        return True
+
+    @staticmethod
+    def _replace_child(parent: RadixNode, old: RadixNode, new: Optional[RadixNode]) -> None:
+        """Swap (or, with new=None, drop) one of parent's children in a single assignment"""
+        keys, children = parent.edges
+        i = next(i for i, child in enumerate(children) if child is old)
+        if new is None:
+            parent.edges = (keys[:i] + keys[i + 1:], children[:i] + children[i + 1:])
+        else:
+            parent.edges = (keys, children[:i] + (new,) + children[i + 1:])
+
+    def _normalize_weights(self, weights: Mapping[str, float]) -> Dict[str, float]:
+        normalized = {}
+        for word, weight in weights.items():
+            word = self._normalize(word)
+            if word and weight:
+                normalized[word] = normalized.get(word, 0) + weight
+        return normalized
+
+    def set_weights(self, weights: Mapping[str, float]) -> None:
+        """Replace every word's weight and re-rank all cached completions once"""
+        self.weights = self._normalize_weights(weights)
+        if self.tokens is not None:
+            self.tokens.rerank()
+        if self.top_k:
+            self._rebuild_top()
+        self.generation = next(_GENERATIONS)
+
+    def add_weight(self, word: str, delta: float = 1) -> bool:
+        """
+        Add delta to a word's weight
+
+        Args:
+            word: The word to re-weight (case-insensitive)
+            delta: Amount to add (default: 1)
+
+        Returns:
+            True if the word is in the trie. The weight is recorded either
+            way, so it applies if the word is inserted later.
+        """
+        word = self._normalize(word)
+        if not word:
+            return False
+
+        weight = self.weights.get(word, 0) + delta
+        if weight:
+            self.weights[word] = weight
+        else:
+            self.weights.pop(word, None)
+        if self.tokens is not None:
+            self.tokens.rerank(word)
+        self.generation = next(_GENERATIONS)
+
+        path = self._find_path(word)
+        if path is None or path[-1].word is None:
+            return False
+        if self.top_k:
+            for node in reversed(path):
+                self._refresh_top(node)
+        return True
+
+    def get_weight(self, word: str) -> float:
+        return self.weights.get(self._normalize(word), 0)
+
+    def _rank_key(self, word: str):
+        """Sort key for completions, smallest first: heaviest, then alphabetical"""
+        return (-self.weights.get(word, 0), word)
+
+    def _refresh_top(self, node: RadixNode) -> None:
+        """Recompute node.top from its own word and its children's caches"""
+        sources = [child.top for child in node.edges[1]]
+        if node.word is not None:
+            sources.append((node.word,))
+        node.top = tuple(islice(merge(*sources, key=self._rank_key), self.top_k))
+
+    def _rebuild_top(self) -> None:
+        """Recompute every node's top-k cache bottom-up"""
+        order = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(node.edges[1])
+        for node in reversed(order):
+            self._refresh_top(node)
+
+    def _find_path(self, word: str) -> Optional[List[RadixNode]]:
+        """Return the nodes from the root to the node ending exactly at word, or None"""
+        node = self.root
+        path = [node]
+        i = 0
+        while i < len(word):
+            keys, children = node.edges
+            pos = keys.find(word[i])
+            if pos < 0:
+                return None
+            node = children[pos]
+            if not word.startswith(node.label, i):
+                return None
+            path.append(node)
+            i += len(node.label)
+        return path
+
+    def _find_node(self, word: str) -> Optional[RadixNode]:
+        """Return the node that ends exactly at word, or None"""
+        node = self.root
+        i = 0
+        while i < len(word):
+            keys, children = node.edges
+            pos = keys.find(word[i])
+            if pos < 0:
+                return None
+            node = children[pos]
+            if not word.startswith(node.label, i):
+                return None
+            i += len(node.label)
+        return node
+
+    def _find_prefix_node(self, prefix: str) -> Optional[RadixNode]:
+        """
+        Return the highest node whose subtree holds every word starting with
+        prefix, or None. The prefix may end part-way along that node's edge.
+        """
+        return self._descend_prefix(prefix, self.root, 0)[0]
+
+    @staticmethod
+    def _descend_prefix(prefix: str, node: RadixNode, start: int) -> Tuple[Optional[RadixNode], int]:
+        """
+        Walk down from node, whose label begins at prefix[start], to the
+        prefix node for prefix
+
+        Returns:
+            (prefix node, index in prefix where its label begins), or (None, 0)
+        """
+        label = node.label
+        i = start
+        while True:
+            if not prefix.startswith(label, i):
+                # Either the prefix ends inside this edge or it diverges from it
+                return (node, i) if label.startswith(prefix[i:]) else (None, 0)
+            if i + len(label) >= len(prefix):
+                return node, i
+            i += len(label)
+            keys, children = node.edges
+            pos = keys.find(prefix[i])
+            if pos < 0:
+                return None, 0
+            node = children[pos]
+            label = node.label
+
+    @staticmethod
+    def _iter_words(node: RadixNode) -> Iterator[str]:
+        """Yield every word below node in alphabetical order"""
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.word is not None:
+                yield node.word
+            stack.extend(reversed(node.edges[1]))
+
+    def search(self, word: str) -> bool:
+        """
+        Search for a word in the trie
+
+        Args:
+            word: The word to search for (case-insensitive)
+
+        Returns:
+            True if the word exists in the trie, False otherwise
+        """
+        word = self._normalize(word)
+        if not word:
+            return False
+        node = self._find_node(word)
+        return node is not None and node.word is not None
+
+    def starts_with(self, prefix: str) -> bool:
+        """
+        Check if any word in the trie starts with the given prefix
+
+        Args:
+            prefix: The prefix to check (case-insensitive)
+
+        Returns:
+            True if any word starts with the prefix, False otherwise
+        """
+        prefix = self._normalize(prefix)
+        if not prefix:
+            return False
+        return self._find_prefix_node(prefix) is not None
+
+    def autocomplete(self, prefix: str, max_results: int = 10, contains: bool = False) -> List[str]:
+        """
+        Get all words that start with the given prefix (autocomplete)
+        With a token index, then words with a word starting with each word
+        of the prefix. If contains=True, also search for words containing
+        the prefix anywhere
+
+        Args:
+            prefix: The prefix to search for (case-insensitive)
+            max_results: Maximum number of results to return (default: 10)
+            contains: If True, also match words containing the prefix (default: False)
+
+        Returns:
+            List of words that start with (or contain) the prefix, limited to
+            max_results, heaviest first
+        """
+        prefix = self._normalize(prefix)
+        if not prefix or max_results <= 0:
+            return []
+
+        return self._complete(prefix, self._find_prefix_node(prefix), max_results, contains)
+
+    def _complete(self, prefix: str, node: Optional[RadixNode], max_results: int, contains: bool) -> List[str]:
+        """autocomplete() for a normalised prefix whose prefix node is already known"""
+        results = []
+        if node is not None and max_results <= self.top_k:
+            results = list(node.top[:max_results])
+        elif node is not None and not self.weights:
+            # Unweighted ranking is alphabetical, which is the walk order
+            results = list(islice(self._iter_words(node), max_results))
+        elif node is not None:
+            results = nsmallest(max_results, self._iter_words(node), key=self._rank_key)
+        if len(results) >= max_results:
+            return results
+
+        if self.tokens is not None:
+            results.extend(self.tokens.search(prefix, max_results - len(results),
+                                              exclude=results, key=self._rank_key))
+
+        if contains and len(results) < max_results:
+            if self.substrings is not None and self.substrings.can_search(prefix):
+                results.extend(self.substrings.search(prefix, max_results - len(results),
+                                                      exclude=results, key=self._rank_key))
+                return results
+
+            seen = set(results)
+            matches = (word for word in self._iter_words(self.root) if prefix in word and word not in seen)
+            results.extend(nsmallest(max_results - len(results), matches, key=self._rank_key))
+
+        return results
+
+    def autocomplete_from(self, cursor: Optional[AutocompleteCursor], prefix: str, max_results: int = 10,
+                          contains: bool = False) -> Tuple[List[str], Optional[AutocompleteCursor]]:
+        """
+        autocomplete() that resumes from the cursor of a previous lookup
+
+        When prefix extends the cursor's prefix (the user typed another
+        character), the walk continues from the cursor's node rather than
+        the root, and if the cursor holds the complete set of earlier
+        matches the results are picked from that set without touching the
+        trie or its indexes. Otherwise (no cursor, a different prefix, or a
+        trie edited since) this is a plain autocomplete().
+
+        Args:
+            cursor: Cursor returned by the previous call, or None
+            prefix: The prefix to search for (case-insensitive)
+            max_results: Maximum number of results to return (default: 10)
+            contains: If True, also match words containing the prefix (default: False)
+
+        Returns:
+            (results, cursor for the next call); the cursor is None for an empty prefix
+        """
+        prefix = self._normalize(prefix)
+        if not prefix:
+            return [], None
+
+        resumable = (cursor is not None and cursor.generation == self.generation
+                     and prefix.startswith(cursor.prefix) and (cursor.contains or not contains))
+        if not resumable:
+            node, start = self._descend_prefix(prefix, self.root, 0)
+        elif cursor.node is None:
+            node, start = None, 0
+        else:
+            node, start = self._descend_prefix(prefix, cursor.node, cursor.start)
+
+        if resumable and cursor.candidates is not None:
+            query_tokens = self.tokens.tokenize(prefix) if self.tokens is not None else None
+            tiered = []
+            for word in cursor.candidates:
+                if word.startswith(prefix):
+                    tiered.append((0, word))
+                elif query_tokens and self.tokens.name_matches(word, query_tokens):
+                    tiered.append((1, word))
+                elif contains and prefix in word:
+                    tiered.append((2, word))
+            candidates = frozenset(word for _tier, word in tiered)
+            ranked = nsmallest(max_results, tiered, key=lambda item: (item[0], self._rank_key(item[1])))
+            results = [word for _tier, word in ranked]
+        else:
+            results = self._complete(prefix, node, max_results, contains) if max_results > 0 else []
+            candidates = self._collect_candidates(prefix, node, contains)
+
+        return results, AutocompleteCursor(self.generation, prefix, contains, node, start, candidates)
+
+    def _collect_candidates(self, prefix: str, node: Optional[RadixNode], contains: bool) -> Optional[frozenset]:
+        """Every word autocomplete() could return for prefix, or None if there are too many"""
+        limit = CURSOR_CANDIDATE_LIMIT
+        candidates = set()
+        if node is not None:
+            candidates.update(islice(self._iter_words(node), limit + 1))
+        if self.tokens is not None and len(candidates) <= limit:
+            if not self.tokens.tokenize(prefix):
+                # No words yet (e.g. "-"), but a longer prefix may have some,
+                # and their token matches aren't among these candidates
+                return None
+            matching = self.tokens.matching(prefix, limit)
+            if matching is None:
+                return None
+            candidates |= matching
+        if contains and len(candidates) <= limit:
+            matching = self.substrings.matching(prefix, limit) if self.substrings is not None else None
+            if matching is None:
+                return None
+            candidates |= matching
+        return frozenset(candidates) if len(candidates) <= limit else None
+
+    def fuzzy_autocomplete(self, query: str, max_results: int = 10,
+                           max_distance: int = 2) -> List[Tuple[str, int]]:
+        """
+        Get words whose beginning, or with index_tokens the text from one of
+        their later words, is within max_distance edits of query
+
+        Walks the trie carrying one edit-distance row per character and drops
+        a branch as soon as every entry in its row exceeds max_distance, so
+        only the neighbourhood of the query is visited. A word's distance is
+        the smallest distance between query and any prefix of the word, so
+        exact prefix hits have distance 0. With index_tokens the same walk
+        runs over the words' WordSuffixIndex, so a match can also start at
+        a later word ("benchpress" finds "barbell bench press"); at equal
+        distance those rank after words matched from the start.
+
+        Args:
+            query: The (possibly misspelled) prefix (case-insensitive)
+            max_results: Maximum number of results to return (default: 10)
+            max_distance: Largest edit distance to accept (default: 2), capped
+                below the query length so short queries don't match everything
+
+        Returns:
+            List of (word, distance) pairs, closest first
+        """
+        query = self._normalize(query)
+        if not query or max_results <= 0:
+            return []
+        max_distance = min(max_distance, len(query) - 1)
+
+        matches = {}  # word -> distance
+        first_row = tuple(range(len(query) + 1))
+        stack = [(self.root, first_row, None, '', first_row[-1])]
+        while stack:
+            node, row, prev_row, prev_char, best = stack.pop()
+            for child in node.edges[1]:
+                child_row, child_prev_row, child_prev_char, child_best = row, prev_row, prev_char, best
+                alive = True
+                for char in child.label:
+                    child_row, child_prev_row = _next_edit_row(
+                        query, child_row, child_prev_row, child_prev_char, char), child_row
+                    child_prev_char = char
+                    child_best = min(child_best, child_row[-1])
+                    if min(child_row) > max_distance:
+                        alive = False
+                        break
+
+                if not alive:
+                    # Rows only grow from here, so the subtree either matches
+                    # as a whole at child_best or not at all
+                    if child_best <= max_distance:
+                        words = child.top if self.top_k >= max_results else self._iter_words(child)
+                        for word in words:
+                            matches[word] = child_best
+                    continue
+
+                if child.word is not None and child_best <= max_distance:
+                    matches[child.word] = child_best
+                stack.append((child, child_row, child_prev_row, child_prev_char, child_best))
+
+        ranked = {word: (distance, 0) for word, distance in matches.items()}
+        if self.word_suffixes is not None:
+            for word, distance in self.word_suffixes.fuzzy_matches(query, max_distance).items():
+                if (distance, 1) < ranked.get(word, (distance + 1, 0)):
+                    ranked[word] = (distance, 1)
+
+        best = nsmallest(max_results, ranked.items(), key=lambda match: (match[1], self._rank_key(match[0])))
+        return [(word, distance) for word, (distance, _tier) in best]
+
+    def get_all_words(self) -> List[str]:
+        """
+        Get all words stored in the trie
+
+        Returns:
+            List of all words in the trie, in alphabetical order
+        """
+        return list(self._iter_words(self.root))
+
+    def clear(self) -> None:
+        """Clear all words from the trie (weights are kept)"""
+        self.root = RadixNode()
+        self.size = 0
+        for index in self._indexes:
+            index.clear()
+        self.generation = next(_GENERATIONS)
+
     def __len__(self) -> int:
         """Return the number of words in the trie"""
         return self.size
-    
+
     def __contains__(self, word: str) -> bool:
         """Check if a word is in the trie using 'in' operator"""
         return self.search(word)
 
+
+class WordSuffixIndex:
+    """
+    Every word's text from each of its later words on ("barbell bench
+    press" -> "bench press", "press"), kept in a Trie of its own, so a
+    fuzzy search can start mid-name with the same pruned walk as
+    Trie.fuzzy_autocomplete(). Words sharing an ending share its suffix.
+    """
+
+    def __init__(self):
+        self._suffixes = Trie()
+        self._words: Dict[str, Set[str]] = {}  # suffix -> words ending with it
+
+    @staticmethod
+    def _suffixes_of(word: str) -> List[str]:
+        return [word[offset:] for offset in TokenIndex.token_offsets(word) if offset]
+
+    def add(self, word: str) -> None:
+        """Index a word (expected to be normalised already)"""
+        for suffix in self._suffixes_of(word):
+            words = self._words.get(suffix)
+            if words is None:
+                words = self._words[suffix] = set()
+                self._suffixes.insert(suffix)
+            words.add(word)
+
+    def remove(self, word: str) -> None:
+        for suffix in self._suffixes_of(word):
+            words = self._words.get(suffix)
+            if words is None:
+                continue
+            words.discard(word)
+            if not words:
+                del self._words[suffix]
+                self._suffixes.delete(suffix)
+
+    def fuzzy_matches(self, query: str, max_distance: int) -> Dict[str, int]:
+        """
+        Word -> smallest edit distance between query and a prefix of its text
+        from a later word, for every word where that is within max_distance
+        """
+        matches = {}
+        for suffix, distance in self._suffixes.fuzzy_autocomplete(query, len(self._suffixes), max_distance):
+            for word in tuple(self._words.get(suffix, ())):
+                if distance < matches.get(word, max_distance + 1):
+                    matches[word] = distance
+        return matches
+
+    def clear(self) -> None:
+        self._suffixes = Trie()
+        self._words = {}
@@ -0,0 +1,557 @@
+"""
+Durable named priority queues shared by every process, stored in SQLite
+"""
+import json
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Iterable, List, Optional, Tuple
+
+QUEUE_DB_PATH = os.environ.get(
+    'QUEUE_DB_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'queue.sqlite3'),
+)
+
+# Schema changes in order; PRAGMA user_version records how many have run
+_MIGRATIONS = [
+    # 1: the plain queue
+    [
+        """CREATE TABLE IF NOT EXISTS queue_items (
+            handle INTEGER PRIMARY KEY AUTOINCREMENT,
+            priority INTEGER NOT NULL,
+            item TEXT NOT NULL
+        )""",
+        'CREATE INDEX IF NOT EXISTS queue_items_order ON queue_items (priority DESC, handle)',
+    ],
+    # 2: leases and delayed items. Ready rows are ordered for dequeue;
+    # waiting rows (leased or not yet due) are ordered by when they become
+    # visible, so promoting due ones never scans the queue.
+    [
+        'ALTER TABLE queue_items ADD COLUMN ready INTEGER NOT NULL DEFAULT 1',
+        'ALTER TABLE queue_items ADD COLUMN visible_at REAL NOT NULL DEFAULT 0',
+        'ALTER TABLE queue_items ADD COLUMN lease_id TEXT',
+        'ALTER TABLE queue_items ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0',
+        'DROP INDEX IF EXISTS queue_items_order',
+        'CREATE INDEX queue_items_ready ON queue_items (priority DESC, handle) WHERE ready = 1',
+        'CREATE INDEX queue_items_waiting ON queue_items (visible_at) WHERE ready = 0',
+    ],
+    # 3: named queues, each its own range of every index, plus per-minute
+    # enqueue/dequeue counts for rates
+    [
+        "ALTER TABLE queue_items ADD COLUMN queue TEXT NOT NULL DEFAULT 'default'",
+        'ALTER TABLE queue_items ADD COLUMN enqueued_at REAL NOT NULL DEFAULT 0',
+        "UPDATE queue_items SET enqueued_at = (julianday('now') - 2440587.5) * 86400.0",
+        'DROP INDEX IF EXISTS queue_items_ready',
+        'DROP INDEX IF EXISTS queue_items_waiting',
+        'CREATE INDEX queue_items_ready ON queue_items (queue, priority DESC, handle) WHERE ready = 1',
+        'CREATE INDEX queue_items_waiting ON queue_items (queue, visible_at) WHERE ready = 0',
+        'CREATE INDEX queue_items_age ON queue_items (queue, handle)',
+        """CREATE TABLE queue_counts (
+            queue TEXT NOT NULL,
+            minute INTEGER NOT NULL,
+            enqueued INTEGER NOT NULL DEFAULT 0,
+            dequeued INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (queue, minute)
+        )""",
+    ],
+    # 4: priority aging. Ready rows are ordered by sort_key, the priority
+    # less aging_rate * the time the item started waiting (see
+    # SQLitePriorityQueue); with no rate set it is just the priority.
+    [
+        'ALTER TABLE queue_items ADD COLUMN aged_from REAL NOT NULL DEFAULT 0',
+        'ALTER TABLE queue_items ADD COLUMN sort_key REAL NOT NULL DEFAULT 0',
+        'UPDATE queue_items SET sort_key = priority, aged_from = CASE '
+        'WHEN ready = 0 AND lease_id IS NULL THEN MAX(enqueued_at, visible_at) ELSE enqueued_at END',
+        'DROP INDEX IF EXISTS queue_items_ready',
+        'CREATE INDEX queue_items_ready ON queue_items (queue, sort_key DESC, handle) WHERE ready = 1',
+        """CREATE TABLE queue_settings (
+            queue TEXT PRIMARY KEY,
+            aging_rate REAL NOT NULL DEFAULT 0
+        )""",
+    ],
+    # 5: item counts per queue, kept by triggers in the transaction that
+    # adds or deletes the rows, so len() doesn't scan the queue
+    [
+        """CREATE TABLE queue_sizes (
+            queue TEXT PRIMARY KEY,
+            size INTEGER NOT NULL DEFAULT 0
+        )""",
+        'INSERT INTO queue_sizes (queue, size) SELECT queue, COUNT(*) FROM queue_items GROUP BY queue',
+        """CREATE TRIGGER queue_items_added AFTER INSERT ON queue_items BEGIN
+            INSERT INTO queue_sizes (queue, size) VALUES (NEW.queue, 1)
+            ON CONFLICT (queue) DO UPDATE SET size = size + 1;
+        END""",
+        """CREATE TRIGGER queue_items_deleted AFTER DELETE ON queue_items BEGIN
+            UPDATE queue_sizes SET size = size - 1 WHERE queue = OLD.queue;
+        END""",
+    ],
+]
+
+DEFAULT_QUEUE = 'default'
+# Ready items are ordered by the REAL sort_key, which holds integers exactly
+# only up to 2 ** 53 in magnitude, so priorities are kept within that
+MIN_PRIORITY = -2 ** 53
+MAX_PRIORITY = 2 ** 53
+QUEUE_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+RATE_WINDOW = 300  # Seconds of history behind the enqueue/dequeue rates
+_COUNTS_RETENTION = 3600  # Seconds of per-minute counts kept
+MAX_OPEN_QUEUES = 256  # Queue instances get_queue() keeps for reuse
+
+# Per thread: path -> (connection, pid that opened it)
+_CONNECTIONS = threading.local()
+
+# How often a blocked dequeue looks for items pushed by other processes
+# (pushes from this process wake it at once)
+WAIT_POLL_INTERVAL = 0.05
+
+
+class SQLitePriorityQueue:
+    """
+    PriorityQueue with the same API and ordering, kept in a SQLite file so
+    every worker process sees one queue and it survives restarts
+
+    Many named queues share one file. The name leads every index, so each
+    queue is its own ordered range (its own heap, in effect): one queue's
+    depth never slows another's dequeues. Queues exist as soon as something
+    is pushed to them; use get_queue() for the shared instance per name.
+
+    Items are stored as JSON next to their priority; an index on
+    (sort_key DESC, handle), where sort_key is the priority unless the queue
+    ages its items (below), keeps the head one B-tree step away, so push,
+    pop, update and remove are O(log n) like the heap. Handles come from
+    an AUTOINCREMENT key, so they are never reused and equal priorities
+    come out in insertion order.
+
+    Besides popping (which deletes), items can be leased: lease() hides
+    them for a visibility timeout and hands back a lease id; ack() with that
+    id deletes the item, and if the lease runs out first the item goes back
+    into the queue in its old place. Items can also be pushed with a
+    not_before time. Leased and delayed rows sit in a second index ordered
+    by the time they become visible, and every dequeue first moves the ones
+    that are due back into the ready index, touching only those rows.
+
+    Every dequeue runs in one IMMEDIATE transaction, under SQLite's write
+    lock: two processes can never take the same item. The database runs in
+    WAL mode, so readers (peek, list) don't block the writer, with
+    synchronous=NORMAL (a commit survives a process crash; a power cut may
+    lose the last few). Each thread uses its own connection, shared by every
+    queue in the file.
+
+    pop_wait() blocks until an item arrives or a timeout passes: pushes from
+    the same process wake it straight away, and it polls (with a read-only
+    check, so idle waiters never take the write lock) for pushes from other
+    processes and items coming due every WAIT_POLL_INTERVAL.
+
+    A queue can age its items (set_aging_rate()): an item's effective
+    priority is its priority plus aging_rate for every second it has been
+    waiting to be dequeued (since its push, or its not_before time), so a
+    stream of high-priority pushes can't starve low-priority items. Every
+    waiting item gains at the same rate, so their order only depends on
+    priority - aging_rate * start of wait, which is fixed per item: that is
+    the indexed sort_key, and aging never rewrites rows as time passes.
+    Changing the rate re-keys the queue's rows once. A leased item that
+    comes back keeps its key, and with it the age it had built up.
+    """
+
+    def __init__(self, path: str = QUEUE_DB_PATH, name: str = DEFAULT_QUEUE, busy_timeout: float = 5.0):
+        if not QUEUE_NAME_PATTERN.match(name):
+            raise ValueError(f"Invalid queue name: {name!r}")
+        self.path = path
+        self.name = name
+        self.busy_timeout = busy_timeout
+        self._pushed = threading.Condition()
+        self._connect()  # Create the schema up front
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        This thread's connection to the file (reopened after a fork), shared
+        by every queue in it, so open files grow with threads, not queues
+        """
+        connections = getattr(_CONNECTIONS, 'by_path', None)
+        if connections is None:
+            connections = _CONNECTIONS.by_path = {}
+        conn, pid = connections.get(self.path, (None, None))
+        if conn is not None and pid == os.getpid():
+            return conn
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        # Autocommit; multi-statement operations open their own transaction
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                               check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        self._migrate(conn)
+        connections[self.path] = (conn, os.getpid())
+        return conn
+
+    def _migrate(self, conn: sqlite3.Connection):
+        if conn.execute('PRAGMA user_version').fetchone()[0] >= len(_MIGRATIONS):
+            return
+        with self._transaction(conn):
+            # Re-read under the write lock: another process may have migrated
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            for statements in _MIGRATIONS[version:]:
+                for statement in statements:
+                    conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {len(_MIGRATIONS)}')
+
+    @contextmanager
+    def _transaction(self, conn: sqlite3.Connection = None):
+        """BEGIN IMMEDIATE (take the write lock now) ... COMMIT, or ROLLBACK on error"""
+        conn = conn or self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    @staticmethod
+    def _entry(row) -> Tuple[int, int, Any]:
+        priority, handle, item = row
+        return priority, handle, json.loads(item)
+
+    def _promote_due(self, conn: sqlite3.Connection, now: float) -> int:
+        """Move leased and delayed items whose time has come back into the queue"""
+        if conn.execute('SELECT 1 FROM queue_items WHERE queue = ? AND ready = 0 AND visible_at <= ? LIMIT 1',
+                        (self.name, now)).fetchone() is None:
+            return 0
+        return conn.execute('UPDATE queue_items SET ready = 1, lease_id = NULL '
+                            'WHERE queue = ? AND ready = 0 AND visible_at <= ?', (self.name, now)).rowcount
+
+    @staticmethod
+    def _aging_rate(conn: sqlite3.Connection, name: str) -> float:
+        row = conn.execute('SELECT aging_rate FROM queue_settings WHERE queue = ?', (name,)).fetchone()
+        return row[0] if row else 0.0
+
+    def aging_rate(self) -> float:
+        """Effective priority an item gains per second it waits (0: no aging)"""
+        return self._aging_rate(self._connect(), self.name)
+
+    def set_aging_rate(self, rate: float) -> None:
+        """
+        Make waiting items gain rate priority per second (0 turns aging off);
+        ValueError unless rate is a finite number >= 0. Re-keys every item in
+        the queue, in one transaction.
+        """
+        rate = float(rate)
+        if not 0 <= rate < float('inf'):
+            raise ValueError(f"Invalid aging rate: {rate!r}")
+        with self._transaction() as conn:
+            conn.execute('INSERT INTO queue_settings (queue, aging_rate) VALUES (?, ?) '
+                         'ON CONFLICT (queue) DO UPDATE SET aging_rate = excluded.aging_rate', (self.name, rate))
+            conn.execute('UPDATE queue_items SET sort_key = priority - ? * aged_from WHERE queue = ?',
+                         (rate, self.name))
+
+    def _count(self, conn: sqlite3.Connection, now: float, enqueued: int = 0, dequeued: int = 0):
+        """
+        Add to this minute's enqueue/dequeue counts (inside the caller's
+        transaction), dropping this queue's counts older than _COUNTS_RETENTION
+        """
+        conn.execute('DELETE FROM queue_counts WHERE queue = ? AND minute < ?',
+                     (self.name, int((now - _COUNTS_RETENTION) // 60)))
+        conn.execute('INSERT INTO queue_counts (queue, minute, enqueued, dequeued) VALUES (?, ?, ?, ?) '
+                     'ON CONFLICT (queue, minute) DO UPDATE SET enqueued = enqueued + excluded.enqueued, '
+                     'dequeued = dequeued + excluded.dequeued',
+                     (self.name, int(now // 60), enqueued, dequeued))
+
+    def __len__(self):
+        """Every stored item: ready, leased or delayed"""
+        row = self._connect().execute('SELECT size FROM queue_sizes WHERE queue = ?', (self.name,)).fetchone()
+        return row[0] if row else 0
+
+    def __contains__(self, handle: int) -> bool:
+        row = self._connect().execute('SELECT 1 FROM queue_items WHERE queue = ? AND handle = ?',
+                                      (self.name, handle)).fetchone()
+        return row is not None
+
+    def is_empty(self) -> bool:
+        """True if nothing can be dequeued right now"""
+        conn = self._connect()
+        return (conn.execute('SELECT 1 FROM queue_items WHERE queue = ? AND ready = 1 LIMIT 1',
+                             (self.name,)).fetchone() is None
+                and conn.execute('SELECT 1 FROM queue_items WHERE queue = ? AND ready = 0 AND visible_at <= ? '
+                                 'LIMIT 1', (self.name, time.time())).fetchone() is None)
+
+    def counts(self) -> dict:
+        """Items by state: ready to dequeue, leased out, and delayed until a not_before time"""
+        now = time.time()
+        conn = self._connect()
+        rows = conn.execute('SELECT ready = 1 OR visible_at <= ?, lease_id IS NOT NULL, COUNT(*) '
+                            'FROM queue_items WHERE queue = ? GROUP BY 1, 2', (now, self.name)).fetchall()
+        counts = {'ready': 0, 'leased': 0, 'delayed': 0}
+        for ready, leased, count in rows:
+            state = 'ready' if ready else 'leased' if leased else 'delayed'
+            counts[state] += count
+        return counts
+
+    def stats(self) -> dict:
+        """
+        Depth by state, enqueues and dequeues per second over the last
+        RATE_WINDOW seconds, and the age in seconds of the oldest item
+        """
+        now = time.time()
+        conn = self._connect()
+        self.prune_counts()
+        counts = self.counts()
+        since = int((now - RATE_WINDOW) // 60)
+        enqueued, dequeued = conn.execute(
+            'SELECT COALESCE(SUM(enqueued), 0), COALESCE(SUM(dequeued), 0) FROM queue_counts '
+            'WHERE queue = ? AND minute >= ?', (self.name, since)).fetchone()
+        # The window starts at the first counted minute, so rates aren't diluted by the partial one
+        window = max(now - since * 60, 1)
+        oldest = conn.execute('SELECT enqueued_at FROM queue_items WHERE queue = ? ORDER BY handle LIMIT 1',
+                              (self.name,)).fetchone()
+        return {
+            'name': self.name,
+            'depth': sum(counts.values()),
+            **counts,
+            'enqueue_rate': round(enqueued / window, 3),
+            'dequeue_rate': round(dequeued / window, 3),
+            'oldest_age': round(now - oldest[0], 3) if oldest else None,
+            'aging_rate': self._aging_rate(conn, self.name),
+        }
+
+    @staticmethod
+    def _check_priority(priority: int):
+        """ValueError unless priority is between MIN_PRIORITY and MAX_PRIORITY"""
+        if not MIN_PRIORITY <= priority <= MAX_PRIORITY:
+            raise ValueError(f"Priority must be between {MIN_PRIORITY} and {MAX_PRIORITY}: {priority!r}")
+
+    def _row(self, item: Any, priority: int, not_before: Optional[float], now: float, aging_rate: float):
+        """
+        (queue, priority, item, ready, visible_at, enqueued_at, aged_from,
+        sort_key) column values for a new item
+        """
+        self._check_priority(priority)
+        if not_before is not None and not_before > now:
+            ready, visible_at, aged_from = 0, not_before, not_before
+        else:
+            ready, visible_at, aged_from = 1, 0, now
+        return (self.name, priority, json.dumps(item), ready, visible_at, now, aged_from,
+                priority - aging_rate * aged_from)
+
+    def push(self, item: Any, priority: int, not_before: Optional[float] = None) -> int:
+        """
+        Insert item (anything JSON-serialisable) with numeric priority
+        (MIN_PRIORITY to MAX_PRIORITY, else ValueError). Returns its handle.
+        not_before is a Unix time before which the item isn't dequeued.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = self._row(item, priority, not_before, now, self._aging_rate(conn, self.name))
+            handle = conn.execute(_INSERT, row).lastrowid
+            self._count(conn, now, enqueued=1)
+        self._notify()
+        return handle
+
+    def push_many(self, entries: Iterable[tuple]) -> List[int]:
+        """
+        Insert (item, priority) or (item, priority, not_before) tuples in one
+        transaction; returns their handles in the same order
+        """
+        now = time.time()
+        entries = list(entries)
+        handles = []
+        with self._transaction() as conn:
+            aging_rate = self._aging_rate(conn, self.name)
+            rows = [self._row(entry[0], entry[1], entry[2] if len(entry) > 2 else None, now, aging_rate)
+                    for entry in entries]
+            for row in rows:
+                handles.append(conn.execute(_INSERT, row).lastrowid)
+            if handles:
+                self._count(conn, now, enqueued=len(handles))
+        if handles:
+            self._notify()
+        return handles
+
+    def _notify(self):
+        with self._pushed:
+            self._pushed.notify_all()
+
+    def peek(self) -> Optional[Tuple[int, Any]]:
+        entry = self.peek_entry()
+        if entry is None:
+            return None
+        priority, _handle, item = entry
+        return priority, item
+
+    def peek_entry(self) -> Optional[Tuple[int, int, Any]]:
+        """Like peek(), but (priority, handle, item)"""
+        conn = self._connect()
+        self._promote_due(conn, time.time())
+        row = conn.execute('SELECT priority, handle, item FROM queue_items WHERE queue = ? AND ready = 1 '
+                           'ORDER BY sort_key DESC, handle LIMIT 1', (self.name,)).fetchone()
+        return self._entry(row) if row is not None else None
+
+    def pop(self) -> Optional[Tuple[int, Any]]:
+        entry = self.pop_entry()
+        if entry is None:
+            return None
+        priority, _handle, item = entry
+        return priority, item
+
+    def pop_entry(self) -> Optional[Tuple[int, int, Any]]:
+        """Like pop(), but (priority, handle, item); atomic across processes"""
+        entries = self._take(1)
+        return entries[0] if entries else None
+
+    def pop_many(self, count: int) -> List[Tuple[int, int, Any]]:
+        """Pop up to count entries at once as (priority, handle, item), in dequeue order; atomic"""
+        return self._take(count)
+
+    def lease(self, count: int, visibility_timeout: float) -> List[tuple]:
+        """
+        Take up to count items for visibility_timeout seconds without deleting them
+
+        Returns:
+            (priority, handle, item, lease_id, expires_at) tuples in dequeue
+            order; ack(handle, lease_id) before expires_at (a Unix time) or
+            the item is queued again
+        """
+        return self._take(count, visibility_timeout)
+
+    def _take(self, count: int, visibility_timeout: Optional[float] = None) -> list:
+        """Pop (visibility_timeout None) or lease the top count ready items, in one transaction"""
+        if count <= 0:
+            return []
+        now = time.time()
+        with self._transaction() as conn:
+            self._promote_due(conn, now)
+            rows = conn.execute('SELECT priority, handle, item FROM queue_items WHERE queue = ? AND ready = 1 '
+                                'ORDER BY sort_key DESC, handle LIMIT ?', (self.name, count)).fetchall()
+            if not rows:
+                return []
+            self._count(conn, now, dequeued=len(rows))
+            handles = [(row[1],) for row in rows]
+            if visibility_timeout is None:
+                conn.executemany('DELETE FROM queue_items WHERE handle = ?', handles)
+                return [self._entry(row) for row in rows]
+            expires_at = now + visibility_timeout
+            leases = [secrets.token_urlsafe(12) for _ in rows]
+            conn.executemany('UPDATE queue_items SET ready = 0, visible_at = ?, lease_id = ?, '
+                             'attempts = attempts + 1 WHERE handle = ?',
+                             [(expires_at, lease_id, row[1]) for lease_id, row in zip(leases, rows)])
+        return [self._entry(row) + (lease_id, expires_at) for lease_id, row in zip(leases, rows)]
+
+    def pop_wait(self, count: int = 1, timeout: float = 0, visibility_timeout: Optional[float] = None) -> list:
+        """
+        pop_many(count) (or lease(count, visibility_timeout)), but if nothing
+        is ready wait up to timeout seconds for an item; returns [] if none came
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            if not self.is_empty():
+                entries = self._take(count, visibility_timeout)
+                if entries:
+                    return entries
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return []
+            with self._pushed:
+                self._pushed.wait(min(remaining, WAIT_POLL_INTERVAL))
+
+    def ack(self, handle: int, lease_id: str) -> bool:
+        """Delete a leased item; False if the lease is unknown or has already expired"""
+        cursor = self._connect().execute(
+            'DELETE FROM queue_items WHERE queue = ? AND handle = ? AND lease_id = ? AND ready = 0 AND visible_at > ?',
+            (self.name, handle, lease_id, time.time()))
+        return cursor.rowcount > 0
+
+    def get(self, handle: int) -> Tuple[int, Any]:
+        """(priority, item) for a queued handle; KeyError if it isn't queued"""
+        row = self._connect().execute(
+            'SELECT priority, handle, item FROM queue_items WHERE queue = ? AND handle = ?',
+            (self.name, handle)).fetchone()
+        if row is None:
+            raise KeyError(handle)
+        priority, _handle, item = self._entry(row)
+        return priority, item
+
+    def update(self, handle: int, priority: int) -> Any:
+        """
+        Change a queued item's base priority (keeping the age it has built
+        up) and return the item, read in the same statement; KeyError if not
+        queued, ValueError if priority is out of range
+        """
+        self._check_priority(priority)
+        row = self._connect().execute(
+            'UPDATE queue_items SET priority = ?, sort_key = ? - COALESCE('
+            '(SELECT aging_rate FROM queue_settings WHERE queue = ?), 0) * aged_from WHERE queue = ? AND handle = ? '
+            'RETURNING item', (priority, priority, self.name, self.name, handle)).fetchone()
+        if row is None:
+            raise KeyError(handle)
+        return json.loads(row[0])
+
+    def remove(self, handle: int) -> Tuple[int, Any]:
+        """Take a queued item out of the queue; returns its (priority, item), KeyError if not queued"""
+        row = self._connect().execute(
+            'DELETE FROM queue_items WHERE queue = ? AND handle = ? RETURNING priority, handle, item',
+            (self.name, handle)).fetchone()
+        if row is None:
+            raise KeyError(handle)
+        priority, _handle, item = self._entry(row)
+        return priority, item
+
+    def top(self, limit: int, offset: int = 0) -> List[Tuple[int, int, Any]]:
+        """
+        (priority, handle, item) of the ready items ranked offset to
+        offset + limit - 1, in dequeue order; walks only that far into the
+        ready index
+        """
+        conn = self._connect()
+        self._promote_due(conn, time.time())
+        rows = conn.execute('SELECT priority, handle, item FROM queue_items WHERE queue = ? AND ready = 1 '
+                            'ORDER BY sort_key DESC, handle LIMIT ? OFFSET ?',
+                            (self.name, max(limit, 0), max(offset, 0))).fetchall()
+        return [self._entry(row) for row in rows]
+
+    def clear(self) -> None:
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM queue_items WHERE queue = ?', (self.name,))
+            conn.execute('DELETE FROM queue_counts WHERE queue = ?', (self.name,))
+
+    def prune_counts(self) -> None:
+        """Drop per-minute counts older than _COUNTS_RETENTION"""
+        self._connect().execute('DELETE FROM queue_counts WHERE queue = ? AND minute < ?',
+                                (self.name, int((time.time() - _COUNTS_RETENTION) // 60)))
+
+
+_INSERT = ('INSERT INTO queue_items (queue, priority, item, ready, visible_at, enqueued_at, aged_from, sort_key) '
+           'VALUES (?, ?, ?, ?, ?, ?, ?, ?)')
+
+# One instance per (path, name), so waiters and pushers in a process share a
+# wake-up; least recently used first, at most MAX_OPEN_QUEUES
+_QUEUES: "OrderedDict[Tuple[str, str], SQLitePriorityQueue]" = OrderedDict()
+_QUEUES_LOCK = threading.Lock()
+
+
+def get_queue(name: str = DEFAULT_QUEUE, path: str = QUEUE_DB_PATH) -> SQLitePriorityQueue:
+    """
+    The shared queue called name, created on first use; ValueError for an
+    invalid name. Past MAX_OPEN_QUEUES, the least recently used instance
+    is dropped; its items stay in the file, and connections are per thread
+    rather than per queue, so it leaves none open.
+    """
+    with _QUEUES_LOCK:
+        queue = _QUEUES.get((path, name))
+        if queue is None:
+            queue = _QUEUES[(path, name)] = SQLitePriorityQueue(path, name)
+        _QUEUES.move_to_end((path, name))
+        while len(_QUEUES) > MAX_OPEN_QUEUES:
+            _QUEUES.popitem(last=False)
+        return queue
+
+
+def queue_names(path: str = QUEUE_DB_PATH) -> List[str]:
+    """Names of every queue holding items or with recent activity"""
+    conn = get_queue(DEFAULT_QUEUE, path)._connect()
+    rows = conn.execute('SELECT queue FROM queue_sizes WHERE size > 0 UNION SELECT DISTINCT queue FROM queue_counts '
+                        'ORDER BY 1').fetchall()
+    return [row[0] for row in rows]
@@ -0,0 +1,331 @@
+import os
+import random
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from . import queue_store
+from .data_structures.lru_cache import LRUCache
+from .data_structures.ngram_index import NGramIndex
+from .data_structures.priority_queue import BoundedPriorityQueue, PriorityQueue
+from .data_structures.token_index import TokenIndex
+from .data_structures.trie import Trie
+from .queue_store import SQLitePriorityQueue
+
+
+def random_corpus(rng, size, alphabet='abcd -'):
+    """Short names over a tiny alphabet, so prefixes, tokens and substrings collide a lot"""
+    return [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 8))) for _ in range(size)]
+
+
+class TrieCursorTests(SimpleTestCase):
+    def test_resumed_autocomplete_matches_fresh_autocomplete(self):
+        rng = random.Random(12)
+        for _trial in range(200):
+            trie = Trie(top_k=rng.choice([0, 3]), index_substrings=rng.random() < 0.5,
+                        index_tokens=rng.random() < 0.7)
+            words = random_corpus(rng, rng.randint(1, 60))
+            weights = {word: rng.randint(0, 3) for word in words} if rng.random() < 0.5 else None
+            trie.bulk_load(words, weights)
+            contains = rng.random() < 0.5
+            query = ''.join(rng.choice('abcd -') for _ in range(6))
+            cursor = None
+            # Type the query one character at a time, as a user would
+            for end in range(1, len(query) + 1):
+                prefix = query[:end]
+                results, cursor = trie.autocomplete_from(cursor, prefix, 10, contains)
+                self.assertEqual(results, trie.autocomplete(prefix, 10, contains), (words, prefix, contains))
+
+    def test_query_without_words_does_not_narrow_later_lookups(self):
+        trie = Trie(index_tokens=True)
+        trie.bulk_load(['-d cdb', 'c', 'cbbcb--d'])
+        _results, cursor = trie.autocomplete_from(None, '-')
+        results, _cursor = trie.autocomplete_from(cursor, '-c')
+        self.assertEqual(results, ['-d cdb', 'c', 'cbbcb--d'])
+
+    def test_cursor_from_before_an_edit_is_not_reused(self):
+        trie = Trie(index_tokens=True)
+        trie.bulk_load(['bench press', 'back squat'])
+        _results, cursor = trie.autocomplete_from(None, 'b')
+        trie.insert('bent over row')
+        results, _cursor = trie.autocomplete_from(cursor, 'ben')
+        self.assertEqual(results, trie.autocomplete('ben'))
+
+
+class TrieTests(SimpleTestCase):
+    def test_edits_match_a_sorted_list(self):
+        rng = random.Random(3)
+        for top_k in (0, 3):
+            trie = Trie(top_k=top_k)
+            words, weights = set(), {}
+            for _step in range(400):
+                word = ''.join(rng.choice('abc') for _ in range(rng.randint(1, 5)))
+                action = rng.random()
+                if action < 0.5:
+                    trie.insert(word)
+                    words.add(word)
+                elif action < 0.75:
+                    self.assertEqual(trie.delete(word), word in words)
+                    words.discard(word)
+                else:
+                    trie.add_weight(word, 1)
+                    weights[word] = weights.get(word, 0) + 1
+                prefix = word[:rng.randint(1, len(word))]
+                expected = sorted((w for w in words if w.startswith(prefix)),
+                                  key=lambda w: (-weights.get(w, 0), w))[:5]
+                self.assertEqual(trie.autocomplete(prefix, 5), expected)
+                self.assertEqual(trie.search(word), word in words)
+            self.assertEqual(len(trie), len(words))
+            self.assertEqual(sorted(trie.get_all_words()), sorted(words))
+
+    def test_token_and_contains_matches_follow_prefix_matches(self):
+        trie = Trie(index_tokens=True, index_substrings=True)
+        trie.bulk_load(['press up', 'bench press', 'machine shoulder press', 'impress'])
+        self.assertEqual(trie.autocomplete('press'), ['press up', 'bench press', 'machine shoulder press'])
+        self.assertEqual(trie.autocomplete('press', contains=True),
+                         ['press up', 'bench press', 'machine shoulder press', 'impress'])
+
+    def test_fuzzy_autocomplete_tolerates_a_typo(self):
+        trie = Trie()
+        trie.bulk_load(['bench press', 'deadlift'])
+        self.assertEqual(trie.fuzzy_autocomplete('bnech', max_distance=2)[0][0], 'bench press')
+
+    def test_fuzzy_autocomplete_matches_from_a_later_word(self):
+        trie = Trie(index_tokens=True)
+        trie.bulk_load(['barbell bench press', 'dumbbell bench press', 'bench dip', 'cable row'])
+        self.assertEqual(trie.fuzzy_autocomplete('benchpress'),
+                         [('barbell bench press', 1), ('dumbbell bench press', 1)])
+        self.assertEqual(trie.fuzzy_autocomplete('bnech'),
+                         [('bench dip', 1), ('barbell bench press', 1), ('dumbbell bench press', 1)])
+        trie.delete('barbell bench press')
+        self.assertEqual(trie.fuzzy_autocomplete('benchpress'), [('dumbbell bench press', 1)])
+
+
+class TokenIndexTests(SimpleTestCase):
+    def test_matches_every_query_word_in_any_order(self):
+        index = TokenIndex()
+        for name in ['single-arm cable row', 'cable seated row', 'cable curl', 'barbell row']:
+            index.add(name)
+        self.assertEqual(index.matching('row cab'), {'single-arm cable row', 'cable seated row'})
+        self.assertEqual(index.matching('-'), set())
+        index.remove('cable seated row')
+        self.assertEqual(index.search('cable r'), ['single-arm cable row'])
+
+    def test_ranked_search_follows_edits_and_weight_changes(self):
+        rng = random.Random(11)
+        trie = Trie(index_tokens=True)
+        names = set()
+        for _step in range(1500):
+            name = ' '.join(rng.choice(['ab', 'abc', 'b', 'ba', 'c']) for _ in range(rng.randint(1, 3)))
+            action = rng.random()
+            if action < 0.4:
+                trie.insert(name)
+                names.add(name)
+            elif action < 0.5:
+                trie.delete(name)
+                names.discard(name)
+            else:
+                trie.add_weight(name, rng.choice([1, 1, 2, -1]))
+            query = rng.choice(['a', 'b', 'ab', 'c', 'a b', 'b c'])
+            exclude = set(rng.sample(sorted(names), min(len(names), 2)))
+            query_tokens = TokenIndex.tokenize(query)
+            expected = sorted((n for n in names - exclude
+                               if trie.tokens.name_matches(n, query_tokens)), key=trie._rank_key)[:3]
+            self.assertEqual(trie.tokens.search(query, 3, exclude, key=trie._rank_key), expected)
+
+
+class NGramIndexTests(SimpleTestCase):
+    def test_matching_agrees_with_a_scan(self):
+        rng = random.Random(5)
+        words = {''.join(rng.choice('abcd') for _ in range(rng.randint(1, 10))) for _ in range(300)}
+        index = NGramIndex()
+        index.add_all(words)
+        removed = set(rng.sample(sorted(words), 50))
+        for word in removed:
+            index.remove(word)
+        for _query in range(200):
+            query = ''.join(rng.choice('abcd') for _ in range(rng.randint(3, 5)))
+            self.assertEqual(index.matching(query), {w for w in words - removed if query in w})
+        self.assertIsNone(index.matching('ab'))
+
+
+class LRUCacheTests(SimpleTestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_other_generations_and_expired_entries_miss(self):
+        cache = LRUCache(ttl=10)
+        with mock.patch('config.data_structures.lru_cache.time.monotonic', return_value=100.0):
+            cache.put('a', 1, generation=1)
+            self.assertIsNone(cache.get('a', generation=2))
+            cache.put('a', 1, generation=1)
+            self.assertEqual(cache.get('a', generation=1), 1)
+        with mock.patch('config.data_structures.lru_cache.time.monotonic', return_value=111.0):
+            self.assertIsNone(cache.get('a', generation=1))
+
+
+class PriorityQueueTests(SimpleTestCase):
+    def test_operations_match_a_sorted_list(self):
+        rng = random.Random(7)
+        queue, expected = PriorityQueue(), {}  # handle -> (priority, item)
+        for step in range(2000):
+            action = rng.random()
+            if action < 0.45 or not expected:
+                priority = rng.randint(0, 5)
+                expected[queue.push(step, priority)] = (priority, step)
+            elif action < 0.6:
+                handle = rng.choice(list(expected))
+                priority = rng.randint(0, 5)
+                self.assertEqual(queue.update(handle, priority), expected[handle][1])
+                expected[handle] = (priority, expected[handle][1])
+            elif action < 0.7:
+                handle = rng.choice(list(expected))
+                self.assertEqual(queue.remove(handle), expected.pop(handle))
+            else:
+                handle = min(expected, key=lambda h: (-expected[h][0], h))
+                self.assertEqual(queue.pop_entry(), (expected[handle][0], handle, expected.pop(handle)[1]))
+            ranked = sorted(expected, key=lambda h: (-expected[h][0], h))
+            self.assertEqual([entry[1] for entry in queue.top(5, 2)], ranked[2:7])
+        self.assertEqual(len(queue), len(expected))
+        with self.assertRaises(KeyError):
+            queue.update(-1, 0)
+
+    def test_aging_lifts_a_waiting_item_above_newer_pushes(self):
+        now = [0.0]
+        queue = PriorityQueue(aging_rate=1.0, clock=lambda: now[0])
+        low = queue.push('low', 0)
+        now[0] = 5.0
+        queue.push('high', 4)
+        self.assertEqual(queue.effective_priority(low), 5.0)
+        self.assertEqual(queue.pop(), (0, 'low'))
+
+    def test_nlargest_keeps_ties_in_order(self):
+        items = [('a', 1), ('b', 3), ('c', 3), ('d', 2)]
+        self.assertEqual(PriorityQueue.nlargest(3, items, lambda item: item[1]),
+                         [(3, ('b', 3)), (3, ('c', 3)), (2, ('d', 2))])
+        bounded = BoundedPriorityQueue(1)
+        self.assertTrue(bounded.push('x', 1))
+        self.assertFalse(bounded.push('y', 1))
+        self.assertEqual(bounded.drain(), [(1, 'x')])
+
+
+class SQLitePriorityQueueTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'queue.sqlite3')
+        self.now = 1_000_000.0
+        clock = mock.patch('config.queue_store.time.time', side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def test_priority_order_survives_reopening(self):
+        queue = SQLitePriorityQueue(self.path)
+        for item, priority in [('a', 1), ('b', 5), ('c', 5), ('d', 3)]:
+            queue.push(item, priority)
+        reopened = SQLitePriorityQueue(self.path)
+        self.assertEqual([entry[2] for entry in reopened.pop_many(10)], ['b', 'c', 'd', 'a'])
+        self.assertEqual(len(reopened), 0)
+
+    def test_expired_lease_is_redelivered_in_its_old_place(self):
+        queue = SQLitePriorityQueue(self.path)
+        queue.push('first', 5)
+        queue.push('second', 1)
+        (_priority, handle, item, lease, _expires_at), = queue.lease(1, visibility_timeout=30)
+        self.assertEqual(item, 'first')
+        self.assertEqual(queue.peek(), (1, 'second'))
+        self.now += 31
+        (_priority, again, _item, new_lease, _expires_at), = queue.lease(1, visibility_timeout=30)
+        self.assertEqual(again, handle)
+        self.assertFalse(queue.ack(handle, lease))
+        self.assertTrue(queue.ack(handle, new_lease))
+        self.assertEqual(len(queue), 1)
+
+    def test_ack_after_the_lease_expires_fails(self):
+        queue = SQLitePriorityQueue(self.path)
+        queue.push('job', 1)
+        (_priority, handle, _item, lease, _expires_at), = queue.lease(1, visibility_timeout=10)
+        self.now += 11
+        self.assertFalse(queue.ack(handle, lease))
+        self.assertFalse(queue.ack(handle, 'not-a-lease'))
+        self.assertEqual(queue.pop(), (1, 'job'))
+
+    def test_delayed_item_is_hidden_until_not_before(self):
+        queue = SQLitePriorityQueue(self.path)
+        queue.push('later', 10, not_before=self.now + 60)
+        queue.push('now', 1)
+        self.assertEqual(queue.pop(), (1, 'now'))
+        self.assertIsNone(queue.pop())
+        self.assertEqual(queue.counts(), {'ready': 0, 'leased': 0, 'delayed': 1})
+        self.now += 60
+        self.assertEqual(queue.pop(), (10, 'later'))
+
+    def test_update_remove_and_size(self):
+        queue = SQLitePriorityQueue(self.path)
+        handles = queue.push_many([('a', 1), ('b', 2), ('c', 3)])
+        self.assertEqual(queue.update(handles[0], 10), 'a')
+        self.assertEqual(queue.remove(handles[1]), (2, 'b'))
+        with self.assertRaises(KeyError):
+            queue.remove(handles[1])
+        self.assertEqual(len(queue), 2)
+        self.assertEqual(queue.pop(), (10, 'a'))
+        self.assertEqual(len(queue), 1)
+
+    def test_priorities_at_the_limits_keep_their_order(self):
+        queue = SQLitePriorityQueue(self.path)
+        queue.push('low', queue_store.MAX_PRIORITY - 1)
+        queue.push('high', queue_store.MAX_PRIORITY)
+        queue.push('lowest', queue_store.MIN_PRIORITY)
+        self.assertEqual([entry[2] for entry in queue.pop_many(3)], ['high', 'low', 'lowest'])
+        with self.assertRaises(ValueError):
+            queue.push('too high', queue_store.MAX_PRIORITY + 1)
+        handle = queue.push('x', 0)
+        with self.assertRaises(ValueError):
+            queue.update(handle, queue_store.MIN_PRIORITY - 1)
+
+    def test_named_queues_are_independent(self):
+        first = SQLitePriorityQueue(self.path, 'first')
+        second = SQLitePriorityQueue(self.path, 'second')
+        first.push('x', 1)
+        self.assertIsNone(second.pop())
+        self.assertEqual((len(first), len(second)), (1, 0))
+        self.assertEqual(queue_store.queue_names(self.path), ['first'])
+        with self.assertRaises(ValueError):
+            SQLitePriorityQueue(self.path, '../other')
+
+    def test_aging_lets_a_waiting_item_through(self):
+        queue = SQLitePriorityQueue(self.path)
+        queue.set_aging_rate(1.0)
+        queue.push('low', 0)
+        self.now += 5
+        queue.push('high', 4)
+        self.assertEqual(queue.pop(), (0, 'low'))
+        with self.assertRaises(ValueError):
+            queue.set_aging_rate(-1)
+
+    def test_migrates_a_version_1_database(self):
+        conn = sqlite3.connect(self.path)
+        for statement in queue_store._MIGRATIONS[0]:
+            conn.execute(statement)
+        conn.executemany('INSERT INTO queue_items (priority, item) VALUES (?, ?)',
+                         [(1, '"old low"'), (5, '"old high"')])
+        conn.execute('PRAGMA user_version = 1')
+        conn.commit()
+        conn.close()
+
+        queue = SQLitePriorityQueue(self.path)
+        self.assertEqual(len(queue), 2)
+        handle = queue.push('new', 3)
+        self.assertGreater(handle, 2)
+        self.assertEqual([entry[2] for entry in queue.pop_many(10)], ['old high', 'new', 'old low'])
+        version = queue._connect().execute('PRAGMA user_version').fetchone()[0]
+        self.assertEqual(version, len(queue_store._MIGRATIONS))
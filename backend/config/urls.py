@@ -3,15 +3,39 @@ from communities import views as community_views
 
 from config.views import (
     queue_enqueue,
+    queue_enqueue_bulk,
     queue_dequeue,
+    queue_dequeue_bulk,
+    queue_ack,
     queue_peek,
     queue_list,
+    queue_stats,
+    queue_settings,
+    queue_index,
+    queue_update,
+    queue_remove,
     exercises_list,
     exercise_detail,
     exercise_body_parts,
     exercise_targets,
 )
 
+# The same endpoints for every queue: under /api/queue/ for the default
+# queue and /api/queue/<name>/ for named queues (created on first push)
+queue_patterns = [
+    path('enqueue/', queue_enqueue),
+    path('enqueue/bulk/', queue_enqueue_bulk),
+    path('dequeue/', queue_dequeue),
+    path('dequeue/bulk/', queue_dequeue_bulk),
+    path('ack/', queue_ack),
+    path('peek/', queue_peek),
+    path('list/', queue_list),
+    path('stats/', queue_stats),
+    path('settings/', queue_settings),
+    path('update/', queue_update),
+    path('remove/', queue_remove),
+]
+
 urlpatterns = [
     # Authentication endpoints
     path('api/auth/', include('authentication.urls')),
@@ -23,16 +47,16 @@ urlpatterns = [
     path('api/communities/', include('communities.urls')),
 
     # Priority queue endpoints
-    path('api/queue/enqueue/', queue_enqueue),
-    path('api/queue/dequeue/', queue_dequeue),
-    path('api/queue/peek/', queue_peek),
-    path('api/queue/list/', queue_list),
+    path('api/queue/', queue_index),
+    path('api/queue/', include(queue_patterns)),
+    path('api/queue/<str:name>/', include(queue_patterns)),
     
     # ExerciseDB API endpoints
     path('api/exercises/', exercises_list),
-    path('api/exercises/<str:exercise_id>/', exercise_detail),
+    # Before the detail route, which would otherwise capture these names
     path('api/exercises/body-parts/', exercise_body_parts),
     path('api/exercises/targets/', exercise_targets),
+    path('api/exercises/<str:exercise_id>/', exercise_detail),
 
     path("api/social/clusters/", community_views.social_clusters_view, name="social-clusters"),
     path("api/social/clusters/expanded/", community_views.social_clusters_expanded_view),
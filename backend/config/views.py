@@ -1,13 +1,25 @@
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 import json
+import math
+import time
+from datetime import datetime
+from functools import wraps
+
 import requests
 
 # import the priority queue
-from .data_structures.priority_queue import PriorityQueue
+from .queue_store import DEFAULT_QUEUE, MAX_PRIORITY, MIN_PRIORITY, get_queue, queue_names
+from progress.exercise_trie_service import get_exercise_catalog
 
-# module-level singleton queue (simple stateful store for dev/testing)
-PRIORITY_QUEUE = PriorityQueue()
+# Named queues shared by every worker process, kept in SQLite (QUEUE_DB_PATH)
+# so they survive restarts. The /api/queue/<name>/... routes create them on
+# demand; the unnamed /api/queue/... routes use DEFAULT_QUEUE.
+MAX_QUEUE_PAGE = 100  # Items per queue list page
+MAX_QUEUE_BATCH = 1000  # Items per bulk enqueue/dequeue request
+MAX_QUEUE_WAIT = 10  # Seconds a dequeue may block (a gunicorn thread each); keep below the gunicorn timeout
+MAX_QUEUE_VISIBILITY_TIMEOUT = 12 * 60 * 60  # Longest lease a dequeue may take, in seconds
+MAX_QUEUE_AGING_RATE = 1000  # Priority an item may gain per second it waits
 
 def progress_view(request):
     # For now, static/mock data
@@ -27,17 +39,77 @@ def progress_view(request):
 # -------------------------
 # Priority queue endpoints
 # -------------------------
+def _with_queue(view):
+    """Pass the view the queue named in the URL (DEFAULT_QUEUE for the unnamed routes)"""
+    @wraps(view)
+    def wrapper(request, name=DEFAULT_QUEUE):
+        try:
+            queue = get_queue(name)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        return view(request, queue)
+    return wrapper
+
+
+def _queue_not_before(data):
+    """
+    Unix time an item becomes available, from 'delay' (seconds from now) or
+    'not_before' (ISO 8601 or Unix time); None if neither is given. Raises
+    ValueError for a bad value, including NaN and infinities.
+    """
+    if data.get("delay") is not None:
+        delay = float(data["delay"])
+        if not math.isfinite(delay) or delay < 0:
+            raise ValueError("'delay' must be a finite number of seconds, not negative")
+        return time.time() + delay
+    not_before = data.get("not_before")
+    if not_before is None:
+        return None
+    if isinstance(not_before, str):
+        return datetime.fromisoformat(not_before).timestamp()
+    not_before = float(not_before)
+    if not math.isfinite(not_before):
+        raise ValueError("'not_before' must be a finite Unix time")
+    return not_before
+
+
+def _queue_priority(value):
+    """
+    An integer priority from a request body; raises ValueError unless it is
+    an integer the queue can store (MIN_PRIORITY to MAX_PRIORITY)
+    """
+    try:
+        priority = int(value)
+    except (TypeError, OverflowError) as e:
+        raise ValueError(str(e))
+    if not MIN_PRIORITY <= priority <= MAX_PRIORITY:
+        raise ValueError(f"'priority' must be between {MIN_PRIORITY} and {MAX_PRIORITY}")
+    return priority
+
+
+def _queue_entry(entry):
+    """JSON for a (priority, handle, item) entry, plus the lease for a leased one"""
+    data = {"priority": entry[0], "handle": entry[1], "item": entry[2]}
+    if len(entry) > 3:
+        data["lease"] = entry[3]
+        data["lease_expires_at"] = datetime.fromtimestamp(entry[4]).isoformat()
+    return data
+
+
 @csrf_exempt
-def queue_enqueue(request):
+@_with_queue
+def queue_enqueue(request, queue):
     """
     POST: { "item": "...", "priority": 5 }
+    Optional 'delay' (seconds) or 'not_before' (ISO 8601 or Unix time)
+    keeps the item out of dequeues until then.
     """
     if request.method != "POST":
         return JsonResponse({"error": "POST required"}, status=400)
     try:
-        data = json.loads(request.body)
-    except Exception:
-        return JsonResponse({"error": "Invalid JSON"}, status=400)
+        data = _queue_body(request)
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON; the body must be a JSON object"}, status=400)
 
     item = data.get("item")
     priority = data.get("priority")
@@ -46,54 +118,322 @@ def queue_enqueue(request):
         return JsonResponse({"error": "Both 'item' and 'priority' are required"}, status=400)
 
     try:
-        priority = int(priority)
+        priority = _queue_priority(priority)
     except ValueError:
-        return JsonResponse({"error": "'priority' must be an integer"}, status=400)
+        return JsonResponse({"error": f"'priority' must be an integer between {MIN_PRIORITY} and {MAX_PRIORITY}"},
+                            status=400)
+    try:
+        not_before = _queue_not_before(data)
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "Invalid 'delay' or 'not_before'"}, status=400)
 
-    PRIORITY_QUEUE.push(item, priority)
-    return JsonResponse({"success": True, "size": len(PRIORITY_QUEUE)})
+    handle = queue.push(item, priority, not_before)
+    return JsonResponse({"success": True, "handle": handle, "size": len(queue)})
 
 
 @csrf_exempt
-def queue_dequeue(request):
+@_with_queue
+def queue_enqueue_bulk(request, queue):
     """
-    POST: (no body required)
-    Returns the popped (priority, item) or null if empty.
+    POST: { "items": [{ "item": "...", "priority": 5 }, ...] }
+    Enqueues every item in one transaction; returns their handles in order.
+    Each item may have its own 'delay' or 'not_before'.
     """
     if request.method != "POST":
         return JsonResponse({"error": "POST required"}, status=400)
+    try:
+        data = _queue_body(request)
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON; the body must be a JSON object"}, status=400)
 
-    top = PRIORITY_QUEUE.pop()
-    if top is None:
+    items = data.get("items")
+    if not isinstance(items, list):
+        return JsonResponse({"error": "'items' must be a list"}, status=400)
+    if len(items) > MAX_QUEUE_BATCH:
+        return JsonResponse({"error": f"At most {MAX_QUEUE_BATCH} items per request"}, status=400)
+
+    entries = []
+    for position, entry in enumerate(items):
+        if not isinstance(entry, dict) or entry.get("item") is None or entry.get("priority") is None:
+            return JsonResponse({"error": f"items[{position}] needs both 'item' and 'priority'"}, status=400)
+        try:
+            entries.append((entry["item"], _queue_priority(entry["priority"]), _queue_not_before(entry)))
+        except (TypeError, ValueError):
+            return JsonResponse({"error": f"items[{position}] has an invalid priority, delay or not_before"},
+                                status=400)
+
+    handles = queue.push_many(entries)
+    return JsonResponse({"success": True, "handles": handles, "size": len(queue)})
+
+
+def _queue_wait(data):
+    """
+    Seconds to block for from a request body's 'wait' (0 if absent), capped
+    at MAX_QUEUE_WAIT; ValueError if it isn't a finite number
+    """
+    wait = float(data.get("wait", 0) or 0)
+    if not math.isfinite(wait):
+        raise ValueError("'wait' must be a finite number")
+    return min(max(wait, 0), MAX_QUEUE_WAIT)
+
+
+def _queue_visibility_timeout(data):
+    """Lease length from a request body's 'visibility_timeout', or None to pop outright"""
+    timeout = data.get("visibility_timeout")
+    if timeout is None:
+        return None
+    timeout = float(timeout)
+    if not 0 < timeout <= MAX_QUEUE_VISIBILITY_TIMEOUT:
+        raise ValueError(f"'visibility_timeout' must be between 0 and {MAX_QUEUE_VISIBILITY_TIMEOUT}")
+    return timeout
+
+
+def _queue_body(request):
+    """
+    Parsed JSON body, {} when there is none (or it isn't JSON and wasn't
+    sent as JSON); raises ValueError for a bad JSON body
+    """
+    if not request.body.strip():
+        return {}
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        if request.content_type == "application/json":
+            raise
+        return {}
+    if not isinstance(data, dict):
+        raise ValueError("body must be a JSON object")
+    return data
+
+
+@csrf_exempt
+@_with_queue
+def queue_dequeue(request, queue):
+    """
+    POST: (no body required) or { "wait": 10, "visibility_timeout": 60 }
+    Returns the popped (priority, item) and its handle, or null if empty.
+    With 'wait', an empty queue holds the request for up to that many
+    seconds (max MAX_QUEUE_WAIT) until an item arrives, instead of polling.
+    With 'visibility_timeout', the item is leased rather than removed: the
+    response carries a 'lease' to pass to /api/queue/ack/ within that many
+    seconds, after which the item is queued again.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required"}, status=400)
+    try:
+        data = _queue_body(request)
+        wait = _queue_wait(data)
+        visibility_timeout = _queue_visibility_timeout(data)
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "Invalid JSON, 'wait' or 'visibility_timeout'"}, status=400)
+
+    popped = queue.pop_wait(1, wait, visibility_timeout)
+    if not popped:
         return JsonResponse({"success": False, "message": "Queue empty", "item": None})
-    priority, item = top
-    return JsonResponse({"success": True, "item": item, "priority": priority, "size": len(PRIORITY_QUEUE)})
+    return JsonResponse({"success": True, **_queue_entry(popped[0]), "size": len(queue)})
+
+
+@csrf_exempt
+@_with_queue
+def queue_dequeue_bulk(request, queue):
+    """
+    POST: { "count": 50, "wait": 10, "visibility_timeout": 60 }
+    Pops (or, with 'visibility_timeout', leases) up to 'count' items (max
+    MAX_QUEUE_BATCH) in dequeue order. With 'wait', an empty queue holds
+    the request until at least one item arrives or the wait runs out.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required"}, status=400)
+    try:
+        data = _queue_body(request)
+        count = int(data.get("count", 1))
+        wait = _queue_wait(data)
+        visibility_timeout = _queue_visibility_timeout(data)
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "Invalid JSON, 'count', 'wait' or 'visibility_timeout'"}, status=400)
+    if not 1 <= count <= MAX_QUEUE_BATCH:
+        return JsonResponse({"error": f"'count' must be between 1 and {MAX_QUEUE_BATCH}"}, status=400)
+
+    popped = queue.pop_wait(count, wait, visibility_timeout)
+    return JsonResponse({"success": bool(popped), "items": [_queue_entry(entry) for entry in popped],
+                         "count": len(popped), "size": len(queue)})
+
+
+@csrf_exempt
+@_with_queue
+def queue_ack(request, queue):
+    """
+    POST: { "handle": 3, "lease": "..." }
+    Finishes a leased item (deletes it). 409 if the lease has expired (the
+    item is back in the queue, or with another consumer) or is unknown.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required"}, status=400)
+    try:
+        data = _queue_body(request)
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON; the body must be a JSON object"}, status=400)
+
+    handle = _queue_handle(data)
+    lease = data.get("lease")
+    if handle is None or not isinstance(lease, str):
+        return JsonResponse({"error": "Integer 'handle' and string 'lease' are required"}, status=400)
+    if not queue.ack(handle, lease):
+        return JsonResponse({"error": "Lease expired or unknown"}, status=409)
+    return JsonResponse({"success": True, "handle": handle, "size": len(queue)})
 
 
-def queue_peek(request):
+@_with_queue
+def queue_peek(request, queue):
     """
     GET: returns the current top without removing
     """
     if request.method != "GET":
         return JsonResponse({"error": "GET required"}, status=400)
 
-    top = PRIORITY_QUEUE.peek()
+    top = queue.peek_entry()
     if top is None:
         return JsonResponse({"success": False, "message": "Queue empty", "item": None})
-    priority, item = top
-    return JsonResponse({"success": True, "item": item, "priority": priority, "size": len(PRIORITY_QUEUE)})
+    priority, handle, item = top
+    return JsonResponse({"success": True, "item": item, "priority": priority, "handle": handle,
+                         "size": len(queue)})
 
 
-def queue_list(request):
+@_with_queue
+def queue_list(request, queue):
     """
-    GET: returns internal heap list (priority,item) pairs - useful for debugging
+    GET: one page of the queue in dequeue order, without removing anything
+    Optional query parameters: limit (default 20, max MAX_QUEUE_PAGE), offset
+    Only the items up to the end of the page are read, however deep the
+    queue is; /api/queue/stats/ has the counts of leased and delayed items.
     """
     if request.method != "GET":
         return JsonResponse({"error": "GET required"}, status=400)
+    try:
+        limit = min(max(int(request.GET.get("limit", 20)), 1), MAX_QUEUE_PAGE)
+        offset = max(int(request.GET.get("offset", 0)), 0)
+    except ValueError:
+        return JsonResponse({"error": "'limit' and 'offset' must be integers"}, status=400)
 
-    items = PRIORITY_QUEUE.as_list()
+    items = queue.top(limit, offset)
     # convert to json-friendly structure
-    return JsonResponse({"success": True, "queue": [{"priority": p, "item": it} for p, it in items], "size": len(PRIORITY_QUEUE)})
+    return JsonResponse({"success": True, "queue": [{"priority": p, "handle": h, "item": it} for p, h, it in items],
+                         "limit": limit, "offset": offset, "size": len(queue)})
+
+
+@_with_queue
+def queue_stats(request, queue):
+    """
+    GET: depth (ready/leased/delayed), enqueues and dequeues per second over
+    the last few minutes, and the age in seconds of the oldest item
+    """
+    if request.method != "GET":
+        return JsonResponse({"error": "GET required"}, status=400)
+    return JsonResponse({"success": True, **queue.stats()})
+
+
+def queue_index(request):
+    """
+    GET: every queue with items or recent activity, with its stats
+    """
+    if request.method != "GET":
+        return JsonResponse({"error": "GET required"}, status=400)
+    queues = [get_queue(name).stats() for name in queue_names()]
+    return JsonResponse({"success": True, "queues": queues, "count": len(queues)})
+
+
+@csrf_exempt
+@_with_queue
+def queue_settings(request, queue):
+    """
+    GET: the queue's settings
+    POST: { "aging_rate": 0.5 }
+    'aging_rate' is the priority a waiting item gains per second (0 to
+    MAX_QUEUE_AGING_RATE, 0 turns aging off): an item of priority p is
+    dequeued ahead of one of priority P pushed more than (P - p) / aging_rate
+    seconds after it, so low-priority items can't starve.
+    """
+    if request.method == "GET":
+        return JsonResponse({"success": True, "name": queue.name, "aging_rate": queue.aging_rate()})
+    if request.method != "POST":
+        return JsonResponse({"error": "GET or POST required"}, status=400)
+    try:
+        data = _queue_body(request)
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON; the body must be a JSON object"}, status=400)
+    try:
+        aging_rate = float(data.get("aging_rate"))
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "A numeric 'aging_rate' is required"}, status=400)
+    if not 0 <= aging_rate <= MAX_QUEUE_AGING_RATE:
+        return JsonResponse({"error": f"'aging_rate' must be between 0 and {MAX_QUEUE_AGING_RATE}"}, status=400)
+
+    queue.set_aging_rate(aging_rate)
+    return JsonResponse({"success": True, "name": queue.name, "aging_rate": aging_rate})
+
+
+def _queue_handle(data):
+    """The integer 'handle' from a request body, or None"""
+    try:
+        return int(data["handle"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+@csrf_exempt
+@_with_queue
+def queue_update(request, queue):
+    """
+    POST: { "handle": 3, "priority": 10 }
+    Changes a queued item's priority in place (the handle comes from enqueue).
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required"}, status=400)
+    try:
+        data = _queue_body(request)
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON; the body must be a JSON object"}, status=400)
+
+    handle = _queue_handle(data)
+    if handle is None or data.get("priority") is None:
+        return JsonResponse({"error": "Integer 'handle' and 'priority' are required"}, status=400)
+    try:
+        priority = _queue_priority(data["priority"])
+    except ValueError:
+        return JsonResponse({"error": f"'priority' must be an integer between {MIN_PRIORITY} and {MAX_PRIORITY}"},
+                            status=400)
+
+    try:
+        item = queue.update(handle, priority)
+    except KeyError:
+        return JsonResponse({"error": "No queued item with that handle"}, status=404)
+    return JsonResponse({"success": True, "item": item, "priority": priority, "handle": handle,
+                         "size": len(queue)})
+
+
+@csrf_exempt
+@_with_queue
+def queue_remove(request, queue):
+    """
+    POST: { "handle": 3 }
+    Cancels a queued item without dequeuing anything else.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required"}, status=400)
+    try:
+        data = _queue_body(request)
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON; the body must be a JSON object"}, status=400)
+
+    handle = _queue_handle(data)
+    if handle is None:
+        return JsonResponse({"error": "Integer 'handle' is required"}, status=400)
+    try:
+        priority, item = queue.remove(handle)
+    except KeyError:
+        return JsonResponse({"error": "No queued item with that handle"}, status=404)
+    return JsonResponse({"success": True, "item": item, "priority": priority, "handle": handle,
+                         "size": len(queue)})
 
 
 # -------------------------
@@ -101,8 +441,13 @@ def queue_list(request):
 # -------------------------
 def exercises_list(request):
     """
-    GET: returns list of exercises from ExerciseDB.dev API
-    Optional query parameters: q (search query), bodyPart, equipment, target
+    GET: returns list of exercises
+    Optional query parameters: q (search query), bodyPart, equipment, target,
+    limit (default 50), offset
+    
+    Answered from the local exercise catalogue once a crawl has filled it
+    (filters are exact facet matches there and 'total' counts every match);
+    until then the search is forwarded to ExerciseDB.dev
     """
     if request.method != "GET":
         return JsonResponse({"error": "GET required"}, status=400)
@@ -113,6 +458,24 @@ def exercises_list(request):
     equipment = request.GET.get('equipment', '')
     target = request.GET.get('target', '')
     
+    catalog = get_exercise_catalog()
+    if len(catalog) > 0:
+        try:
+            limit = min(max(int(request.GET.get('limit', 50)), 0), 200)
+            offset = max(int(request.GET.get('offset', 0)), 0)
+        except ValueError:
+            return JsonResponse({"success": False, "error": "limit and offset must be integers"}, status=400)
+        exercises, total = catalog.query(
+            q=search_query, limit=limit, offset=offset,
+            bodyPart=body_part, equipment=equipment, target=target,
+        )
+        return JsonResponse({
+            "success": True,
+            "exercises": exercises,
+            "count": len(exercises),
+            "total": total
+        })
+    
     # Build the API URL and parameters
     api_url = "https://www.exercisedb.dev/api/v1/exercises/search"
     params = {}
@@ -170,6 +533,13 @@ def exercise_detail(request, exercise_id):
     if request.method != "GET":
         return JsonResponse({"error": "GET required"}, status=400)
     
+    exercise = get_exercise_catalog().get(exercise_id)
+    if exercise is not None:
+        return JsonResponse({
+            "success": True,
+            "exercise": exercise
+        })
+    
     api_url = f"https://www.exercisedb.dev/api/v1/exercises/{exercise_id}"
     
     try:
@@ -196,13 +566,22 @@ def exercise_detail(request, exercise_id):
 
 def exercise_body_parts(request):
     """
-    GET: returns list of common body parts for filtering
-    Since exercisedb.dev doesn't have a specific body parts endpoint,
-    we return a predefined list of common body parts
+    GET: returns list of body parts for filtering
+    Taken from the local exercise catalogue, with how many exercises have
+    each; a predefined list of common body parts until a crawl has filled it
     """
     if request.method != "GET":
         return JsonResponse({"error": "GET required"}, status=400)
     
+    catalog = get_exercise_catalog()
+    if len(catalog) > 0:
+        counts = catalog.facet_counts('bodyPart')
+        return JsonResponse({
+            "success": True,
+            "bodyParts": list(counts),
+            "counts": counts
+        })
+    
     # Common body parts for exercise filtering
     body_parts = [
         "chest", "back", "shoulders", "arms", "biceps", "triceps",
@@ -218,13 +597,23 @@ def exercise_body_parts(request):
 
 def exercise_targets(request):
     """
-    GET: returns list of common target muscles for filtering
-    Since exercisedb.dev doesn't have a specific targets endpoint,
-    we return a predefined list of common target muscles
+    GET: returns list of target muscles for filtering
+    Taken from the local exercise catalogue, with how many exercises have
+    each; a predefined list of common target muscles until a crawl has
+    filled it
     """
     if request.method != "GET":
         return JsonResponse({"error": "GET required"}, status=400)
     
+    catalog = get_exercise_catalog()
+    if len(catalog) > 0:
+        counts = catalog.facet_counts('target')
+        return JsonResponse({
+            "success": True,
+            "targets": list(counts),
+            "counts": counts
+        })
+    
     # Common target muscles for exercise filtering
     targets = [
         "pectorals", "latissimus dorsi", "deltoids", "biceps", "triceps",
@@ -0,0 +1,50 @@
+"""
+Gunicorn settings for serving the backend
+
+    gunicorn -c gunicorn.conf.py config.wsgi
+
+Before forking, the master makes sure an up-to-date exercise snapshot is
+on disk (crawling ExerciseDB once, in a child process so the master never
+opens Firebase/gRPC connections), so each worker's warm-up loads it instead
+of crawling. Workers warm up when Django is ready (see
+ProgressConfig.ready), so leave preload_app off: the warm-up thread must
+start after the fork.
+
+Set EXERCISE_TRIE_SHARED=1 to have workers map that snapshot read-only
+instead of each building a trie. It saves memory, but a mapped trie can't
+take usage bumps or autocomplete cursors, refreshes re-crawl instead of
+syncing deltas, and short prefixes are slower to answer.
+
+Workers are threaded (gthread), so a request that blocks, such as a
+long-poll dequeue on /api/queue, holds one thread rather than a whole
+worker.
+"""
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 4))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+
+
+def post_fork(server, worker):
+    """Each worker warms up its exercise trie as soon as Django is ready (see ProgressConfig.ready)"""
+    os.environ.setdefault('EXERCISE_TRIE_WARMUP', '1')
+
+
+def on_starting(server):
+    """Preload hook: build the exercise snapshot once, before any worker exists"""
+    server.log.info("Preparing exercise snapshot")
+    result = subprocess.run(
+        [sys.executable, os.path.join(BACKEND_DIR, 'manage.py'), 'build_exercise_snapshot', '--if-stale'],
+        cwd=BACKEND_DIR,
+    )
+    if result.returncode != 0:
+        # Workers fall back to the last snapshot on disk or the bundled baseline
+        server.log.warning("Exercise snapshot build failed with exit code %s", result.returncode)
+
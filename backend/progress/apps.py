@@ -1,5 +1,28 @@
+import os
+import sys
+
 from django.apps import AppConfig
 
+
+def _is_autoreloader_parent():
+    """True for runserver's file-watching parent, which never serves a request"""
+    return (os.path.basename(sys.argv[0]) == 'manage.py' and sys.argv[1:2] == ['runserver']
+            and os.environ.get('RUN_MAIN') != 'true' and '--noreload' not in sys.argv)
+
+
 class ProgressConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'progress'
+
+    def ready(self):
+        # Start warming the exercise trie without blocking startup, in
+        # processes that opt in with EXERCISE_TRIE_WARMUP=1 (gunicorn.conf.py
+        # sets it in each worker). Everything else (tests, shells, other
+        # management commands) starts the warm-up on its first autocomplete.
+        if os.environ.get('EXERCISE_TRIE_WARMUP', '').lower() not in ('1', 'true', 'yes'):
+            return
+        if _is_autoreloader_parent():
+            return
+        from .exercise_trie_service import initialize_exercise_trie
+
+        initialize_exercise_trie()
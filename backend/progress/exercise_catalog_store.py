@@ -0,0 +1,182 @@
+"""
+Local columnar store of full ExerciseDB records with bitmap indexes
+"""
+import json
+import os
+import time
+from bisect import bisect_left
+
+from config.data_structures.token_index import TokenIndex
+
+STORE_VERSION = 1
+
+# Facet query parameter -> record fields holding its values (v1 lists first,
+# then the older single-value field)
+FACETS = {
+    'bodyPart': ('bodyParts', 'bodyPart'),
+    'target': ('targetMuscles', 'target'),
+    'equipment': ('equipments', 'equipment'),
+}
+
+
+def _facet_values(record, fields):
+    """Lowercased facet values of a record, whichever field shape it uses"""
+    for field in fields:
+        value = record.get(field)
+        if isinstance(value, str):
+            value = [value]
+        if isinstance(value, list):
+            return tuple(sorted({v.lower().strip() for v in value if isinstance(v, str) and v.strip()}))
+    return ()
+
+
+def iter_rows(bitmap: int):
+    """Yield the row numbers set in a bitmap, lowest first"""
+    while bitmap:
+        low = bitmap & -bitmap
+        yield low.bit_length() - 1
+        bitmap ^= low
+
+
+class ExerciseCatalogStore:
+    """
+    Exercise records stored column by column, with one bitmap per facet value
+
+    Each record is a row; every field is a column (a list indexed by row),
+    so records of any shape fit and are reassembled on the way out. A bitmap
+    is a Python int with bit r set when row r has the value, so a filter on
+    several facets and search words is a handful of big-int ANDs over the
+    whole catalogue, and paging walks only the set bits it returns.
+
+    Search words match the start of any word in an exercise's name or its
+    facet values ("dumb che" finds dumbbell chest exercises).
+    """
+
+    def __init__(self, records=(), built_at=None):
+        self.built_at = built_at
+        self.columns = {}  # field -> list of values by row
+        self.count = 0
+        self.facets = {facet: {} for facet in FACETS}  # facet -> value -> bitmap
+        self._words = []  # sorted search vocabulary
+        self._word_rows = {}  # word -> bitmap
+        self._rows_by_id = {}
+        self.load(records)
+
+    def load(self, records) -> None:
+        """Replace the contents with records (dicts in ExerciseDB's response shape)"""
+        records = [record for record in records if isinstance(record, dict)]
+        columns = {}
+        for row, record in enumerate(records):
+            for field, value in record.items():
+                column = columns.get(field)
+                if column is None:
+                    column = columns[field] = [None] * len(records)
+                column[row] = value
+
+        facets = {facet: {} for facet in FACETS}
+        word_rows = {}
+        rows_by_id = {}
+        for row, record in enumerate(records):
+            bit = 1 << row
+            words = set(TokenIndex.tokenize(record.get('name') or ''))
+            for facet, fields in FACETS.items():
+                for value in _facet_values(record, fields):
+                    facets[facet][value] = facets[facet].get(value, 0) | bit
+                    words.update(TokenIndex.tokenize(value))
+            for word in words:
+                word_rows[word] = word_rows.get(word, 0) | bit
+            exercise_id = record.get('exerciseId') or record.get('id')
+            if exercise_id is not None:
+                rows_by_id[str(exercise_id)] = row
+
+        self.columns = columns
+        self.count = len(records)
+        self.facets = facets
+        self._word_rows = word_rows
+        self._words = sorted(word_rows)
+        self._rows_by_id = rows_by_id
+
+    def record(self, row: int) -> dict:
+        return {field: column[row] for field, column in self.columns.items() if column[row] is not None}
+
+    def get(self, exercise_id):
+        """Return the record with this exerciseId, or None"""
+        row = self._rows_by_id.get(str(exercise_id))
+        return self.record(row) if row is not None else None
+
+    def _rows_for_word(self, prefix: str) -> int:
+        rows = 0
+        i = bisect_left(self._words, prefix)
+        while i < len(self._words) and self._words[i].startswith(prefix):
+            rows |= self._word_rows[self._words[i]]
+            i += 1
+        return rows
+
+    def query(self, q='', limit=50, offset=0, **filters):
+        """
+        Search and filter the catalogue
+
+        Args:
+            q: Search words, each matching the start of a word in the name or
+               a facet value
+            limit: Maximum number of records to return
+            offset: Number of matching records to skip (for paging)
+            filters: Facet -> value (bodyPart, target, equipment), exact but
+                     case-insensitive; empty values are ignored
+
+        Returns:
+            (records in catalogue order, total number of matches)
+        """
+        rows = (1 << self.count) - 1
+        for facet, value in filters.items():
+            if not value:
+                continue
+            if facet not in self.facets:
+                raise ValueError(f"Unknown facet: {facet}")
+            rows &= self.facets[facet].get(value.lower().strip(), 0)
+        for word in TokenIndex.tokenize(q or ''):
+            if not rows:
+                break
+            rows &= self._rows_for_word(word)
+
+        page = []
+        for i, row in enumerate(iter_rows(rows)):
+            if i >= offset + limit:
+                break
+            if i >= offset:
+                page.append(self.record(row))
+        return page, bin(rows).count('1')
+
+    def facet_counts(self, facet: str) -> dict:
+        """Value -> number of exercises, for every value of a facet"""
+        return {value: bin(rows).count('1') for value, rows in sorted(self.facets[facet].items())}
+
+    def save(self, path) -> None:
+        """Write the store to path atomically as columnar JSON"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': STORE_VERSION,
+                'built_at': self.built_at or time.time(),
+                'count': self.count,
+                'columns': self.columns,
+            }, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open(cls, path) -> 'ExerciseCatalogStore':
+        """Read a store written by save(); raises OSError or ValueError"""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != STORE_VERSION:
+            raise ValueError(f"unsupported exercise store version {data.get('version')}")
+        columns = data['columns']
+        count = data['count']
+        records = [{field: column[row] for field, column in columns.items() if column[row] is not None}
+                   for row in range(count)]
+        return cls(records, built_at=data.get('built_at'))
+
+    def __len__(self) -> int:
+        return self.count
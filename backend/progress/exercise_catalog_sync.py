@@ -0,0 +1,187 @@
+"""
+Incremental (delta) sync of the ExerciseDB catalogue
+"""
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from .exercisedb_client import (
+    EXERCISEDB_API_URL,
+    MAX_PAGES,
+    MAX_WORKERS,
+    PAGE_SIZE,
+    AdaptiveRateLimiter,
+    create_session,
+    fetch_page_if_changed,
+    page_exercises,
+)
+
+# How often a refresh re-checks every page instead of trusting the first page
+FULL_SWEEP_INTERVAL = timedelta(days=7)
+
+
+def _page_hash(exercises) -> str:
+    """Content hash of a page over full records, so metadata-only edits count as changes"""
+    digest = hashlib.sha256()
+    for exercise in exercises:
+        if isinstance(exercise, dict):
+            digest.update(json.dumps(exercise, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+            digest.update(b'\n')
+    return digest.hexdigest()
+
+
+class CatalogSync:
+    """
+    Remembers what each catalogue page looked like on the last fetch
+
+    A refresh first re-requests page 0 with If-None-Match/If-Modified-Since.
+    If it is unchanged (304, or a 200 with the same content hash) and the
+    total count hasn't moved, the catalogue is assumed unchanged and the
+    refresh costs one request. Otherwise, or once FULL_SWEEP_INTERVAL has
+    passed, every page is re-requested conditionally and only pages whose
+    hash changed are diffed.
+    """
+
+    def __init__(self, api_url=EXERCISEDB_API_URL, page_size=PAGE_SIZE, max_workers=MAX_WORKERS):
+        self.api_url = api_url
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.pages = {}  # offset -> {'validators', 'hash', 'exercises'}
+        self.total_count = None
+        self.last_full_sweep = None
+        self.last_request_count = 0
+        self.last_changed_pages = 0  # Pages whose content changed in the last refresh
+        # Progress of the refresh in flight (or the last one), for health checks
+        self.pages_done = 0
+        self.pages_total = None
+
+    def exercises(self):
+        """All exercise records from the last sync, in catalogue order"""
+        return [exercise for offset in sorted(self.pages) for exercise in self.pages[offset]['exercises']]
+
+    def names(self):
+        """Unique exercise names (first spelling wins) in catalogue order"""
+        names = []
+        seen = set()
+        for exercise in self.exercises():
+            if isinstance(exercise, dict):
+                name = (exercise.get('name') or '').strip()
+                if name and name.lower() not in seen:
+                    names.append(name)
+                    seen.add(name.lower())
+        return names
+
+    def _fetch(self, session, limiter, offset):
+        """Conditionally fetch one page; returns (offset, body or None, validators)"""
+        validators = self.pages.get(offset, {}).get('validators')
+        data, validators = fetch_page_if_changed(session, limiter, self.api_url, offset,
+                                                 self.page_size, validators)
+        return offset, data, validators
+
+    @staticmethod
+    def _store(pages, offset, data, validators) -> bool:
+        """Record a fetched page in pages; returns True if its content changed"""
+        previous = pages.get(offset)
+        if data is None:
+            # 304 Not Modified
+            return False
+        exercises, _metadata = page_exercises(data)
+        page_hash = _page_hash(exercises)
+        pages[offset] = {'validators': validators, 'hash': page_hash, 'exercises': list(exercises)}
+        return previous is None or previous['hash'] != page_hash
+
+    def refresh(self, full=False):
+        """
+        Bring the stored catalogue up to date with the API
+
+        Fetched pages are staged and only replace the stored ones once every
+        page has come back, so a refresh that fails partway (ExerciseDBError)
+        leaves the previous catalogue, and the next refresh still reports
+        the whole delta.
+
+        Args:
+            full: Re-check every page even if page 0 looks unchanged
+
+        Returns:
+            (added, removed): sets of lowercased exercise names that appeared
+            or disappeared since the previous refresh. On the first refresh
+            every name counts as added.
+        """
+        before = {name.lower() for name in self.names()}
+        full = full or not self.pages or self.last_full_sweep is None \
+            or datetime.now() - self.last_full_sweep >= FULL_SWEEP_INTERVAL
+
+        session = create_session(self.max_workers)
+        limiter = AdaptiveRateLimiter()
+        staged = dict(self.pages)
+        self.pages_done, self.pages_total = 0, None
+        try:
+            offset, data, validators = self._fetch(session, limiter, 0)
+            requests_made = 1
+            self.pages_done = 1
+            changed_pages = int(self._store(staged, offset, data, validators))
+            metadata = page_exercises(data)[1] if data is not None else {}
+            total_count = metadata.get('totalCount') if data is not None else self.total_count
+
+            if not full and not changed_pages and total_count == self.total_count:
+                self.pages = staged  # Keeps page 0's fresh validators
+                self.last_changed_pages = 0
+                self.last_request_count = requests_made
+                self.pages_total = 1
+                return set(), set()
+
+            if not staged[0]['exercises']:
+                # An empty first page means the API is misbehaving, not that
+                # the catalogue was deleted; keep what we have
+                raise ValueError("ExerciseDB returned an empty first page")
+
+            max_offset = MAX_PAGES * self.page_size
+            if isinstance(total_count, int) and total_count > 0:
+                last_offset = min(total_count, max_offset)
+                offsets = list(range(self.page_size, last_offset, self.page_size))
+                self.pages_total = len(offsets) + 1
+
+                with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                    for result in pool.map(lambda o: self._fetch(session, limiter, o), offsets):
+                        changed_pages += self._store(staged, *result)
+                        self.pages_done += 1
+                requests_made += len(offsets)
+            else:
+                # No total to plan with: follow the pages one by one until a
+                # short or empty page (or one without nextPage)
+                total_count = None
+                page = staged[0]['exercises']
+                last_offset = self.page_size
+                while (len(page) == self.page_size or metadata.get('nextPage')) and last_offset < max_offset:
+                    offset, data, validators = self._fetch(session, limiter, last_offset)
+                    requests_made += 1
+                    self.pages_done += 1
+                    changed_pages += self._store(staged, offset, data, validators)
+                    if data is not None:
+                        metadata = page_exercises(data)[1]
+                    page = staged.get(offset, {}).get('exercises') or []
+                    if not page:
+                        break
+                    last_offset += self.page_size
+                self.pages_total = self.pages_done
+
+            # Pages past the new end of the catalogue are gone
+            for stale in [o for o in staged if o >= last_offset and o != 0]:
+                del staged[stale]
+                changed_pages += 1
+
+            self.pages = staged
+            self.total_count = total_count
+            self.last_changed_pages = changed_pages
+            self.last_full_sweep = datetime.now()
+            self.last_request_count = requests_made
+        finally:
+            session.close()
+
+        after = {name.lower() for name in self.names()}
+        return after - before, before - after
+
+    def progress(self) -> dict:
+        """Pages fetched so far in the current (or last) refresh"""
+        return {'pages_done': self.pages_done, 'pages_total': self.pages_total}
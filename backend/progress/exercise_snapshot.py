@@ -0,0 +1,191 @@
+"""
+Versioned binary snapshot of the exercise catalogue, loaded with mmap
+
+Layout (little-endian):
+    header   magic 'EXSNAP', u16 version, u32 count, u32 blob size, f64 built_at
+    weights  count x f64, ranking weight of each name
+    offsets  (count + 1) x u32, start of each name in the blob
+    blob     UTF-8 names, sorted and lowercased, back to back
+
+The arrays are read straight out of the mapped file, so opening a snapshot
+costs a header parse regardless of catalogue size. Because the names are
+sorted, every name starting with a prefix sits in one contiguous run that a
+bisect over the offsets finds without decoding the rest.
+"""
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+SNAPSHOT_MAGIC = b'EXSNAP'
+SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct('<6sHIId')
+
+# Sorts after every byte of a UTF-8 string, so prefix + _PAST_PREFIX bounds
+# the run of names starting with prefix
+_PAST_PREFIX = b'\xff'
+
+
+def _is_token_byte(byte: int) -> bool:
+    """True for the ASCII letters and digits that make up a name's words"""
+    return 48 <= byte <= 57 or 97 <= byte <= 122
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot file is truncated, corrupt or from another version"""
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _native_view(buffer: memoryview, typecode: str):
+    """View little-endian data as typed values, copying only on big-endian hosts"""
+    if sys.byteorder == 'little':
+        return buffer.cast(typecode)
+    values = array(typecode, buffer.tobytes())
+    values.byteswap()
+    return values
+
+
+def write_snapshot(path, names, weights=None, built_at=None) -> int:
+    """
+    Write the catalogue to path atomically (temp file + rename)
+
+    Args:
+        path: Destination file
+        names: Exercise names (normalised, deduplicated and sorted here)
+        weights: Optional name -> ranking weight mapping
+        built_at: Unix time the catalogue was fetched (default: now)
+
+    Returns:
+        Number of names written
+    """
+    weights = weights or {}
+    names = sorted({name.lower().strip() for name in names if name and name.strip()})
+    built_at = time.time() if built_at is None else built_at
+
+    encoded = [name.encode('utf-8') for name in names]
+    offsets = array('I', [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    weight_values = array('d', (float(weights.get(name, 0)) for name in names))
+    blob = b''.join(encoded)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(names), len(blob), built_at))
+        f.write(_little_endian(weight_values))
+        f.write(_little_endian(offsets))
+        f.write(blob)
+    os.replace(tmp_path, path)
+    return len(names)
+
+
+class ExerciseSnapshot:
+    """Read-only view of a snapshot file mapped into memory"""
+
+    def __init__(self, buffer):
+        self._buffer = memoryview(buffer)
+        if len(self._buffer) < _HEADER.size:
+            raise SnapshotError("snapshot is truncated")
+
+        magic, version, count, blob_size, built_at = _HEADER.unpack_from(self._buffer)
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotError("not an exercise snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError(f"unsupported snapshot version {version}")
+
+        weights_start = _HEADER.size
+        offsets_start = weights_start + 8 * count
+        blob_start = offsets_start + 4 * (count + 1)
+        if len(self._buffer) != blob_start + blob_size:
+            raise SnapshotError("snapshot size does not match its header")
+
+        self.count = count
+        self.built_at = built_at
+        self._weights = _native_view(self._buffer[weights_start:offsets_start], 'd')
+        self._offsets = _native_view(self._buffer[offsets_start:blob_start], 'I')
+        self._blob = self._buffer[blob_start:]
+        self._blob_start = blob_start
+        # Substring search runs over the mapping itself when it supports it (mmap, bytes)
+        self._find = getattr(buffer, 'find', None) or bytes(self._buffer).find
+
+    @classmethod
+    def open(cls, path) -> 'ExerciseSnapshot':
+        """Map the file at path; raises OSError or SnapshotError"""
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def name(self, index: int) -> str:
+        return str(self._blob[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+
+    def name_bytes(self, index: int) -> bytes:
+        return bytes(self._blob[self._offsets[index]:self._offsets[index + 1]])
+
+    def weight(self, index: int) -> float:
+        return self._weights[index]
+
+    def names(self):
+        """Yield every name in sorted order"""
+        for index in range(self.count):
+            yield self.name(index)
+
+    def prefix_range(self, prefix: str):
+        """Return (lo, hi) such that names lo..hi-1 are exactly those starting with prefix"""
+        low = prefix.encode('utf-8')
+        lo = bisect_left(range(self.count), low, key=self.name_bytes)
+        hi = bisect_left(range(self.count), low + _PAST_PREFIX, lo, key=self.name_bytes)
+        return lo, hi
+
+    def find_names(self, needle: str, token_start: bool = False):
+        """
+        Yield the index of every name containing needle, in sorted order
+
+        Scans the mapped blob with a C-level find rather than decoding names.
+        With token_start=True only occurrences at the start of a word (after
+        a character other than a-z/0-9) count.
+        """
+        needle = needle.encode('utf-8')
+        if not needle:
+            return
+        base = self._blob_start
+        end_of_blob = base + self._offsets[self.count]
+        pos = self._find(needle, base, end_of_blob)
+        while pos >= 0:
+            offset = pos - base
+            index = bisect_right(self._offsets, offset) - 1
+            start, end = self._offsets[index], self._offsets[index + 1]
+            # Names are stored back to back, so a hit may straddle two of them
+            if offset + len(needle) <= end and (
+                    not token_start or offset == start or not _is_token_byte(self._blob[offset - 1])):
+                yield index
+                pos = self._find(needle, base + end, end_of_blob)
+            else:
+                pos = self._find(needle, pos + 1, end_of_blob)
+
+    def weights(self) -> dict:
+        """Return name -> weight for every name with a non-zero weight"""
+        return {self.name(i): weight for i, weight in enumerate(self._weights) if weight}
+
+    def __len__(self) -> int:
+        return self.count
+
+
+def load_snapshot(path):
+    """Open a snapshot, or return None if it is missing or unreadable"""
+    try:
+        return ExerciseSnapshot.open(path)
+    except (OSError, ValueError) as e:
+        if os.path.exists(path):
+            print(f"Ignoring unreadable exercise snapshot {path}: {e}")
+        return None
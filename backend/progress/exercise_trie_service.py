@@ -1,17 +1,109 @@
 """
 Service for managing exercise autocomplete using Trie data structure
 """
+import os
 import requests
+import secrets
 import threading
+import time
+from config.data_structures.lru_cache import LRUCache
 from config.data_structures.trie import Trie
 from datetime import datetime, timedelta
+from .exercise_snapshot import load_snapshot, write_snapshot
+from .exercise_catalog_store import ExerciseCatalogStore
+from .exercise_catalog_sync import CatalogSync
+from .exercisedb_client import ExerciseDBError
+from .mapped_exercise_trie import MappedExerciseTrie
+from .user_exercise_overlay import UserExerciseOverlays
 
-# Global Trie instance
-EXERCISE_TRIE = Trie()
+# Completions precomputed per trie node; requests for more fall back to a subtree walk
+AUTOCOMPLETE_TOP_K = 25
+
+
+def new_exercise_trie():
+    """Create an empty trie configured for exercise autocomplete"""
+    return Trie(top_k=AUTOCOMPLETE_TOP_K, index_substrings=True, index_tokens=True)
+
+
+# Global Trie instance. Rebuilds construct a new trie and publish it by
+# rebinding this name, so readers take a reference and never lock.
+EXERCISE_TRIE = new_exercise_trie()
 TRIE_LAST_UPDATED = None
-TRIE_LOCK = threading.Lock()  # Thread lock for thread-safe operations
+TRIE_LOCK = threading.Lock()  # Serialises writers (rebuilds, weight updates); readers never take it
 TRIE_UPDATE_INTERVAL = timedelta(hours=24)  # Update trie once per day
 
+# Where the published trie came from: 'custom' (CUSTOM_EXERCISES only, served
+# while the warm-up runs, or a bundled snapshot that adds nothing to them),
+# 'baseline' (the bundled snapshot), 'snapshot' (the last API build's
+# snapshot), 'api' (a crawl) or 'shared' (the mapped runtime snapshot).
+# Anything but 'custom' counts as ready; 'custom' and 'baseline' are degraded
+# (searched, but missing or behind on the API's exercises).
+TRIE_SOURCE = None
+READY_SOURCES = ('baseline', 'snapshot', 'api', 'shared')
+DEGRADED_SOURCES = ('custom', 'baseline')
+# Between warm-ups while a degraded trie or a stale snapshot is served
+WARMUP_RETRY_INTERVAL = timedelta(minutes=5)
+_WARMUP_STARTED = None
+
+# The error from the last failed crawl or refresh, None once one succeeds;
+# background jobs report it instead of 'succeeded'
+_SYNC_ERROR = None
+
+# On-disk catalogue snapshots: the one written after each successful API
+# build, and the baseline shipped with the code for a first start
+SNAPSHOT_PATH = os.environ.get(
+    'EXERCISE_SNAPSHOT_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'exercise_snapshot.bin'),
+)
+BASELINE_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'exercise_snapshot.bin')
+
+# Shared mode (opt-in, EXERCISE_TRIE_SHARED=1): one process writes the
+# snapshot and every worker maps it read-only as a MappedExerciseTrie instead
+# of building its own trie. Workers look for a newer snapshot file every
+# SHARED_TRIE_CHECK_INTERVAL. A mapped trie is read-only, so usage bumps and
+# autocomplete cursors are off and refreshes rebuild the snapshot in full.
+SHARED_EXERCISE_TRIE = os.environ.get('EXERCISE_TRIE_SHARED', '').lower() in ('1', 'true', 'yes')
+SHARED_TRIE_CHECK_INTERVAL = timedelta(seconds=30)
+SHARED_TRIE_RETRY_INTERVAL = timedelta(hours=1)  # Between attempts to replace a stale snapshot
+_SHARED_TRIE_FILE = None  # (path, inode, mtime) of the attached snapshot
+_SHARED_TRIE_CHECKED = None
+_SHARED_REBUILD_ATTEMPTED = None
+
+# Per-page ETags and content hashes from the last crawl, for delta refreshes
+CATALOG_SYNC = CatalogSync()
+_SYNC_LOCK = threading.Lock()
+
+# Full exercise records from the last crawl, searchable and filterable
+# locally, and saved to disk so they survive restarts and upstream outages.
+# Processes that didn't crawl reload the file when it changes.
+CATALOG_STORE_PATH = os.environ.get(
+    'EXERCISE_CATALOG_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'exercise_catalog.json'),
+)
+CATALOG_STORE_CHECK_INTERVAL = timedelta(seconds=30)
+CATALOG_FILL_RETRY_INTERVAL = timedelta(hours=1)  # Between crawls started because the store is empty
+EXERCISE_CATALOG = ExerciseCatalogStore()
+_CATALOG_FILE = None  # (path, inode, mtime) of the loaded store file
+_CATALOG_CHECKED = None
+_CATALOG_FILL_ATTEMPTED = None
+
+# Background rebuild job; only one runs at a time
+_REBUILD_THREAD = None
+_REBUILD_JOB = {'state': 'idle'}
+
+# Usage bumps recorded while a rebuild is in flight, replayed onto the new
+# trie so they aren't lost with the old one (None when no rebuild is running)
+_PENDING_USAGE = None
+
+# Recent autocomplete responses keyed by (normalised prefix, limit). Each
+# entry is tagged with the generation of the trie that produced it, so any
+# rebuild, custom exercise or weight change invalidates the lot in O(1).
+AUTOCOMPLETE_CACHE = LRUCache(max_entries=4096, ttl=300)
+
+# Autocomplete session cursors handed to clients: opaque token -> the trie's
+# AutocompleteCursor, so the next keystroke resumes instead of starting over
+AUTOCOMPLETE_SESSIONS = LRUCache(max_entries=2048, ttl=120)
+
 # Custom exercises to always include in autocomplete
 CUSTOM_EXERCISES = [
     "machine chest press",
@@ -38,232 +130,857 @@ def fetch_all_exercises_from_api():
     """
     Fetch all exercises from ExerciseDB API
     
+    Pages are fetched concurrently over a pooled keep-alive session with
+    adaptive rate limiting. Page validators and hashes are kept in
+    CATALOG_SYNC so later refreshes can be incremental.
+    
     Returns:
-        List of exercise names (strings)
+        List of exercise names (strings), or [] if the crawl failed
     """
+    global _SYNC_ERROR
+    
     try:
-        # ExerciseDB API endpoint - fetch all exercises
-        # The API returns exercises in a list format
-        api_url = "https://www.exercisedb.dev/api/v1/exercises"
-        
-        # Extract exercise names
-        # The API returns: {"success": true, "data": [...], "metadata": {...}}
-        # The API uses pagination, so we need to fetch multiple pages
-        exercise_names = []
-        seen_names = set()  # To avoid duplicates
-        offset = 0
-        limit = 100  # Fetch 100 at a time to reduce API calls
-        page = 0
-        max_pages = 200  # Safety limit (20,000 exercises max) - should be more than enough
-        import time
-        
         print(f"Starting to fetch exercises from ExerciseDB API...")
+        started = time.monotonic()
+        with _SYNC_LOCK:
+            CATALOG_SYNC.refresh(full=True)
+            exercise_names = CATALOG_SYNC.names()
+        _SYNC_ERROR = None
+        update_exercise_catalog_store()
         
-        while page < max_pages:
-            # Fetch a page of exercises
-            params = {'offset': offset, 'limit': limit}
-            response = requests.get(api_url, params=params, timeout=30)
-            
-            # Handle rate limiting
-            if response.status_code == 429:
-                print(f"⚠️ Rate limited by API. Waiting 2 seconds before retry...")
-                import time
-                time.sleep(2)
-                continue
-            
-            response.raise_for_status()
-            
-            try:
-                data = response.json()
-            except ValueError as e:
-                print(f"Error parsing JSON response: {e}")
-                print(f"Response text: {response.text[:200]}")
-                break
-            
-            # Extract exercises from response
-            if isinstance(data, dict):
-                exercises = data.get('data', [])
-                metadata = data.get('metadata', {})
-                
-                # Process exercises from this page
-                for exercise in exercises:
-                    if isinstance(exercise, dict):
-                        name = exercise.get('name', '').strip()
-                        if name and name.lower() not in seen_names:
-                            exercise_names.append(name)
-                            seen_names.add(name.lower())
-                
-                # Check if there are more pages
-                next_page = metadata.get('nextPage')
-                total_count = metadata.get('totalCount', 0)
-                
-                # If we got no exercises, we've reached the end
-                if len(exercises) == 0:
-                    print(f"Reached end of pagination (no exercises returned). Total fetched: {len(exercise_names)}")
-                    break
-                
-                # Check if there are more pages to fetch
-                # Continue if: (1) we got a full page (limit) OR (2) nextPage exists
-                # Stop if: we got fewer than limit AND no nextPage
-                if len(exercises) < limit and not next_page:
-                    print(f"Reached end of pagination (got {len(exercises)} exercises, no nextPage). Total fetched: {len(exercise_names)}")
-                    break
-                
-                offset += limit
-                page += 1
-                # Small delay to avoid rate limiting
-                time.sleep(0.5)
-                
-                # Log progress every 10 pages
-                if page % 10 == 0:
-                    print(f"Fetched {page} pages, {len(exercise_names)} exercises so far...")
-            elif isinstance(data, list):
-                # If API returns a list directly
-                for exercise in data:
-                    if isinstance(exercise, dict):
-                        name = exercise.get('name', '').strip()
-                        if name and name.lower() not in seen_names:
-                            exercise_names.append(name)
-                            seen_names.add(name.lower())
-                break
-            else:
-                break
-        
-        print(f"✅ Fetched {len(exercise_names)} unique exercises from ExerciseDB API (across {page + 1} pages)")
-        if page >= max_pages - 1:
-            print(f"⚠️ Warning: Hit max_pages limit ({max_pages}). There may be more exercises available.")
+        print(f"✅ Fetched {len(exercise_names)} unique exercises from ExerciseDB API "
+              f"in {time.monotonic() - started:.1f}s ({CATALOG_SYNC.last_request_count} requests)")
         return exercise_names
         
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ExerciseDBError, ValueError) as e:
         print(f"Error fetching exercises from API: {e}")
+        _SYNC_ERROR = str(e)
         return []
     except Exception as e:
         print(f"Unexpected error fetching exercises: {e}")
+        _SYNC_ERROR = str(e)
         import traceback
         traceback.print_exc()
         return []
 
 
+def refresh_exercise_trie(force=False):
+    """
+    Incrementally bring the trie up to date with ExerciseDB
+    
+    Only names that appeared or disappeared upstream are inserted into or
+    deleted from the live trie; an unchanged catalogue costs one
+    conditional request. Falls back to a full build when the trie is empty.
+    
+    Args:
+        force: Refresh even if the trie was updated within TRIE_UPDATE_INTERVAL
+        
+    Returns:
+        Number of exercises in the trie
+    """
+    global TRIE_LAST_UPDATED, TRIE_SOURCE, _SYNC_ERROR
+    
+    if SHARED_EXERCISE_TRIE:
+        # A mapped trie is read-only: publish a new snapshot for every worker instead
+        if not force and TRIE_LAST_UPDATED and datetime.now() - TRIE_LAST_UPDATED < TRIE_UPDATE_INTERVAL \
+                and len(_reload_exercise_catalog()) > 0:
+            return len(EXERCISE_TRIE)
+        return rebuild_shared_exercise_trie()
+    
+    if len(EXERCISE_TRIE) == 0 or TRIE_SOURCE == 'custom':
+        return build_exercise_trie(force_rebuild=True)
+    
+    # An empty record store also needs a crawl, even if the trie is fresh
+    if not force and TRIE_LAST_UPDATED and datetime.now() - TRIE_LAST_UPDATED < TRIE_UPDATE_INTERVAL \
+            and len(_reload_exercise_catalog()) > 0:
+        print(f"Trie is up to date ({len(EXERCISE_TRIE)} exercises). Last updated: {TRIE_LAST_UPDATED}")
+        return len(EXERCISE_TRIE)
+    
+    try:
+        with _SYNC_LOCK:
+            first_sync = not CATALOG_SYNC.pages
+            added, removed = CATALOG_SYNC.refresh()
+            upstream = {name.lower() for name in CATALOG_SYNC.names()}
+            records_changed = CATALOG_SYNC.last_changed_pages > 0
+    except (requests.exceptions.RequestException, ExerciseDBError, ValueError) as e:
+        print(f"Error refreshing exercises from API, keeping current trie: {e}")
+        _SYNC_ERROR = str(e)
+        return len(EXERCISE_TRIE)
+    _SYNC_ERROR = None
+    if records_changed or len(EXERCISE_CATALOG) == 0:
+        update_exercise_catalog_store()
+    
+    with TRIE_LOCK:
+        trie = EXERCISE_TRIE
+        if first_sync:
+            # The trie came from a snapshot, so diff against its contents
+            current = set(trie.get_all_words())
+            added, removed = upstream - current, current - upstream
+        removed -= {name.lower() for name in CUSTOM_EXERCISES}
+        
+        for name in removed:
+            trie.delete(name)
+        for name in added:
+            trie.insert(name)
+        TRIE_LAST_UPDATED = datetime.now()
+        TRIE_SOURCE = 'api'
+    
+    print(f"✅ Exercise Trie refreshed: +{len(added)} -{len(removed)} exercises "
+          f"({CATALOG_SYNC.last_request_count} requests)")
+    if added or removed:
+        save_exercise_snapshot(trie.get_all_words(), trie.weights)
+    return len(trie)
+
+
 def build_exercise_trie(force_rebuild=False):
     """
     Build or rebuild the exercise Trie from ExerciseDB API
     
+    The new trie is built off to the side and published with a single
+    reference swap, so autocomplete keeps serving the old trie (never a
+    half-filled one) for the whole crawl.
+    
     Args:
         force_rebuild: If True, rebuild the trie even if it was recently updated
         
     Returns:
-        Number of exercises added to the trie
+        Number of exercises in the trie
     """
-    global EXERCISE_TRIE, TRIE_LAST_UPDATED
+    global EXERCISE_TRIE, TRIE_LAST_UPDATED, TRIE_SOURCE, _PENDING_USAGE
+    
+    # Check if we need to update
+    if not force_rebuild and TRIE_LAST_UPDATED:
+        time_since_update = datetime.now() - TRIE_LAST_UPDATED
+        if time_since_update < TRIE_UPDATE_INTERVAL and len(EXERCISE_TRIE) > 0:
+            print(f"Trie is up to date ({len(EXERCISE_TRIE)} exercises). Last updated: {TRIE_LAST_UPDATED}")
+            return len(EXERCISE_TRIE)
     
+    print("Building exercise Trie from ExerciseDB API...")
+    
+    # Fetch exercises from API
+    exercise_names = fetch_all_exercises_from_api()
+    
+    # Keep serving what we have (e.g. a loaded snapshot) rather than
+    # shrinking the trie to just the custom exercises
+    if not exercise_names and len(EXERCISE_TRIE) > 0:
+        print(f"⚠️ No exercises fetched from API! Using existing trie with {len(EXERCISE_TRIE)} exercises")
+        return len(EXERCISE_TRIE)
+    api_fetch_succeeded = bool(exercise_names)
+    
+    # Add custom exercises to the list (avoid duplicates)
+    seen_names = {name.lower() for name in exercise_names}
+    custom_added = 0
+    for custom_ex in CUSTOM_EXERCISES:
+        if custom_ex.lower() not in seen_names:
+            exercise_names.append(custom_ex)
+            seen_names.add(custom_ex.lower())
+            custom_added += 1
+    
+    if custom_added > 0:
+        print(f"Added {custom_added} custom exercises to the list")
+    
+    # Recount how often each exercise is logged so ranking follows popularity.
+    # Bumps from here until the swap are collected and replayed below.
     with TRIE_LOCK:
-        # Check if we need to update
-        if not force_rebuild and TRIE_LAST_UPDATED:
-            time_since_update = datetime.now() - TRIE_LAST_UPDATED
-            if time_since_update < TRIE_UPDATE_INTERVAL and len(EXERCISE_TRIE) > 0:
-                print(f"Trie is up to date ({len(EXERCISE_TRIE)} exercises). Last updated: {TRIE_LAST_UPDATED}")
-                return len(EXERCISE_TRIE)
-        
-        print("Building exercise Trie from ExerciseDB API...")
-        
-        # Fetch exercises from API
-        exercise_names = fetch_all_exercises_from_api()
-        
-        # Add custom exercises to the list (avoid duplicates)
-        seen_names = {name.lower() for name in exercise_names}
-        custom_added = 0
-        for custom_ex in CUSTOM_EXERCISES:
-            if custom_ex.lower() not in seen_names:
-                exercise_names.append(custom_ex)
-                seen_names.add(custom_ex.lower())
-                custom_added += 1
+        _PENDING_USAGE = {}
+    usage_counts = load_exercise_usage_counts()
+    if usage_counts is None:
+        usage_counts = EXERCISE_TRIE.weights
+    
+    print(f"Inserting {len(exercise_names)} exercises into Trie...")
+    new_trie = new_exercise_trie()
+    new_trie.bulk_load(exercise_names, weights=usage_counts)
+    
+    with TRIE_LOCK:
+        for name, count in _PENDING_USAGE.items():
+            new_trie.add_weight(name, count)
+        _PENDING_USAGE = None
+        EXERCISE_TRIE = new_trie
+        TRIE_SOURCE = 'api' if api_fetch_succeeded else 'custom'
+        # Custom exercises alone aren't up to date with anything; leave the
+        # timestamp unset so the next refresh crawls again
+        if api_fetch_succeeded:
+            TRIE_LAST_UPDATED = datetime.now()
+    
+    print(f"✅ Exercise Trie built successfully with {len(new_trie)} exercises")
+    print(f"   Sample exercises: {list(exercise_names[:5])}")
+    
+    if api_fetch_succeeded:
+        save_exercise_snapshot(exercise_names, new_trie.weights)
+    return len(new_trie)
+
+
+def save_exercise_snapshot(exercise_names, weights=None, path=None, built_at=None):
+    """
+    Persist the catalogue so the next process can start from disk
+    built_at=0 marks the snapshot as always stale (used for the baseline)
+    
+    Returns:
+        Number of exercises written, or 0 if the write failed
+    """
+    path = path or SNAPSHOT_PATH
+    try:
+        count = write_snapshot(path, exercise_names, weights, built_at)
+        print(f"Saved exercise snapshot with {count} exercises to {path}")
+        return count
+    except OSError as e:
+        print(f"Error saving exercise snapshot: {e}")
+        return 0
+
+
+def _snapshot_source(path, snapshot, source):
+    """
+    TRIE_SOURCE for a trie read from the snapshot at path: source for the
+    last API build's snapshot; for the bundled baseline, 'baseline', or
+    'custom' if it adds nothing to CUSTOM_EXERCISES
+    """
+    if path == SNAPSHOT_PATH:
+        return source
+    custom = {name.lower() for name in CUSTOM_EXERCISES}
+    if all(name.lower() in custom for name in snapshot.names()):
+        return 'custom'
+    return 'baseline'
+
+
+def load_exercise_trie_from_snapshot():
+    """
+    Fill the trie from the newest snapshot on disk (the one saved after the
+    last API build, else the bundled baseline), replacing it only if it is
+    empty or holds just the custom exercises
+    
+    Returns:
+        Number of exercises loaded, 0 if no snapshot could be read
+    """
+    global EXERCISE_TRIE, TRIE_LAST_UPDATED, TRIE_SOURCE
+    
+    for path in (SNAPSHOT_PATH, BASELINE_SNAPSHOT_PATH):
+        snapshot = load_snapshot(path)
+        if snapshot is None or len(snapshot) == 0:
+            continue
         
-        if custom_added > 0:
-            print(f"Added {custom_added} custom exercises to the list")
+        new_trie = new_exercise_trie()
+        new_trie.bulk_load(snapshot.names(), weights=snapshot.weights())
         
-        if not exercise_names:
-            print("⚠️ No exercises fetched from API!")
-            if len(EXERCISE_TRIE) > 0:
-                print(f"Using existing trie with {len(EXERCISE_TRIE)} exercises")
+        with TRIE_LOCK:
+            # A concurrent API build may have published first; keep it
+            if len(EXERCISE_TRIE) > 0 and TRIE_SOURCE != 'custom':
                 return len(EXERCISE_TRIE)
-            print("❌ Trie is empty and API fetch failed!")
-            return 0
+            EXERCISE_TRIE = new_trie
+            TRIE_SOURCE = _snapshot_source(path, snapshot, 'snapshot')
+            # The baseline carries no build time, so it is always refreshed
+            TRIE_LAST_UPDATED = datetime.fromtimestamp(snapshot.built_at) if snapshot.built_at else None
         
-        # Clear and rebuild the trie
-        EXERCISE_TRIE.clear()
-        
-        print(f"Inserting {len(exercise_names)} exercises into Trie...")
-        for i, name in enumerate(exercise_names):
-            EXERCISE_TRIE.insert(name)
-            if (i + 1) % 100 == 0:
-                print(f"  Inserted {i + 1}/{len(exercise_names)} exercises...")
+        print(f"Loaded {len(new_trie)} exercises from snapshot {path}")
+        return len(new_trie)
+    
+    return 0
+
+
+def update_exercise_catalog_store():
+    """
+    Rebuild the local record store from the last crawl and save it
+    
+    Returns:
+        Number of exercise records stored
+    """
+    global EXERCISE_CATALOG, _CATALOG_FILE
+    
+    with _SYNC_LOCK:
+        records = CATALOG_SYNC.exercises()
+    if not records:
+        return 0
+    
+    store = ExerciseCatalogStore(records, built_at=time.time())
+    EXERCISE_CATALOG = store
+    try:
+        store.save(CATALOG_STORE_PATH)
+        _CATALOG_FILE = _snapshot_file_id(CATALOG_STORE_PATH)
+        print(f"Saved {len(store)} exercise records to {CATALOG_STORE_PATH}")
+    except OSError as e:
+        print(f"Error saving exercise records: {e}")
+    return len(store)
+
+
+def get_exercise_catalog():
+    """
+    Return the local exercise record store
+    
+    Loads (or, once another process has written a newer one, reloads) the
+    store saved by the last crawl. If there is nothing local yet a crawl is
+    started in the background, at most once per CATALOG_FILL_RETRY_INTERVAL;
+    the store is empty until it lands.
+    """
+    global _CATALOG_FILL_ATTEMPTED
+    
+    store = _reload_exercise_catalog()
+    now = datetime.now()
+    if len(store) == 0 and (
+            _CATALOG_FILL_ATTEMPTED is None or now - _CATALOG_FILL_ATTEMPTED >= CATALOG_FILL_RETRY_INTERVAL):
+        _CATALOG_FILL_ATTEMPTED = now
+        refresh_exercise_trie_in_background()
+    return store
+
+
+def _reload_exercise_catalog():
+    """Load the saved record store if the file changed, at most once per CATALOG_STORE_CHECK_INTERVAL"""
+    global EXERCISE_CATALOG, _CATALOG_FILE, _CATALOG_CHECKED
+    
+    now = datetime.now()
+    if _CATALOG_CHECKED is not None and now - _CATALOG_CHECKED < CATALOG_STORE_CHECK_INTERVAL:
+        return EXERCISE_CATALOG
+    _CATALOG_CHECKED = now
+    file_id = _snapshot_file_id(CATALOG_STORE_PATH)
+    if file_id is not None and file_id != _CATALOG_FILE:
+        try:
+            EXERCISE_CATALOG = ExerciseCatalogStore.open(CATALOG_STORE_PATH)
+            _CATALOG_FILE = file_id
+            print(f"Loaded {len(EXERCISE_CATALOG)} exercise records from {CATALOG_STORE_PATH}")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable exercise records {CATALOG_STORE_PATH}: {e}")
+    return EXERCISE_CATALOG
+
+
+def _snapshot_file_id(path):
+    """(path, inode, mtime) identifying the file currently at path, or None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return path, stat.st_ino, stat.st_mtime_ns
+
+
+def attach_shared_exercise_trie():
+    """
+    Shared mode: serve autocomplete from the newest snapshot file, mapped
+    read-only so every worker shares one copy of it
+    
+    Returns:
+        Number of exercises attached, 0 if no snapshot could be read
+    """
+    global EXERCISE_TRIE, TRIE_LAST_UPDATED, TRIE_SOURCE, _SHARED_TRIE_FILE, _SHARED_TRIE_CHECKED
+    
+    _SHARED_TRIE_CHECKED = datetime.now()
+    for path in (SNAPSHOT_PATH, BASELINE_SNAPSHOT_PATH):
+        file_id = _snapshot_file_id(path)
+        if file_id is None:
+            continue
+        if file_id == _SHARED_TRIE_FILE:
+            return len(EXERCISE_TRIE)
+        snapshot = load_snapshot(path)
+        if snapshot is None or len(snapshot) == 0:
+            continue
         
-        TRIE_LAST_UPDATED = datetime.now()
+        mapped = MappedExerciseTrie(snapshot)
+        with TRIE_LOCK:
+            EXERCISE_TRIE = mapped
+            TRIE_SOURCE = _snapshot_source(path, snapshot, 'shared')
+            _SHARED_TRIE_FILE = file_id
+            TRIE_LAST_UPDATED = datetime.fromtimestamp(snapshot.built_at) if snapshot.built_at else None
+        print(f"Attached shared exercise snapshot {path} ({len(mapped)} exercises)")
+        return len(mapped)
+    
+    return 0
+
+
+def _reattach_if_snapshot_changed():
+    """
+    Shared mode: pick up a snapshot another process wrote, at most once per
+    SHARED_TRIE_CHECK_INTERVAL, and start replacing it in the background
+    once it is stale
+    """
+    global _SHARED_REBUILD_ATTEMPTED
+    
+    now = datetime.now()
+    if _SHARED_TRIE_CHECKED is not None and now - _SHARED_TRIE_CHECKED < SHARED_TRIE_CHECK_INTERVAL:
+        return
+    attach_shared_exercise_trie()
+    
+    stale = TRIE_LAST_UPDATED is None or now - TRIE_LAST_UPDATED >= TRIE_UPDATE_INTERVAL
+    if stale and len(EXERCISE_TRIE) > 0 and (
+            _SHARED_REBUILD_ATTEMPTED is None or now - _SHARED_REBUILD_ATTEMPTED >= SHARED_TRIE_RETRY_INTERVAL):
+        _SHARED_REBUILD_ATTEMPTED = now
+        refresh_exercise_trie_in_background()
+
+
+def rebuild_shared_exercise_trie():
+    """
+    Shared mode: crawl ExerciseDB, write a new snapshot and attach it
+    
+    Holds an exclusive lock file while crawling, so when several workers
+    notice a stale snapshot at once only one of them crawls; the rest keep
+    serving the current snapshot and pick up the new file when it lands.
+    
+    Returns:
+        Number of exercises in the trie
+    """
+    try:
+        import fcntl
+    except ImportError:
+        fcntl = None  # Not on Windows; the crawl just isn't deduplicated across processes
+    
+    with open(f"{SNAPSHOT_PATH}.lock", 'a') as lock_file:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                print("Another process is rebuilding the shared exercise snapshot")
+                return len(EXERCISE_TRIE)
+        build_exercise_trie(force_rebuild=True)
+    
+    attach_shared_exercise_trie()
+    return len(EXERCISE_TRIE)
+
+
+def _run_rebuild_job(force_rebuild, warmup=False):
+    """
+    Thread target: a full rebuild if forced, else an incremental refresh
+    (after loading the on-disk snapshot, for a warm-up); records the
+    outcome and current phase in _REBUILD_JOB
+    """
+    global _SYNC_ERROR
+    
+    try:
+        if warmup:
+            _REBUILD_JOB['phase'] = 'loading snapshot'
+            load_exercise_trie_from_snapshot()
+        _REBUILD_JOB['phase'] = 'syncing'
+        _SYNC_ERROR = None
+        if force_rebuild and SHARED_EXERCISE_TRIE:
+            count = rebuild_shared_exercise_trie()
+        elif force_rebuild:
+            count = build_exercise_trie(force_rebuild=True)
+        else:
+            count = refresh_exercise_trie()
+        if _SYNC_ERROR is not None:
+            # The crawl failed and the current trie was kept
+            _REBUILD_JOB.update(state='failed', error=_SYNC_ERROR, count=count)
+        else:
+            _REBUILD_JOB.update(state='succeeded', count=count)
+    except Exception as e:
+        print(f"Error rebuilding exercise trie: {e}")
+        import traceback
+        traceback.print_exc()
+        _REBUILD_JOB.update(state='failed', error=str(e))
+    _REBUILD_JOB.pop('phase', None)
+    _REBUILD_JOB['finished_at'] = datetime.now().isoformat()
+
+
+def start_exercise_trie_rebuild(force_rebuild=False, warmup=False):
+    """
+    Rebuild (force_rebuild=True) or incrementally refresh the trie on a
+    background thread unless one is already running; warmup=True loads the
+    on-disk snapshot first
+    
+    Returns:
+        (job status dict, True if this call started a new rebuild)
+    """
+    global _REBUILD_THREAD, _REBUILD_JOB
+    
+    with TRIE_LOCK:
+        if _REBUILD_THREAD is not None and _REBUILD_THREAD.is_alive():
+            return get_exercise_trie_status(), False
+        _REBUILD_JOB = {'state': 'running', 'started_at': datetime.now().isoformat()}
+        if warmup:
+            _REBUILD_JOB['warmup'] = True
+        _REBUILD_THREAD = threading.Thread(target=_run_rebuild_job, args=(force_rebuild, warmup), daemon=True)
+        _REBUILD_THREAD.start()
+    return get_exercise_trie_status(), True
+
+
+def refresh_exercise_trie_in_background():
+    """Start a background incremental refresh (skipped if the trie is fresh) unless one is running"""
+    start_exercise_trie_rebuild(force_rebuild=False)
+
+
+def get_exercise_trie_status():
+    """
+    Returns:
+        Dict with the last rebuild job's state plus current trie size and age
+    """
+    status = dict(_REBUILD_JOB)
+    status['trie_size'] = len(EXERCISE_TRIE)
+    status['source'] = TRIE_SOURCE
+    status['shared'] = SHARED_EXERCISE_TRIE
+    if _SHARED_TRIE_FILE is not None:
+        status['shared_snapshot'] = _SHARED_TRIE_FILE[0]
+    status['last_updated'] = TRIE_LAST_UPDATED.isoformat() if TRIE_LAST_UPDATED else None
+    status['exercise_records'] = len(EXERCISE_CATALOG)
+    status['autocomplete_cache'] = AUTOCOMPLETE_CACHE.stats()
+    status['autocomplete_sessions'] = AUTOCOMPLETE_SESSIONS.stats()
+    status['user_overlays'] = USER_OVERLAYS.stats()
+    return status
+
+
+def exercise_trie_ready():
+    """True once autocomplete is served from a catalogue, even just the bundled baseline"""
+    return len(EXERCISE_TRIE) > 0 and TRIE_SOURCE in READY_SOURCES
+
+
+def exercise_trie_degraded():
+    """True while autocomplete searches only custom exercises or the bundled baseline"""
+    return len(EXERCISE_TRIE) == 0 or TRIE_SOURCE in DEGRADED_SOURCES
+
+
+def get_exercise_trie_health():
+    """
+    Returns:
+        Dict for readiness checks: whether the trie is ready (anything but
+        custom exercises alone) and degraded, its state ('ready', 'degraded'
+        while serving custom exercises or the bundled baseline, or 'empty'),
+        where it came from, its size and age, and the progress of the
+        warm-up or rebuild job
+    """
+    size = len(EXERCISE_TRIE)
+    ready = exercise_trie_ready()
+    degraded = exercise_trie_degraded()
+    job = dict(_REBUILD_JOB)
+    if job.get('state') == 'running':
+        job['progress'] = CATALOG_SYNC.progress()
+    return {
+        'ready': ready,
+        'degraded': degraded,
+        'state': 'ready' if not degraded else 'degraded' if size else 'empty',
+        'source': TRIE_SOURCE,
+        'shared': SHARED_EXERCISE_TRIE,
+        'trie_size': size,
+        'last_updated': TRIE_LAST_UPDATED.isoformat() if TRIE_LAST_UPDATED else None,
+        'stale': TRIE_LAST_UPDATED is None or datetime.now() - TRIE_LAST_UPDATED >= TRIE_UPDATE_INTERVAL,
+        'exercise_records': len(EXERCISE_CATALOG),
+        'job': job,
+    }
+
+
+def load_exercise_usage_counts():
+    """
+    Count how often each exercise name is logged across all users
+    
+    Returns:
+        Dict of exercise name -> count, or None if Firestore is unavailable
+        (the trie then keeps its current weights)
+    """
+    from .firebase_service import count_exercise_usage
+    
+    try:
+        counts = count_exercise_usage()
+        print(f"Loaded usage counts for {len(counts)} logged exercises")
+        return counts
+    except Exception as e:
+        print(f"Error loading exercise usage counts: {e}")
+        return None
+
+
+def refresh_exercise_weights():
+    """
+    Recompute autocomplete ranking weights from all logged workouts
+    
+    Returns:
+        Number of distinct exercise names with a weight
+    """
+    usage_counts = load_exercise_usage_counts()
+    if usage_counts is None:
+        return len(EXERCISE_TRIE.weights)
+    
+    with TRIE_LOCK:
+        EXERCISE_TRIE.set_weights(usage_counts)
+    return len(usage_counts)
+
+
+def record_exercise_usage(exercise_name: str):
+    """
+    Bump an exercise's ranking weight after a user logs it
+    Only the trie nodes on that name's path are re-ranked.
+    In shared mode the mapped trie is read-only; logged exercises are
+    ranked from Firestore counts when the next snapshot is built.
+    """
+    if SHARED_EXERCISE_TRIE:
+        return
+    with TRIE_LOCK:
+        EXERCISE_TRIE.add_weight(exercise_name, 1)
+        if _PENDING_USAGE is not None:
+            _PENDING_USAGE[exercise_name] = _PENDING_USAGE.get(exercise_name, 0) + 1
+
+
+def load_user_exercise_counts(user_uid):
+    """
+    Count how often one user has logged each exercise name
+    
+    Returns:
+        Dict of exercise name -> count, or None if Firestore is unavailable
+    """
+    from .firebase_service import count_user_exercise_usage
+    
+    try:
+        return count_user_exercise_usage(user_uid)
+    except Exception as e:
+        print(f"Error loading exercise names for user {user_uid}: {e}")
+        return None
+
+
+# Per-user tries of the names each user has logged, merged into autocomplete
+# results at query time so personal exercises never touch EXERCISE_TRIE
+USER_OVERLAYS = UserExerciseOverlays(load_user_exercise_counts)
+
+
+def record_user_exercise(user_uid, exercise_name: str):
+    """Add a logged exercise to the user's own autocomplete names"""
+    if user_uid and exercise_name:
+        USER_OVERLAYS.record(user_uid, exercise_name)
+
+
+def forget_user_exercises(user_uid):
+    """Rebuild the user's own autocomplete names on their next lookup"""
+    if user_uid:
+        USER_OVERLAYS.invalidate(user_uid)
+
+
+def _merge_user_matches(user_uid, prefix: str, max_results: int, matches: list) -> list:
+    """
+    Put the user's own exercises matching prefix ahead of the global matches
+    
+    Typo-tolerant global matches are dropped once the user's own names give
+    exact hits, the same as for the global trie.
+    """
+    if not user_uid:
+        return matches
+    overlay = USER_OVERLAYS.get(user_uid)
+    if not overlay:
+        return matches
+    
+    prefix = prefix.lower().strip()
+    own = overlay.autocomplete(prefix, max_results, contains=len(prefix) >= 3)
+    if not own:
+        return matches
+    seen = set(own)
+    merged = [{'name': name, 'distance': 0} for name in own]
+    merged.extend(match for match in matches if match['distance'] == 0 and match['name'] not in seen)
+    return merged[:max_results]
+
+
+def fuzzy_distance_for(prefix: str) -> int:
+    """
+    Edit distance tolerated when falling back to fuzzy matching
+
+    Short prefixes get no tolerance, since at 3 characters one edit already
+    matches most of the catalogue.
+    """
+    length = len(prefix.strip())
+    if length < 4:
+        return 0
+    if length < 8:
+        return 1
+    return 2
+
+
+def get_autocomplete_matches(prefix: str, max_results: int = 10, user_uid=None) -> list:
+    """
+    Get autocomplete matches for exercise names based on prefix
+    
+    Exact matches (prefix, then names with words starting with each query
+    word, then contains for 3+ characters) are returned
+    when there are any. Otherwise the trie is searched for names within a
+    small edit distance of the prefix, so typos like "tricep pushdwon"
+    still find "tricep pushdown".
+    
+    With a user_uid, names that user has logged come first.
+    
+    Args:
+        prefix: The prefix to search for
+        max_results: Maximum number of suggestions to return
+        user_uid: User whose own exercises to include, if any
         
-        print(f"✅ Exercise Trie built successfully with {len(EXERCISE_TRIE)} exercises")
-        print(f"   Sample exercises: {list(exercise_names[:5])}")
-        return len(EXERCISE_TRIE)
+    Returns:
+        List of {'name': ..., 'distance': ...} dicts, closest first. Exact
+        hits have distance 0.
+    """
+    matches = _autocomplete(prefix, max_results)[0]
+    return _merge_user_matches(user_uid, prefix, max_results, matches)
 
 
-def get_autocomplete_suggestions(prefix: str, max_results: int = 10) -> list:
+def continue_autocomplete(prefix: str, max_results: int = 10, cursor: str = None, user_uid=None):
     """
-    Get autocomplete suggestions for exercise names based on prefix
+    Autocomplete as part of a typing session
+    
+    Pass the cursor from the previous response; when prefix extends that
+    response's prefix the lookup resumes from where it stopped and narrows
+    its candidates instead of searching the whole trie again. Unknown,
+    expired or stale cursors just start a fresh lookup.
     
     Args:
         prefix: The prefix to search for
         max_results: Maximum number of suggestions to return
+        cursor: Opaque cursor from the previous call, or None
+        user_uid: User whose own exercises to include, if any
         
     Returns:
-        List of exercise names that start with the prefix
+        (matches, cursor for the next call or None)
     """
-    global EXERCISE_TRIE
+    resume = AUTOCOMPLETE_SESSIONS.get(cursor) if cursor else None
+    matches, trie_cursor = _autocomplete(prefix, max_results, resume)
+    matches = _merge_user_matches(user_uid, prefix, max_results, matches)
+    if trie_cursor is None:
+        return matches, None
+    token = secrets.token_urlsafe(16)
+    AUTOCOMPLETE_SESSIONS.put(token, trie_cursor)
+    return matches, token
+
+
+def get_autocomplete_matches_batch(prefixes, max_results: int = 10, user_uid=None) -> list:
+    """
+    Get autocomplete matches for several prefixes at once
     
-    # Ensure trie is built
+    Every prefix is answered from the same trie, even if a rebuild publishes
+    part-way through. Prefixes are looked up in sorted order so each one can
+    resume from the cursor of the one before it when it extends it (e.g.
+    "bar" then "barb"), and duplicates are only looked up once.
+    
+    Args:
+        prefixes: The prefixes to search for
+        max_results: Maximum number of suggestions per prefix
+        user_uid: User whose own exercises to include, if any
+        
+    Returns:
+        One list of matches (as from get_autocomplete_matches) per prefix,
+        in the order given
+    """
+    normalized = [prefix.lower().strip() for prefix in prefixes]
+    trie = _ensure_exercise_trie()
+    
+    answers = {'': []}
+    cursor = None
+    for prefix in sorted(set(normalized) - {''}):
+        matches, cursor = _autocomplete(prefix, max_results, cursor, trie)
+        answers[prefix] = _merge_user_matches(user_uid, prefix, max_results, matches)
+    return [[dict(match) for match in answers[prefix]] for prefix in normalized]
+
+
+def _warmup_due():
+    """
+    True if the warm-up hasn't run, or WARMUP_RETRY_INTERVAL has passed since
+    the last one and it left autocomplete degraded or on a stale snapshot
+    """
     if len(EXERCISE_TRIE) == 0:
-        print(f"Trie is empty, building now...")
-        result = build_exercise_trie()
-        if result == 0:
-            print("⚠️ Warning: Trie build returned 0 exercises. API may be rate limiting or unavailable.")
+        return True
+    now = datetime.now()
+    stale = TRIE_LAST_UPDATED is None or now - TRIE_LAST_UPDATED >= TRIE_UPDATE_INTERVAL
+    if TRIE_SOURCE not in DEGRADED_SOURCES and not (TRIE_SOURCE == 'snapshot' and stale):
+        return False
+    return _WARMUP_STARTED is None or now - _WARMUP_STARTED >= WARMUP_RETRY_INTERVAL
+
+
+def _ensure_exercise_trie():
+    """
+    Return the trie to search, starting the warm-up if it hasn't run (or
+    retrying it while the trie is degraded or a stale snapshot); never
+    crawls on the request path
+    """
+    if SHARED_EXERCISE_TRIE:
+        _reattach_if_snapshot_changed()
     
-    print(f"Trie size: {len(EXERCISE_TRIE)} exercises")
+    if _warmup_due():
+        initialize_exercise_trie()
+    return EXERCISE_TRIE
+
+
+def _autocomplete(prefix: str, max_results: int = 10, resume=None, trie=None):
+    """
+    Lookup shared by get_autocomplete_matches(), continue_autocomplete()
+    and get_autocomplete_matches_batch()
     
-    with TRIE_LOCK:
-        # Try prefix match first
-        suggestions = EXERCISE_TRIE.autocomplete(prefix, max_results, contains=False)
-        
-        # If not enough results and prefix is 3+ chars, try contains search
-        if len(suggestions) < max_results and len(prefix) >= 3:
-            # Get all words and filter for contains
-            all_words = EXERCISE_TRIE.get_all_words()
-            prefix_lower = prefix.lower()
-            seen = {s.lower() for s in suggestions}
-            
-            for word in all_words:
-                if prefix_lower in word.lower() and word.lower() not in seen:
-                    suggestions.append(word)
-                    seen.add(word.lower())
-                    if len(suggestions) >= max_results:
-                        break
+    resume is the cursor to continue from, if any, and trie the trie to
+    search (the current EXERCISE_TRIE by default).
+    
+    Returns:
+        (matches, AutocompleteCursor or None)
+    """
+    prefix = prefix.lower().strip()
+    
+    # One reference for the whole lookup: a rebuild publishing mid-request
+    # can't mix results from two tries
+    if trie is None:
+        trie = _ensure_exercise_trie()
+    generation = trie.generation  # Read before the lookup, so an edit landing mid-way isn't cached as current
+    cache_key = (prefix, max_results)
+    cached = AUTOCOMPLETE_CACHE.get(cache_key, generation)
+    if cached is not None:
+        cached_matches, cursor = cached
+        return [dict(match) for match in cached_matches], cursor
+    print(f"Trie size: {len(trie)} exercises")
+    
+    # Prefix matches first, then mid-name word matches from the token index;
+    # for 3+ characters top up with names containing the prefix, answered
+    # from the trie's n-gram index
+    suggestions, cursor = trie.autocomplete_from(resume, prefix, max_results, contains=len(prefix) >= 3)
+    matches = [{'name': name, 'distance': 0} for name in suggestions]
+    
+    # No exact hits: retry allowing a few typos
+    max_distance = fuzzy_distance_for(prefix)
+    if not matches and max_distance > 0:
+        fuzzy = trie.fuzzy_autocomplete(prefix, max_results, max_distance)
+        matches = [{'name': name, 'distance': distance} for name, distance in fuzzy]
+    
+    print(f"Autocomplete for '{prefix}': found {len(matches)} suggestions")
+    if len(matches) > 0:
+        print(f"First few suggestions: {[m['name'] for m in matches[:5]]}")
+    
+    if len(trie) > 0:
+        AUTOCOMPLETE_CACHE.put(cache_key, (tuple(dict(match) for match in matches), cursor), generation)
+    return matches, cursor
+
+
+def get_autocomplete_suggestions(prefix: str, max_results: int = 10) -> list:
+    """
+    Get autocomplete suggestions for exercise names based on prefix
+    
+    Args:
+        prefix: The prefix to search for
+        max_results: Maximum number of suggestions to return
         
-        print(f"Autocomplete for '{prefix}': found {len(suggestions)} suggestions")
-        if len(suggestions) > 0:
-            print(f"First few suggestions: {suggestions[:5]}")
+    Returns:
+        List of exercise names, exact matches first and typo-tolerant
+        matches only when nothing matched exactly
+    """
+    return [match['name'] for match in get_autocomplete_matches(prefix, max_results)]
+
+
+def _serve_custom_exercises():
+    """Publish a trie of just CUSTOM_EXERCISES if nothing is being served yet"""
+    global EXERCISE_TRIE, TRIE_SOURCE
     
-    return suggestions
+    trie = new_exercise_trie()
+    trie.bulk_load(CUSTOM_EXERCISES)
+    with TRIE_LOCK:
+        if len(EXERCISE_TRIE) == 0:
+            EXERCISE_TRIE = trie
+            TRIE_SOURCE = 'custom'
 
 
 def initialize_exercise_trie():
     """
-    Initialize the exercise Trie (call this on app startup)
-    This will build the trie in the background
+    Initialize the exercise Trie (called when the app is ready)
+    
+    Returns at once: the custom exercises are served straight away, and a
+    background warm-up loads the on-disk snapshot and then refreshes it
+    from the API if it is stale. Until the warm-up lands, autocomplete is
+    degraded rather than blocked. In shared mode the snapshot is mapped
+    read-only instead (a cheap mmap); only when there is none yet, or just
+    the bundled baseline, does a background crawl write one.
     """
-    # Build trie in a separate thread to avoid blocking
-    thread = threading.Thread(target=build_exercise_trie, daemon=True)
-    thread.start()
-    print("Exercise Trie initialization started in background...")
+    global _WARMUP_STARTED
+    
+    _WARMUP_STARTED = datetime.now()
+    if SHARED_EXERCISE_TRIE:
+        if attach_shared_exercise_trie() > 0 and not exercise_trie_degraded():
+            print("Exercise Trie attached to the shared snapshot")
+            return
+        _serve_custom_exercises()
+        start_exercise_trie_rebuild(force_rebuild=False)
+        print("No shared exercise snapshot yet; building one in background...")
+        return
+    _serve_custom_exercises()
+    start_exercise_trie_rebuild(force_rebuild=False, warmup=True)
+    print("Exercise Trie warm-up started in background...")
 
 
-# Don't auto-initialize on import - let it be called explicitly or on first use
-# This prevents rate limiting issues on startup
-# initialize_exercise_trie()
+# Don't auto-initialize on import: ProgressConfig.ready() starts the warm-up
+# for serving processes only, so management commands don't crawl
 
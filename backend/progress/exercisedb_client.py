@@ -0,0 +1,149 @@
+"""
+Concurrent client for crawling the ExerciseDB exercise catalogue
+"""
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+EXERCISEDB_API_URL = "https://www.exercisedb.dev/api/v1/exercises"
+PAGE_SIZE = 100
+MAX_WORKERS = 8  # Pages fetched concurrently (also the connection pool size)
+MAX_PAGES = 200  # Safety limit (20,000 exercises at PAGE_SIZE 100)
+MAX_RETRIES = 6  # Per page, for 429s, 5xx responses and connection errors
+
+
+class ExerciseDBError(Exception):
+    """Raised when a page can't be fetched after all retries"""
+
+
+class AdaptiveRateLimiter:
+    """
+    Spaces out request starts across threads
+
+    Additive increase / multiplicative decrease: every successful response
+    raises the allowed rate a little, every 429 halves it and, if the
+    server sent Retry-After, holds all requests until then.
+    """
+
+    def __init__(self, rate: float = 10.0, min_rate: float = 0.5, max_rate: float = 50.0):
+        self.rate = rate  # Requests per second
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block until this caller's request slot comes up"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1.0 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + 0.5)
+
+    def on_throttle(self, retry_after: float = None) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            if retry_after:
+                self._next_slot = max(self._next_slot, time.monotonic() + retry_after)
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (0-based)"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def _retry_after(response) -> float:
+    try:
+        return float(response.headers.get('Retry-After', 0))
+    except ValueError:
+        return 0.0  # HTTP-date form; the backoff delay covers it
+
+
+def create_session(pool_size: int = MAX_WORKERS) -> requests.Session:
+    """Session whose connection pool keeps one keep-alive connection per worker"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Accept'] = 'application/json'
+    return session
+
+
+def _get_page(session, limiter, api_url, offset, limit=PAGE_SIZE, timeout=30, headers=None):
+    """
+    GET one page, retrying 429s, 5xx responses and connection errors
+    with exponential backoff
+
+    Returns:
+        The final successful (2xx/3xx) Response
+    """
+    error = None
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.wait()
+        try:
+            response = session.get(api_url, params={'offset': offset, 'limit': limit},
+                                   headers=headers, timeout=timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            error = e
+        else:
+            if response.status_code == 429:
+                limiter.on_throttle(_retry_after(response))
+                error = "HTTP 429 (rate limited)"
+            elif response.status_code >= 500:
+                error = f"HTTP {response.status_code}"
+            else:
+                response.raise_for_status()
+                limiter.on_success()
+                return response
+
+        if attempt < MAX_RETRIES:
+            delay = backoff_delay(attempt)
+            print(f"⚠️ Page at offset {offset} failed ({error}), retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+    raise ExerciseDBError(f"Giving up on page at offset {offset} after {MAX_RETRIES + 1} attempts: {error}")
+
+
+def fetch_page_if_changed(session, limiter, api_url, offset, limit=PAGE_SIZE, validators=None, timeout=30):
+    """
+    Conditionally fetch one page using the ETag / Last-Modified seen last time
+
+    Args:
+        validators: {'etag': ..., 'last_modified': ...} from the previous fetch, if any
+
+    Returns:
+        (decoded JSON body, or None if the server answered 304 Not Modified,
+         validators to send next time)
+    """
+    validators = validators or {}
+    headers = {}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+
+    response = _get_page(session, limiter, api_url, offset, limit, timeout, headers)
+    if response.status_code == 304:
+        return None, validators
+    return response.json(), {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+
+
+def page_exercises(data):
+    """Return (exercises, metadata) from a page body in either response shape"""
+    if isinstance(data, dict):
+        return data.get('data', []) or [], data.get('metadata', {}) or {}
+    if isinstance(data, list):
+        return data, {}
+    return [], {}
+
@@ -2,6 +2,7 @@
 Firebase service layer for Progress
 """
 from config.firestore import get_firestore_client
+from .exercise_trie_service import forget_user_exercises, record_exercise_usage, record_user_exercise
 from datetime import datetime
 import uuid
 
@@ -115,8 +116,46 @@ def add_exercise_to_day(day_id, exercise_name, reps, sets, weight):
         'updated_at': datetime.now()
     })
     
+    # Logged exercises rank higher in autocomplete
+    record_exercise_usage(exercise_name)
+    record_user_exercise(day_data.get('user_uid'), exercise_name)
+    
     return get_workout_day(day_id)
 
+def count_exercise_usage():
+    """
+    Count how many times each exercise name appears in workout_days
+    across all users (names are lowercased)
+    """
+    db = get_firestore_client()
+    counts = {}
+    
+    # Only the exercises field is needed, so skip the rest of each document
+    for day in db.collection('workout_days').select(['exercises']).stream():
+        for exercise in day.to_dict().get('exercises', []):
+            name = (exercise.get('name') or '').lower().strip()
+            if name:
+                counts[name] = counts.get(name, 0) + 1
+    
+    return counts
+
+def count_user_exercise_usage(user_uid):
+    """
+    Count how many times each exercise name appears in one user's
+    workout_days (names are lowercased)
+    """
+    db = get_firestore_client()
+    counts = {}
+    
+    days_query = db.collection('workout_days').where('user_uid', '==', user_uid).select(['exercises'])
+    for day in days_query.stream():
+        for exercise in day.to_dict().get('exercises', []):
+            name = (exercise.get('name') or '').lower().strip()
+            if name:
+                counts[name] = counts.get(name, 0) + 1
+    
+    return counts
+
 def update_exercise_in_day(day_id, exercise_id, exercise_name=None, reps=None, sets=None, weight=None):
     """
     Update an exercise in a workout day
@@ -149,6 +188,10 @@ def update_exercise_in_day(day_id, exercise_id, exercise_name=None, reps=None, s
         'updated_at': datetime.now()
     })
     
+    if exercise_name is not None:
+        # A rename changes the user's own autocomplete names
+        forget_user_exercises(day_data.get('user_uid'))
+    
     return get_workout_day(day_id)
 
 def delete_exercise_from_day(day_id, exercise_id):
@@ -173,6 +216,8 @@ def delete_exercise_from_day(day_id, exercise_id):
         'updated_at': datetime.now()
     })
     
+    forget_user_exercises(day_data.get('user_uid'))
+    
     return get_workout_day(day_id)
 
 def update_workout_day(day_id, date=None, workout_type=None):
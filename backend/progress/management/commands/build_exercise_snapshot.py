@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from progress import exercise_trie_service
+from progress.exercise_snapshot import load_snapshot
+from progress.exercise_trie_service import (
+    BASELINE_SNAPSHOT_PATH,
+    SNAPSHOT_PATH,
+    TRIE_UPDATE_INTERVAL,
+    build_exercise_trie,
+    save_exercise_snapshot,
+)
+
+
+class Command(BaseCommand):
+    help = 'Crawl ExerciseDB and write the exercise autocomplete snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--baseline',
+            action='store_true',
+            help='Write the bundled baseline snapshot shipped with the code instead of the runtime one',
+        )
+        parser.add_argument(
+            '--if-stale',
+            action='store_true',
+            help='Do nothing if the runtime snapshot was built within the trie update interval',
+        )
+
+    def handle(self, *args, **options):
+        if options['if_stale'] and not options['baseline']:
+            snapshot = load_snapshot(SNAPSHOT_PATH)
+            if snapshot is not None and snapshot.built_at and \
+                    time.time() - snapshot.built_at < TRIE_UPDATE_INTERVAL.total_seconds():
+                self.stdout.write(f'Exercise snapshot is fresh ({len(snapshot)} exercises), not rebuilding')
+                return
+
+        # build_exercise_trie saves the runtime snapshot itself on success.
+        # Without the API it still returns the custom exercises (or keeps an
+        # older trie), so check where the trie came from, not its size
+        count = build_exercise_trie(force_rebuild=True)
+        if exercise_trie_service.TRIE_SOURCE != 'api':
+            raise CommandError('No exercises fetched from ExerciseDB, snapshot not written')
+
+        if options['baseline']:
+            # built_at=0 so processes starting from the baseline still refresh from the API
+            # Read the module attribute: the build published a new trie object
+            trie = exercise_trie_service.EXERCISE_TRIE
+            save_exercise_snapshot(trie.get_all_words(), path=BASELINE_SNAPSHOT_PATH, built_at=0)
+
+        self.stdout.write(self.style.SUCCESS(f'Exercise snapshot written with {count} exercises'))
@@ -0,0 +1,191 @@
+"""
+Read-only exercise trie answered straight from a memory-mapped snapshot
+"""
+import re
+from heapq import nsmallest
+
+from config.data_structures.token_index import TokenIndex
+from config.data_structures.trie import WordSuffixIndex, _common_prefix_length, _next_edit_row, next_generation
+
+
+class MappedExerciseTrie:
+    """
+    Serves the Trie read API (autocomplete, fuzzy_autocomplete, search, ...)
+    from an ExerciseSnapshot without building any per-name Python objects
+
+    Every process that maps the same snapshot file shares one copy of it in
+    the page cache, so N gunicorn workers cost one catalogue's worth of
+    memory instead of N tries. The sorted names stand in for the trie: a
+    prefix is one bisect to a contiguous run of names, word and substring
+    matches are C-level finds over the name blob, and fuzzy search walks the
+    names in order, reusing the edit-distance rows of the prefix each name
+    shares with the one before it and skipping a whole run once it can no
+    longer match.
+
+    Only names with a non-zero weight are held in Python (their ranking
+    order), plus a WordSuffixIndex once a fuzzy search needs it.
+    The trie never changes; a new snapshot means a new instance.
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.generation = next_generation()
+        self.top_k = 0
+        weighted = [(index, weight) for index, weight in enumerate(map(snapshot.weight, range(len(snapshot))))
+                    if weight]
+        weighted.sort(key=lambda item: (-item[1], item[0]))
+        # Ranking is heaviest first, then alphabetical (= index order)
+        self._heavy = [index for index, weight in weighted if weight > 0]
+        self._light = [index for index, weight in weighted if weight < 0]
+        self._word_suffixes = None  # Built on the first fuzzy search
+
+    @staticmethod
+    def _normalize(word: str) -> str:
+        return word.lower().strip() if word else ''
+
+    @property
+    def weights(self) -> dict:
+        return self.snapshot.weights()
+
+    def _rank_key(self, index: int):
+        return (-self.snapshot.weight(index), index)
+
+    def _top_in_range(self, lo: int, hi: int, k: int) -> list:
+        """Indexes of the k best-ranked names among names lo..hi-1"""
+        results = [index for index in self._heavy if lo <= index < hi][:k]
+        if len(results) < k:
+            weight = self.snapshot.weight
+            for index in range(lo, hi):
+                if not weight(index):
+                    results.append(index)
+                    if len(results) == k:
+                        return results
+        if len(results) < k:
+            results.extend([index for index in self._light if lo <= index < hi][:k - len(results)])
+        return results
+
+    @staticmethod
+    def _word_starts_pattern(query_tokens: list):
+        """Regex matching names with a word starting with each of query_tokens, in any order"""
+        return re.compile(''.join(f'(?=.*(?<![a-z0-9]){re.escape(token)})' for token in query_tokens), re.S)
+
+    def autocomplete(self, prefix: str, max_results: int = 10, contains: bool = False) -> list:
+        """Same results as Trie.autocomplete() over the same names and weights"""
+        prefix = self._normalize(prefix)
+        if not prefix or max_results <= 0:
+            return []
+
+        lo, hi = self.snapshot.prefix_range(prefix)
+        found = self._top_in_range(lo, hi, max_results)
+        taken = set(range(lo, hi)) if len(found) < max_results else ()
+
+        query_tokens = TokenIndex.tokenize(prefix)
+        if len(found) < max_results and query_tokens:
+            # Anchor on the longest query word, the most selective to scan for
+            anchor = max(query_tokens, key=len)
+            others = list(query_tokens)
+            others.remove(anchor)
+            hits = {index for index in self.snapshot.find_names(anchor, token_start=True) if index not in taken}
+            if others:
+                pattern = self._word_starts_pattern(others)
+                hits = {index for index in hits if pattern.match(self.snapshot.name(index))}
+            found.extend(nsmallest(max_results - len(found), hits, key=self._rank_key))
+            taken = taken | hits
+
+        if contains and len(found) < max_results:
+            hits = {index for index in self.snapshot.find_names(prefix) if index not in taken}
+            found.extend(nsmallest(max_results - len(found), hits, key=self._rank_key))
+
+        return [self.snapshot.name(index) for index in found]
+
+    def autocomplete_from(self, cursor, prefix: str, max_results: int = 10, contains: bool = False):
+        """autocomplete() without session cursors: each lookup is already a bisect"""
+        return self.autocomplete(prefix, max_results, contains), None
+
+    def fuzzy_autocomplete(self, query: str, max_results: int = 10, max_distance: int = 2) -> list:
+        """Same results as Trie.fuzzy_autocomplete() over the same names and weights"""
+        query = self._normalize(query)
+        if not query or max_results <= 0:
+            return []
+        max_distance = min(max_distance, len(query) - 1)
+
+        matches = {}  # name index -> distance
+        first_row = tuple(range(len(query) + 1))
+        # path[d] is the DP state after the first d characters of `previous`
+        path = [(first_row, None, '', first_row[-1])]
+        previous = ''
+        index = 0
+        while index < len(self.snapshot):
+            name = self.snapshot.name(index)
+            del path[_common_prefix_length(previous, name, 0) + 1:]
+            row, prev_row, prev_char, best = path[-1]
+
+            dead_at = None
+            for depth in range(len(path) - 1, len(name)):
+                char = name[depth]
+                row, prev_row = _next_edit_row(query, row, prev_row, prev_char, char), row
+                prev_char = char
+                best = min(best, row[-1])
+                path.append((row, prev_row, prev_char, best))
+                if min(row) > max_distance:
+                    dead_at = depth + 1
+                    break
+
+            if dead_at is None:
+                if best <= max_distance:
+                    matches[index] = best
+                previous = name
+                index += 1
+                continue
+
+            # Rows only grow from here, so every name sharing this prefix
+            # matches at best or not at all; jump past the whole run
+            previous = name[:dead_at]
+            end = self.snapshot.prefix_range(previous)[1]
+            if best <= max_distance:
+                for match in self._top_in_range(index, end, max_results):
+                    matches[match] = best
+            index = end
+
+        # Then from later words, as Trie does with index_tokens
+        if self._word_suffixes is None:
+            word_suffixes = WordSuffixIndex()
+            for name in self.snapshot.names():
+                word_suffixes.add(name)
+            self._word_suffixes = word_suffixes
+        ranked = {self.snapshot.name(index): (distance, 0) for index, distance in matches.items()}
+        for name, distance in self._word_suffixes.fuzzy_matches(query, max_distance).items():
+            if (distance, 1) < ranked.get(name, (distance + 1, 0)):
+                ranked[name] = (distance, 1)
+
+        best = nsmallest(max_results, ranked.items(),
+                         key=lambda match: (match[1], -self.get_weight(match[0]), match[0]))
+        return [(name, distance) for name, (distance, _tier) in best]
+
+    def search(self, word: str) -> bool:
+        word = self._normalize(word)
+        if not word:
+            return False
+        lo, hi = self.snapshot.prefix_range(word)
+        return lo < hi and self.snapshot.name(lo) == word
+
+    def starts_with(self, prefix: str) -> bool:
+        prefix = self._normalize(prefix)
+        if not prefix:
+            return False
+        lo, hi = self.snapshot.prefix_range(prefix)
+        return lo < hi
+
+    def get_weight(self, word: str) -> float:
+        word = self._normalize(word)
+        lo, hi = self.snapshot.prefix_range(word) if word else (0, 0)
+        return self.snapshot.weight(lo) if lo < hi and self.snapshot.name(lo) == word else 0
+
+    def get_all_words(self) -> list:
+        return list(self.snapshot.names())
+
+    def __len__(self) -> int:
+        return len(self.snapshot)
+
+    def __contains__(self, word: str) -> bool:
+        return self.search(word)
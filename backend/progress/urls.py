@@ -12,5 +12,7 @@ urlpatterns = [
     
     # Exercise autocomplete endpoint
     path('progress/exercises/autocomplete/', views.exercise_autocomplete, name='exercise_autocomplete'),
+    path('progress/exercises/autocomplete/batch/', views.exercise_autocomplete_batch, name='exercise_autocomplete_batch'),
     path('progress/exercises/rebuild-trie/', views.rebuild_exercise_trie, name='rebuild_exercise_trie'),
+    path('progress/exercises/health/', views.exercise_trie_health, name='exercise_trie_health'),
 ]
@@ -0,0 +1,133 @@
+"""
+Per-user exercise tries layered over the global exercise trie
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from config.data_structures.trie import Trie
+
+# Total (estimated) memory the cached per-user tries may take
+OVERLAY_MEMORY_BUDGET = 16 * 1024 * 1024
+
+# Seconds before a user whose names couldn't be loaded is tried again
+FAILED_LOAD_TTL = 30
+
+# Rough cost of a small Trie with a token index, measured with tracemalloc
+_TRIE_BASE_BYTES = 2048
+_BYTES_PER_NAME = 1024
+_BYTES_PER_CHAR = 8
+
+
+def estimate_overlay_bytes(names) -> int:
+    """Approximate memory held by a per-user trie over names"""
+    return _TRIE_BASE_BYTES + sum(_BYTES_PER_NAME + _BYTES_PER_CHAR * len(name) for name in names)
+
+
+class UserExerciseOverlays:
+    """
+    Lazily built per-user tries of the exercise names each user has logged
+
+    A user's trie is built on their first autocomplete from loader(user_uid),
+    which returns a name -> times-logged mapping (None if it can't be read
+    right now). The names are weighted by those counts, so a user's most
+    logged exercises rank first. Tries are kept in least-recently-used order
+    and evicted once their estimated total size passes memory_budget. A
+    failed load is remembered for failed_load_ttl seconds, so an outage
+    costs one loader call per user per TTL rather than one per keystroke.
+    """
+
+    def __init__(self, loader, memory_budget=OVERLAY_MEMORY_BUDGET, failed_load_ttl=FAILED_LOAD_TTL):
+        self.loader = loader
+        self.memory_budget = memory_budget
+        self.failed_load_ttl = failed_load_ttl
+        self._tries = OrderedDict()  # user_uid -> (trie, estimated bytes)
+        self._failed = OrderedDict()  # user_uid -> monotonic time to retry the load, oldest first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.evictions = 0
+        self.failed_loads = 0
+
+    def get(self, user_uid):
+        """Return the user's trie, building it if needed; None if it can't be loaded"""
+        with self._lock:
+            entry = self._tries.get(user_uid)
+            if entry is not None:
+                self._tries.move_to_end(user_uid)
+                return entry[0]
+            retry_at = self._failed.get(user_uid)
+            if retry_at is not None and retry_at > time.monotonic():
+                return None
+
+        # Load outside the lock so one slow Firestore read doesn't block other users
+        counts = self.loader(user_uid)
+        if counts is None:
+            with self._lock:
+                now = time.monotonic()
+                self._failed.pop(user_uid, None)
+                self._failed[user_uid] = now + self.failed_load_ttl
+                # Entries are in expiry order; drop the ones already due
+                while self._failed and next(iter(self._failed.values())) <= now:
+                    self._failed.popitem(last=False)
+                self.failed_loads += 1
+            return None
+        trie = Trie(index_tokens=True)
+        trie.bulk_load(counts, weights=counts)
+
+        with self._lock:
+            entry = self._tries.get(user_uid)
+            if entry is not None:
+                # Another request built it meanwhile
+                return entry[0]
+            self._failed.pop(user_uid, None)
+            self._store(user_uid, trie, estimate_overlay_bytes(trie.get_all_words()))
+            self.builds += 1
+        return trie
+
+    def record(self, user_uid, name) -> None:
+        """Count a newly logged exercise in the user's trie, if it is loaded"""
+        with self._lock:
+            entry = self._tries.get(user_uid)
+            if entry is None:
+                # Picked up from Firestore when the trie is next built
+                return
+            trie, size = entry
+            is_new = name.lower().strip() not in trie
+            # Writes go through the lock; autocomplete reads the trie without it
+            trie.insert(name)
+            trie.add_weight(name)
+            if is_new:
+                self._store(user_uid, trie, size + estimate_overlay_bytes([name]) - _TRIE_BASE_BYTES)
+
+    def invalidate(self, user_uid) -> None:
+        """Drop the user's trie (e.g. after an exercise is renamed or deleted)"""
+        with self._lock:
+            self._failed.pop(user_uid, None)
+            entry = self._tries.pop(user_uid, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+    def _store(self, user_uid, trie, size) -> None:
+        previous = self._tries.pop(user_uid, None)
+        if previous is not None:
+            self._bytes -= previous[1]
+        self._tries[user_uid] = (trie, size)
+        self._bytes += size
+        # Keep at least the trie just stored, even if it alone is over budget
+        while self._bytes > self.memory_budget and len(self._tries) > 1:
+            _uid, (_trie, evicted_size) = self._tries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'users': len(self._tries),
+                'estimated_bytes': self._bytes,
+                'memory_budget': self.memory_budget,
+                'builds': self.builds,
+                'evictions': self.evictions,
+                'failed_loads': self.failed_loads,
+                'users_awaiting_retry': len(self._failed),
+            }
@@ -1,7 +1,7 @@
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from datetime import datetime
 import json
 from .firebase_service import (
@@ -16,7 +16,12 @@ from .firebase_service import (
 )
 from authentication.firebase_service import verify_firebase_token
 from config.firebase import initialize_firebase
-from .exercise_trie_service import get_autocomplete_suggestions, build_exercise_trie
+from .exercise_trie_service import continue_autocomplete, exercise_trie_degraded, get_autocomplete_matches_batch
+
+# Most prefixes a single batch autocomplete request may ask for
+MAX_AUTOCOMPLETE_BATCH = 50
+# Most suggestions an autocomplete request may ask for, per prefix
+MAX_AUTOCOMPLETE_RESULTS = 50
 
 # Initialize Firebase on app startup
 initialize_firebase()
@@ -180,27 +185,53 @@ def exercise_detail(request, day_id, exercise_id):
         return JsonResponse(updated_day)
 
 
+def _autocomplete_limit(value):
+    """'limit' from a request, clamped to 0..MAX_AUTOCOMPLETE_RESULTS; ValueError/TypeError unless an integer"""
+    return min(max(int(value), 0), MAX_AUTOCOMPLETE_RESULTS)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def exercise_autocomplete(request):
     """
     Get autocomplete suggestions for exercise names based on prefix
     Query parameter: 'q' (the prefix to search for)
-    Optional parameter: 'limit' (max number of results, default: 10)
+    Optional parameter: 'limit' (max number of results, default: 10, at
+    most MAX_AUTOCOMPLETE_RESULTS)
+    Optional parameter: 'cursor' (the 'cursor' from the previous response
+    while the user keeps typing, so the lookup resumes where it left off)
+    
+    Exercises the user has logged themselves are suggested first.
+    
+    'matches' carries each suggestion's edit distance from the query
+    (0 for exact hits); 'fuzzy' is true when only typo-tolerant matches
+    were found; 'degraded' is true while the catalogue is still warming up
+    and only custom (or bundled) exercises are searched.
     """
     prefix = request.GET.get('q', '').strip()
-    max_results = int(request.GET.get('limit', 10))
+    cursor = request.GET.get('cursor') or None
+    try:
+        max_results = _autocomplete_limit(request.GET.get('limit', 10))
+    except ValueError:
+        return JsonResponse({'error': "'limit' must be an integer", 'suggestions': []}, status=400)
     
     if not prefix:
         return JsonResponse({'suggestions': []})
     
     try:
         print(f"Autocomplete request for prefix: '{prefix}'")
-        suggestions = get_autocomplete_suggestions(prefix, max_results)
+        # FirebaseAuthentication has already verified the token
+        user_uid = request.user.uid if hasattr(request.user, 'uid') else None
+        matches, next_cursor = continue_autocomplete(prefix, max_results, cursor, user_uid)
+        suggestions = [match['name'] for match in matches]
         print(f"Found {len(suggestions)} suggestions: {suggestions[:5]}...")
         return JsonResponse({
             'suggestions': suggestions,
-            'count': len(suggestions)
+            'matches': matches,
+            'fuzzy': any(match['distance'] > 0 for match in matches),
+            'count': len(suggestions),
+            'cursor': next_cursor,
+            'degraded': exercise_trie_degraded()
         })
     except Exception as e:
         print(f"Error in exercise_autocomplete: {e}")
@@ -209,34 +240,111 @@ def exercise_autocomplete(request):
         return JsonResponse({'error': str(e), 'suggestions': []}, status=500)
 
 
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def exercise_autocomplete_batch(request):
+    """
+    Autocomplete several prefixes in one request (e.g. every exercise field
+    of the workout-day editor)
+    GET: repeated 'q' parameters, optional 'limit'
+    POST: {"prefixes": [...], "limit": 10}
+    'limit' is per prefix, at most MAX_AUTOCOMPLETE_RESULTS.
+    
+    Returns one result per prefix, in the order given, each shaped like an
+    exercise_autocomplete response. All prefixes are answered from the same
+    Trie.
+    """
+    if request.method == 'POST':
+        try:
+            body = request.body.decode('utf-8') if isinstance(request.body, bytes) else request.body
+            data = json.loads(body) if body else {}
+        except json.JSONDecodeError as e:
+            return JsonResponse({'error': f'Invalid JSON: {str(e)}'}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({'error': 'The body must be a JSON object'}, status=400)
+        prefixes = data.get('prefixes', [])
+        limit = data.get('limit', 10)
+    else:
+        prefixes = request.GET.getlist('q')
+        limit = request.GET.get('limit', 10)
+    
+    try:
+        max_results = _autocomplete_limit(limit)
+    except (ValueError, TypeError):
+        return JsonResponse({'error': "'limit' must be an integer"}, status=400)
+    if not isinstance(prefixes, list) or not all(isinstance(prefix, str) for prefix in prefixes):
+        return JsonResponse({'error': 'prefixes must be a list of strings'}, status=400)
+    if len(prefixes) > MAX_AUTOCOMPLETE_BATCH:
+        return JsonResponse({'error': f'At most {MAX_AUTOCOMPLETE_BATCH} prefixes per request'}, status=400)
+    
+    try:
+        results = []
+        user_uid = request.user.uid if hasattr(request.user, 'uid') else None
+        answers = get_autocomplete_matches_batch(prefixes, max_results, user_uid)
+        for prefix, matches in zip(prefixes, answers):
+            suggestions = [match['name'] for match in matches]
+            results.append({
+                'q': prefix,
+                'suggestions': suggestions,
+                'matches': matches,
+                'fuzzy': any(match['distance'] > 0 for match in matches),
+                'count': len(suggestions)
+            })
+        return JsonResponse({'results': results, 'count': len(results), 'degraded': exercise_trie_degraded()})
+    except Exception as e:
+        print(f"Error in exercise_autocomplete_batch: {e}")
+        import traceback
+        traceback.print_exc()
+        return JsonResponse({'error': str(e), 'results': []}, status=500)
+
+
 @api_view(['POST', 'GET'])
 @permission_classes([IsAuthenticated])
 def rebuild_exercise_trie(request):
     """
     Manually rebuild the exercise Trie (admin/debug endpoint)
-    GET: Check Trie status
-    POST: Rebuild the Trie
+    GET: Check Trie status and the last rebuild job
+    POST: Start a rebuild in the background and return immediately;
+          poll GET for the outcome. Autocomplete keeps serving the
+          current Trie until the new one is swapped in.
     """
-    from .exercise_trie_service import EXERCISE_TRIE, build_exercise_trie
+    from .exercise_trie_service import get_exercise_trie_status, start_exercise_trie_rebuild
     
     if request.method == 'GET':
-        # Return Trie status
+        status = get_exercise_trie_status()
         return JsonResponse({
             'success': True,
-            'trie_size': len(EXERCISE_TRIE),
-            'message': f'Trie contains {len(EXERCISE_TRIE)} exercises'
+            'job': status,
+            'trie_size': status['trie_size'],
+            'message': f"Trie contains {status['trie_size']} exercises"
         })
     
     elif request.method == 'POST':
         try:
-            count = build_exercise_trie(force_rebuild=True)
+            status, started = start_exercise_trie_rebuild(force_rebuild=True)
             return JsonResponse({
                 'success': True,
-                'count': count,
-                'message': f'Exercise Trie rebuilt with {count} exercises'
-            })
+                'job': status,
+                'message': 'Exercise Trie rebuild started' if started else 'Exercise Trie rebuild already running'
+            }, status=202)
         except Exception as e:
-            print(f"Error rebuilding exercise trie: {e}")
+            print(f"Error starting exercise trie rebuild: {e}")
             import traceback
             traceback.print_exc()
-            return JsonResponse({'error': str(e)}, status=500)
\ No newline at end of file
+            return JsonResponse({'error': str(e)}, status=500)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def exercise_trie_health(request):
+    """
+    Readiness check for exercise autocomplete (for load balancers and probes)
+    GET: Trie state ('ready', 'degraded' or 'empty'), source, size, age and
+         warm-up/rebuild progress. 200 once ready (a bundled baseline
+         with exercises beyond the custom ones counts, with 'degraded'
+         true), 503 while only custom exercises are served.
+    """
+    from .exercise_trie_service import get_exercise_trie_health
+    
+    health = get_exercise_trie_health()
+    return JsonResponse(health, status=200 if health['ready'] else 503)
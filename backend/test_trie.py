@@ -11,7 +11,8 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
 from config.firebase import initialize_firebase
-from progress.exercise_trie_service import build_exercise_trie, get_autocomplete_suggestions, EXERCISE_TRIE
+from progress import exercise_trie_service
+from progress.exercise_trie_service import build_exercise_trie, get_autocomplete_suggestions
 
 initialize_firebase()
 
@@ -35,8 +36,10 @@ for prefix in test_prefixes:
         print(f"      Examples: {suggestions[:3]}")
 
 print("\n3. Trie Statistics:")
-print(f"   Total exercises in Trie: {len(EXERCISE_TRIE)}")
-print(f"   Sample exercises: {list(EXERCISE_TRIE.get_all_words()[:10])}")
+# Read the module attribute: the build published a new trie object
+trie = exercise_trie_service.EXERCISE_TRIE
+print(f"   Total exercises in Trie: {len(trie)}")
+print(f"   Sample exercises: {list(trie.get_all_words()[:10])}")
 
 print("\n" + "=" * 60)
 print("Test complete!")